@@ -4,4 +4,6 @@ set -o errexit
 
 pip install -r requirements.txt
 python manage.py collectstatic --no-input
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+python manage.py createcachetable
+python -m llm.snapshot
\ No newline at end of file
@@ -6,6 +6,18 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 django_asgi_app = get_asgi_application()
 
+# Barrido periódico de reservas/pagos caducados (solo si SWEEP_INTERVAL_MINUTES > 0)
+from core.sweeper import start_periodic  # noqa: E402
+start_periodic()
+
+# Despachador de la outbox de notificaciones en el event loop del servidor
+from core import outbox  # noqa: E402
+outbox.start()
+
+# Resúmenes de paquetes: se refrescan en un hilo aparte, fuera de las requests
+from core import package_summaries  # noqa: E402
+package_summaries.start_worker()
+
 # Importa el routing de la app 'core' que contiene websocket_urlpatterns
 try:
     from core.routing import websocket_urlpatterns
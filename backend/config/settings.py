@@ -15,6 +15,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'drf_yasg',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -89,6 +90,26 @@ CHANNEL_LAYERS = {
 #     },
 # }
 
+# Cache. 'default' vive en memoria de cada proceso (bitmaps de ocupación y calendarios);
+# 'compartido' guarda lo que todos los procesos (workers de Daphne y comandos de manage.py) deben
+# ver igual: los tokens de versión de las respuestas cacheadas. Sin Redis, 'compartido' es una
+# tabla de la BD (`manage.py createcachetable`). Con CACHE_REDIS_URL ambos usan Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'munaybol',
+    },
+    'compartido': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'munaybol_cache',
+    },
+}
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES['default'] = CACHES['compartido'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_REDIS_URL'],
+    }
+
 DEFAULT_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '120'))
 DEFAULT_DB_KEEPALIVES = int(os.environ.get('DB_KEEPALIVES', '1'))
 DEFAULT_DB_KEEPALIVES_IDLE = int(os.environ.get('DB_KEEPALIVES_IDLE', '30'))
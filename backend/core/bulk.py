@@ -0,0 +1,149 @@
+"""
+Operaciones masivas del catálogo para superadmin: actualizar campos, activar/desactivar y
+ajustar precios en porcentaje sobre un conjunto filtrado.
+
+Cada lote es un único UPDATE sobre hasta `batch_size` pks (recorridos por pk ascendente, en su
+propia transacción), así un trabajo grande no retiene locks ni una transacción larga.
+`.update()` no dispara señales ni auto_now: aquí se fija fecha_actualizacion y se invalidan
+a mano el cache de respuestas, los calendarios de los hoteles tocados y el resumen de
+sus paquetes.
+"""
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .models import Hotel, LugarTuristico, Paquete, Habitacion
+from . import occupancy, package_summaries, response_cache
+
+BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 5000
+ACCIONES = ('actualizar', 'activar', 'desactivar', 'ajustar_precio')
+
+# entidad -> configuración; `filtros` mapea cada parámetro del filtro a su lookup.
+ENTIDADES = {
+    'hoteles': {
+        'model': Hotel, 'activo': 'estado', 'cache': 'hotel',
+        'campos': ('estado', 'calificacion', 'departamento'),
+        'filtros': {'departamento': 'departamento__in'},
+    },
+    'lugares': {
+        'model': LugarTuristico, 'activo': 'estado', 'cache': 'lugar',
+        'campos': ('estado', 'tipo', 'departamento', 'horario'),
+        'filtros': {'departamento': 'departamento__in', 'tipo': 'tipo__in'},
+    },
+    'paquetes': {
+        'model': Paquete, 'activo': 'estado', 'cache': 'paquete',
+        'campos': ('estado', 'tipo', 'precio'),
+        'filtros': {'departamento': 'id_lugar__departamento__in', 'tipo': 'tipo__in', 'hotel': 'id_hotel_id__in',
+                    'precio_min': 'precio__gte', 'precio_max': 'precio__lte'},
+    },
+    'habitaciones': {
+        'model': Habitacion, 'activo': 'disponible', 'cache': 'habitacion',
+        'campos': ('disponible', 'precio', 'cant_huespedes', 'caracteristicas'),
+        'filtros': {'departamento': 'codigo_hotel__departamento__in', 'hotel': 'codigo_hotel_id__in',
+                    'precio_min': 'precio__gte', 'precio_max': 'precio__lte'},
+    },
+}
+
+
+class AplicacionParcial(Exception):
+    """Un lote falló: los anteriores ya quedaron confirmados y se informan en afectados/lotes."""
+
+    def __init__(self, error, afectados, lotes):
+        super().__init__(str(error))
+        self.afectados = afectados
+        self.lotes = lotes
+
+
+def _lista(v):
+    return v if isinstance(v, list) else [v]
+
+
+def queryset(entidad, filtro):
+    """Queryset filtrado; ValueError si el filtro está vacío o trae claves desconocidas."""
+    conf = ENTIDADES[entidad]
+    filtro = dict(filtro or {})
+    todos = filtro.pop('todos', False) is True
+    qs = conf['model'].objects.all()
+    if 'ids' in filtro:
+        qs = qs.filter(pk__in=_lista(filtro.pop('ids')))
+    if 'activos' in filtro:
+        qs = qs.filter(**{conf['activo']: bool(filtro.pop('activos'))})
+    for clave, valor in filtro.items():
+        lookup = conf['filtros'].get(clave)
+        if lookup is None:
+            opciones = ['ids', 'activos', 'todos', *conf['filtros']]
+            raise ValueError(f"filtro '{clave}' no soportado. Opciones: {', '.join(opciones)}")
+        qs = qs.filter(**{lookup: _lista(valor) if lookup.endswith('__in') else valor})
+    if not qs.query.where and not todos:
+        raise ValueError("Indica al menos un filtro (o 'todos': true para toda la tabla)")
+    return qs
+
+
+def valores(entidad, accion, campos=None, porcentaje=None):
+    """Argumentos del UPDATE; ValidationError/ValueError si no son válidos."""
+    conf = ENTIDADES[entidad]
+    model = conf['model']
+    if accion == 'activar':
+        return {conf['activo']: True}
+    if accion == 'desactivar':
+        return {conf['activo']: False}
+    if accion == 'ajustar_precio':
+        if 'precio' not in conf['campos']:
+            raise ValueError(f"{entidad} no tiene precio")
+        porcentaje = float(porcentaje)
+        if not -100 < porcentaje <= 1000:
+            raise ValueError("porcentaje debe ser mayor que -100 y como máximo 1000")
+        return {'precio': Round(F('precio') * (1 + porcentaje / 100), 2)}
+    if accion == 'actualizar':
+        if not campos:
+            raise ValueError("campos es obligatorio para 'actualizar'")
+        if not isinstance(campos, dict):
+            raise ValueError("campos debe ser un objeto {campo: valor}")
+        fuera = set(campos) - set(conf['campos'])
+        if fuera:
+            raise ValueError(f"Campos no editables en lote: {', '.join(sorted(fuera))}. "
+                             f"Opciones: {', '.join(conf['campos'])}")
+        return {nombre: model._meta.get_field(nombre).clean(valor, None) for nombre, valor in campos.items()}
+    raise ValueError(f"accion inválida. Opciones: {', '.join(ACCIONES)}")
+
+
+def _invalidar(entidad, hoteles):
+    response_cache.bump(ENTIDADES[entidad]['cache'])
+    for hotel_id in hoteles:
+        occupancy.bump_hotel(hotel_id)
+    package_summaries.programar(hoteles)
+
+
+def aplicar(entidad, qs, update, batch_size=BATCH_SIZE):
+    """Aplica `update` a `qs` por lotes; devuelve (filas afectadas, lotes) o lanza AplicacionParcial."""
+    model = ENTIDADES[entidad]['model']
+    if any(f.name == 'fecha_actualizacion' for f in model._meta.fields):
+        update = {**update, 'fecha_actualizacion': timezone.now()}
+    # Precio y disponibilidad de habitaciones cambian el calendario de su hotel.
+    hotel_field = {'habitaciones': 'codigo_hotel_id', 'hoteles': 'pk'}.get(entidad)
+    total, lotes, ultimo, hoteles = 0, 0, None, set()
+    try:
+        while True:
+            pagina = qs.order_by('pk')
+            if ultimo is not None:
+                pagina = pagina.filter(pk__gt=ultimo)
+            if hotel_field:
+                filas = list(pagina.values_list('pk', hotel_field)[:batch_size])
+                hoteles.update(h for _, h in filas)
+                ids = [pk for pk, _ in filas]
+            else:
+                ids = list(pagina.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                total += model.objects.filter(pk__in=ids).update(**update)
+            lotes += 1
+            ultimo = ids[-1]
+    except DatabaseError as e:
+        raise AplicacionParcial(e, total, lotes) from e
+    finally:
+        if lotes:
+            _invalidar(entidad, hoteles)
+    return total, lotes
@@ -5,6 +5,7 @@ from channels.db import database_sync_to_async
 from django.conf import settings
 from rest_framework_simplejwt.backends import TokenBackend
 from django.contrib.auth import get_user_model
+from .outbox import ensure_dispatcher
 
 User = get_user_model()
 
@@ -27,6 +28,7 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
         self.group_name = f"user_{self.user.id}"
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        ensure_dispatcher()
 
     async def disconnect(self, close_code):
         if self.group_name:
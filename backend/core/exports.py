@@ -0,0 +1,143 @@
+"""
+Exportación en streaming (CSV o NDJSON) de Reserva, Pago y Usuario.
+
+Las filas salen de `values_list(...).iterator()`, que en Postgres usa un cursor del
+lado del servidor, y se escriben a un StreamingHttpResponse a medida que llegan:
+memoria constante y primeros bytes inmediatos sin importar el tamaño del export.
+El cuerpo es un iterador asíncrono (Daphne/ASGI consume los síncronos enteros en memoria)
+que trae cada bloque de CHUNK_SIZE filas con sync_to_async, en el hilo de la conexión.
+"""
+import csv
+import json
+from datetime import date, datetime
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+from .models import Reserva, Pago, Usuario
+
+CHUNK_SIZE = 2000
+FORMATOS = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+
+
+def _bool(v):
+    return {'true': True, 'false': False}.get((v or '').lower())
+
+
+def _reservas(params):
+    qs = Reserva.objects.all()
+    if params.get('desde'):
+        qs = qs.filter(fecha_reserva__gte=date.fromisoformat(params['desde']))
+    if params.get('hasta'):
+        qs = qs.filter(fecha_reserva__lte=date.fromisoformat(params['hasta']))
+    if params.get('hotel'):
+        qs = qs.filter(codigo_hotel_id=int(params['hotel']))
+    if _bool(params.get('estado')) is not None:
+        qs = qs.filter(estado=_bool(params['estado']))
+    return qs.order_by('id_reserva')
+
+
+def _pagos(params):
+    qs = Pago.objects.all()
+    if params.get('desde'):
+        qs = qs.filter(fecha__gte=date.fromisoformat(params['desde']))
+    if params.get('hasta'):
+        qs = qs.filter(fecha__lte=date.fromisoformat(params['hasta']))
+    if params.get('hotel'):
+        qs = qs.filter(pk__in=Reserva.objects.filter(codigo_hotel_id=int(params['hotel'])).values('id_pago'))
+    if params.get('estado'):
+        if params['estado'] not in Pago.Estado.values:
+            raise ValueError(f"estado debe ser uno de: {', '.join(Pago.Estado.values)}")
+        qs = qs.filter(estado=params['estado'])
+    return qs.order_by('id_pago')
+
+
+def _usuarios(params):
+    qs = Usuario.objects.all()
+    if params.get('desde'):
+        qs = qs.filter(fecha_creacion__gte=date.fromisoformat(params['desde']))
+    if params.get('hasta'):
+        qs = qs.filter(fecha_creacion__lte=date.fromisoformat(params['hasta']))
+    if params.get('hotel'):
+        qs = qs.filter(pk__in=Reserva.objects.filter(codigo_hotel_id=int(params['hotel'])).values('id_usuario'))
+    if _bool(params.get('estado')) is not None:
+        qs = qs.filter(estado=_bool(params['estado']))
+    return qs.order_by('id')
+
+
+EXPORTS = {
+    'reservas': (_reservas, [
+        ('id_reserva', 'id_reserva'), ('fecha_reserva', 'fecha_reserva'), ('fecha_caducidad', 'fecha_caducidad'),
+        ('fecha_creacion', 'fecha_creacion'), ('estado', 'estado'), ('archivada', 'archivada'),
+        ('num_habitacion', 'num_habitacion_id'),
+        ('codigo_hotel', 'codigo_hotel_id'), ('hotel', 'codigo_hotel__nombre'), ('id_usuario', 'id_usuario_id'),
+        ('correo_usuario', 'id_usuario__correo'), ('id_pago', 'id_pago_id'), ('monto_pago', 'id_pago__monto'),
+        ('id_paquete', 'id_paquete_id'),
+    ]),
+    'pagos': (_pagos, [
+        ('id_pago', 'id_pago'), ('tipo_pago', 'tipo_pago'), ('monto', 'monto'), ('fecha', 'fecha'),
+        ('fecha_creacion', 'fecha_creacion'), ('estado', 'estado'),
+    ]),
+    'usuarios': (_usuarios, [
+        ('id', 'id'), ('nombre', 'nombre'), ('correo', 'correo'), ('rol', 'rol'), ('pais', 'pais'),
+        ('pasaporte', 'pasaporte'), ('estado', 'estado'), ('fecha_creacion', 'fecha_creacion'),
+    ]),
+}
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _json_default(v):
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    return str(v)
+
+
+def _csv_rows(header, rows):
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(header)  # BOM para que Excel detecte UTF-8
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_rows(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), ensure_ascii=False, default=_json_default) + '\n'
+
+
+def _chunks(lines, size):
+    bloque = []
+    for line in lines:
+        bloque.append(line)
+        if len(bloque) >= size:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+_FIN = object()
+
+
+async def _aiter(gen):
+    """Recorre el generador síncrono de a un bloque por llamada a sync_to_async."""
+    siguiente = sync_to_async(next)
+    try:
+        while (chunk := await siguiente(gen, _FIN)) is not _FIN:
+            yield chunk
+    finally:
+        await sync_to_async(gen.close)()  # cierra el cursor del servidor si el cliente corta
+
+
+def stream(entidad, formato, params):
+    """StreamingHttpResponse con el export; ValueError/KeyError si los parámetros no son válidos."""
+    build_qs, columnas = EXPORTS[entidad]
+    header = [nombre for nombre, _ in columnas]
+    rows = build_qs(params).values_list(*[campo for _, campo in columnas]).iterator(chunk_size=CHUNK_SIZE)
+    gen = _csv_rows(header, rows) if formato == 'csv' else _ndjson_rows(header, rows)
+    response = StreamingHttpResponse(_aiter(_chunks(gen, CHUNK_SIZE)), content_type=FORMATOS[formato])
+    response['Content-Disposition'] = f'attachment; filename="{entidad}-{date.today():%Y%m%d}.{formato}"'
+    return response
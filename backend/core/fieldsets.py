@@ -0,0 +1,67 @@
+"""
+Sparse fieldsets: `?fields=a,b,c` en list/retrieve recorta tanto la salida del serializer
+como las columnas que se leen de la BD (`.only()`), para que las vistas de tarjetas no
+transfieran ni decodifiquen descripciones, imágenes, etc.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import BaseSerializer
+
+
+class SparseFieldsMixin:
+    sparse_actions = ('list', 'retrieve')
+
+    def _serializer_fields(self):
+        if not hasattr(self, '_all_fields'):
+            self._all_fields = self.get_serializer_class()().fields
+        return self._all_fields
+
+    def sparse_fields(self):
+        raw = self.request.query_params.get('fields') if self.action in self.sparse_actions else None
+        if not raw:
+            return None
+        requested = {f.strip() for f in raw.split(',') if f.strip()}
+        disponibles = self._serializer_fields()
+        desconocidos = requested - set(disponibles)
+        if desconocidos:
+            raise ValidationError({"fields": f"Campos desconocidos: {', '.join(sorted(desconocidos))}. "
+                                             f"Opciones: {', '.join(disponibles)}"})
+        return requested
+
+    def _only(self, queryset, fields):
+        model = queryset.model
+        columnas, relaciones = {model._meta.pk.name}, set()
+        for name in fields:
+            field = self._serializer_fields()[name]
+            if field.source == '*':
+                return queryset  # el campo lee la instancia entera
+            path = field.source.split('.')
+            try:
+                model_field = model._meta.get_field(path[0])
+            except FieldDoesNotExist:
+                return queryset  # propiedad o método del modelo: no se sabe qué columnas usa
+            if not model_field.concrete or model_field.many_to_many:
+                return queryset
+            columnas.add(path[0])
+            if model_field.is_relation and (isinstance(field, BaseSerializer) or len(path) > 1):
+                relaciones.add(path[0])
+        # Solo se hace JOIN con las relaciones que realmente se serializan.
+        queryset = queryset.select_related(None)
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+        return queryset.only(*columnas)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.sparse_fields()
+        return self._only(queryset, fields) if fields else queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.sparse_fields()
+        if fields:
+            target = getattr(serializer, 'child', serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
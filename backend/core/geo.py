@@ -0,0 +1,69 @@
+"""
+Búsqueda por cercanía de hoteles y lugares sin PostGIS.
+
+Cada fila guarda la celda de una grilla de CELDA_GRADOS (columna generada `celda`, con
+índice parcial). Para un radio se enumeran las celdas que cubren su bounding box, se
+traen solo las filas de esas celdas (`celda IN (...)`, por índice) y la distancia exacta
+(haversine) se calcula sobre ese puñado de candidatos.
+"""
+import math
+
+from .models import CELDA_GRADOS, Hotel, LugarTuristico
+
+RADIO_TIERRA_KM = 6371.0
+KM_POR_GRADO = 111.32
+MAX_RADIO_KM = 100.0
+
+# entidad -> (modelo, pk)
+ENTIDADES = {
+    'hoteles': (Hotel, 'id_hotel'),
+    'lugares': (LugarTuristico, 'id_lugar'),
+}
+
+
+def celda(lat, lng):
+    """Misma fórmula que models._celda (la columna generada)."""
+    return math.floor(lat / CELDA_GRADOS) * 4000 + math.floor(lng / CELDA_GRADOS)
+
+
+def celdas_en_radio(lat, lng, radio_km):
+    dlat = radio_km / KM_POR_GRADO
+    dlng = radio_km / (KM_POR_GRADO * max(math.cos(math.radians(lat)), 0.01))
+    filas = range(math.floor((lat - dlat) / CELDA_GRADOS), math.floor((lat + dlat) / CELDA_GRADOS) + 1)
+    columnas = range(math.floor((lng - dlng) / CELDA_GRADOS), math.floor((lng + dlng) / CELDA_GRADOS) + 1)
+    return [f * 4000 + c for f in filas for c in columnas]
+
+
+def distancia_km(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(math.sqrt(a))
+
+
+def cercanos(entidad, lat, lng, radio_km, limite=20, excluir=None):
+    """Instancias activas a menos de radio_km, ordenadas por distancia (atributo `distancia_km`)."""
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("lat debe estar entre -90 y 90 y lng entre -180 y 180")
+    if not 0 < radio_km <= MAX_RADIO_KM:
+        raise ValueError(f"radio_km debe estar entre 0 y {MAX_RADIO_KM:g}")
+    model, pk = ENTIDADES[entidad]
+    qs = model.objects.filter(estado=True, celda__in=celdas_en_radio(lat, lng, radio_km)).defer('busqueda')
+    if excluir is not None:
+        qs = qs.exclude(pk=excluir)
+    resultados = []
+    for obj in qs:
+        obj.distancia_km = round(distancia_km(lat, lng, obj.latitud, obj.longitud), 3)
+        if obj.distancia_km <= radio_km:
+            resultados.append(obj)
+    resultados.sort(key=lambda o: (o.distancia_km, o.pk))
+    return resultados[:limite]
+
+
+def hoteles_cerca_de_lugar(id_lugar, radio_km=30.0, limite=3):
+    """Hoteles más cercanos a un lugar turístico (vacío si el lugar no tiene coordenadas)."""
+    lugar = (LugarTuristico.objects.filter(pk=id_lugar, latitud__isnull=False, longitud__isnull=False)
+             .only('latitud', 'longitud').first())
+    if lugar is None:
+        return []
+    return cercanos('hoteles', lugar.latitud, lugar.longitud, radio_km, limite)
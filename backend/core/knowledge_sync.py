@@ -0,0 +1,167 @@
+"""
+Sincronización incremental del catálogo (Hotel, LugarTuristico, Paquete) hacia
+la base de conocimiento del asistente.
+
+Cada proceso aplica en memoria los cambios posteriores a su última marca de agua
+(`sync_if_due`, llamado antes de cada mensaje al asistente, como mucho una vez cada
+ASSISTANT_SYNC_INTERVAL segundos). El vector store es compartido, así que su marca
+de agua vive en KnowledgeSyncState y se actualiza con `manage.py sync_asistente`.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from .models import Hotel, LugarTuristico, Paquete, KnowledgeSyncState
+
+logger = logging.getLogger(__name__)
+
+SYNC_INTERVAL = float(os.environ.get('ASSISTANT_SYNC_INTERVAL', '5'))
+# Margen para no perder filas de transacciones que confirman con un timestamp algo anterior.
+SYNC_OVERLAP = timedelta(seconds=float(os.environ.get('ASSISTANT_SYNC_OVERLAP', '2')))
+VECTOR_STORE_STATE = 'vector_store'
+
+KEYS = {"hotel": "id_hotel", "lugar": "id_lugar", "paquete": "id_paquete"}
+
+_lock = threading.Lock()
+_watermark = None
+_last_check = 0.0
+# (tipo, pk) -> fecha_actualizacion ya aplicada; evita reaplicar las filas de la ventana de solape.
+_applied = {}
+
+
+def hotel_record(h):
+    return {
+        "id_hotel": h.id_hotel,
+        "nombre": h.nombre,
+        "ubicacion": h.ubicacion,
+        "departamento": h.departamento,
+        "calificacion": h.calificacion,
+        "estado": h.estado,
+        "url": h.url,
+        "url_imagen_hotel": h.url_imagen_hotel,
+    }
+
+
+def lugar_record(l):
+    return {
+        "id_lugar": l.id_lugar,
+        "nombre": l.nombre,
+        "ubicacion": l.ubicacion,
+        "departamento": l.departamento,
+        "tipo": l.tipo,
+        "horario": l.horario,
+        "descripcion": l.descripcion,
+        "url_image_lugar_turistico": l.url_image_lugar_turistico,
+        "estado": l.estado,
+    }
+
+
+def paquete_record(p):
+    lugar = p.id_lugar
+    hotel = p.id_hotel
+    return {
+        "id_paquete": p.id_paquete,
+        "nombre": p.nombre,
+        "tipo": p.tipo,
+        "precio": p.precio,
+        "departamento": (lugar.departamento if lugar else "") or (hotel.departamento if hotel else ""),
+        "hotel": hotel.nombre if hotel else "",
+        "lugar": lugar.nombre if lugar else "",
+        "estado": p.estado,
+    }
+
+
+def _changed(since):
+    """
+    Filas modificadas desde `since` (todas si es None) agrupadas por tipo como
+    (registro, activo, fecha_actualizacion), más la marca máxima vista.
+    """
+    querysets = {
+        "hotel": (Hotel.objects.all(), hotel_record),
+        "lugar": (LugarTuristico.objects.all(), lugar_record),
+        "paquete": (Paquete.objects.select_related('id_hotel', 'id_lugar'), paquete_record),
+    }
+    changes, newest = {}, None
+    for kind, (qs, to_record) in querysets.items():
+        if since is not None:
+            qs = qs.filter(fecha_actualizacion__gte=since - SYNC_OVERLAP)
+        rows = list(qs.order_by('fecha_actualizacion'))
+        if not rows:
+            continue
+        changes[kind] = [(to_record(r), r.estado, r.fecha_actualizacion) for r in rows]
+        last = rows[-1].fecha_actualizacion
+        newest = last if newest is None or last > newest else newest
+    return changes, newest
+
+
+def apply_changes(changes):
+    from llm.llm_client import apply_catalog_changes
+    return {kind: apply_catalog_changes(kind, [(rec, active) for rec, active, _ in rows])
+            for kind, rows in changes.items()}
+
+
+def sync_in_memory(force_full=False):
+    """Aplica al proceso actual los cambios del catálogo desde su última sincronización."""
+    global _watermark
+    with _lock:
+        since = None if force_full else _watermark
+        changes, newest = _changed(since)
+        if not force_full:
+            changes = {
+                kind: fresh for kind, rows in changes.items()
+                if (fresh := [r for r in rows if _applied.get((kind, r[0][KEYS[kind]])) != r[2]])
+            }
+        for kind, rows in changes.items():
+            for rec, _active, ts in rows:
+                _applied[(kind, rec[KEYS[kind]])] = ts
+        if changes:
+            apply_changes(changes)
+            logger.info("Asistente sincronizado en memoria: %s",
+                        {k: len(v) for k, v in changes.items()})
+        if newest is not None:
+            _watermark = newest
+        return {k: len(v) for k, v in changes.items()}
+
+
+def sync_if_due():
+    global _last_check
+    now = time.monotonic()
+    if now - _last_check < SYNC_INTERVAL:
+        return None
+    _last_check = now
+    try:
+        return sync_in_memory()
+    except Exception as e:
+        logger.warning("No se pudo sincronizar el asistente con el catálogo: %s", e)
+        return None
+
+
+def sync_vector_store(full=False):
+    """Reindexa en el vector store solo las entidades cambiadas desde la última marca guardada."""
+    from rag.documents import hotel_document, place_document, package_document
+    from rag.vector_store import upsert_documents
+
+    state, _ = KnowledgeSyncState.objects.get_or_create(nombre=VECTOR_STORE_STATE)
+    changes, newest = _changed(None if full else state.ultima_sincronizacion)
+    if not changes:
+        return {"insertados": 0, "eliminados": 0}
+
+    merged = apply_changes(changes)
+    builders = {"hotel": hotel_document, "lugar": place_document, "paquete": package_document}
+
+    docs, delete_ids = [], []
+    for kind, rows in changes.items():
+        for record, active, _ in rows:
+            if not active:
+                delete_ids.append(f"{kind}:{record[KEYS[kind]]}")
+        for record in merged.get(kind, []):
+            doc = builders[kind](record)
+            if doc:
+                docs.append(doc)
+
+    result = upsert_documents(docs, delete_ids)
+    state.ultima_sincronizacion = newest
+    state.save(update_fields=['ultima_sincronizacion', 'actualizado'])
+    return result
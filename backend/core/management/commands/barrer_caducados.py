@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import sweeper
+
+
+class Command(BaseCommand):
+    help = "Archiva reservas cuya fecha_caducidad ya pasó y vence pagos pendientes antiguos, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=sweeper.BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta lo que se barrería')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(
+                f"Por archivar: {sweeper.reservas_por_archivar().count()} reservas, "
+                f"{sweeper.pagos_vencidos().count()} pagos pendientes vencidos"
+            )
+            return
+        try:
+            result = sweeper.sweep(batch_size=options['batch_size'])
+        except Exception as e:
+            raise CommandError(f"Barrido fallido: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Reservas archivadas={result['reservas_archivadas']}, pagos vencidos={result['pagos_vencidos']}, "
+            f"resúmenes de paquete={result['resumenes_paquete']}"
+        ))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = ("Envía al channel layer las notificaciones pendientes de la outbox. "
+            "Solo con un channel layer compartido (Redis); con InMemoryChannelLayer el despacho ocurre dentro "
+            "de Daphne y el comando solo puede purgar o reencolar.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Sigue drenando cada OUTBOX_POLL_INTERVAL segundos')
+        parser.add_argument('--purgar-dias', type=int, default=None,
+                            help='Además borra las filas enviadas (o agotadas) hace más de N días')
+        parser.add_argument('--reintentar-agotadas', action='store_true',
+                            help='Vuelve a encolar las filas que agotaron sus reintentos')
+
+    def handle(self, *args, **options):
+        mantenimiento = options['reintentar_agotadas'] or options['purgar_dias'] is not None
+        en_proceso = outbox.layer_en_proceso()
+        if en_proceso and (options['loop'] or not mantenimiento):
+            # Lo enviado a un InMemoryChannelLayer propio no llega a ningún WebSocket: se perdería.
+            raise CommandError("El channel layer es InMemoryChannelLayer: las notificaciones se despachan dentro "
+                               "de Daphne. Configure un channel layer compartido (Redis) para drenar desde aquí.")
+        if options['reintentar_agotadas']:
+            self.stdout.write(f"Filas agotadas reencoladas: {outbox.reintentar_agotadas()}")
+        if en_proceso:
+            self.stderr.write(self.style.WARNING("InMemoryChannelLayer: no se drena la outbox desde el comando"))
+            self._purgar(options)
+            return
+        while True:
+            sent, failed = outbox.drain()
+            if sent or failed or not options['loop']:
+                self.stdout.write(f"Notificaciones enviadas={sent}, fallidas={failed}")
+                agotadas = outbox.agotadas().count()
+                if agotadas:
+                    self.stderr.write(self.style.WARNING(
+                        f"{agotadas} notificaciones agotaron sus {outbox.MAX_INTENTOS} intentos "
+                        f"(--reintentar-agotadas para reencolarlas)"))
+            self._purgar(options)
+            if not options['loop']:
+                break
+            time.sleep(outbox.POLL_INTERVAL)
+
+    def _purgar(self, options):
+        if options['purgar_dias'] is not None:
+            borradas = outbox.purge(options['purgar_dias'])
+            if borradas:
+                self.stdout.write(f"Filas de outbox purgadas: {borradas}")
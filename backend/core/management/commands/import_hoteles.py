@@ -6,7 +6,7 @@ from django.utils.dateparse import parse_date
 from core.models import Hotel
 
 class Command(BaseCommand):
-    help = "Importa o actualiza hoteles desde un CSV. Columnas requeridas: nombre,ubicacion,departamento,calificacion. Si faltan id_hotel, estado o fecha_creacion, se generan por defecto."
+    help = "Importa o actualiza hoteles desde un CSV. Columnas requeridas: nombre,ubicacion,departamento,calificacion. Si faltan id_hotel, estado o fecha_creacion, se generan por defecto. latitud y longitud son opcionales."
 
     def add_arguments(self, parser):
         parser.add_argument('--file', '-f', type=str, required=True, help='hoteles.json')
@@ -53,6 +53,8 @@ class Command(BaseCommand):
                         fecha_creacion = parse_date(row['fecha_creacion'])
                     if fecha_creacion is None:
                         fecha_creacion = timezone.now().date()
+                    latitud = float(row['latitud']) if row.get('latitud') else None
+                    longitud = float(row['longitud']) if row.get('longitud') else None
                 except Exception as e:
                     self.stderr.write(self.style.ERROR(f"Fila inválida (nombre={row.get('nombre')}): {e}"))
                     continue
@@ -67,6 +69,8 @@ class Command(BaseCommand):
                             ('departamento', row['departamento']),
                             ('calificacion', calificacion),
                             ('estado', estado),
+                            ('latitud', latitud),
+                            ('longitud', longitud),
                         ]:
                             if getattr(existing, field) != val:
                                 setattr(existing, field, val)
@@ -85,7 +89,9 @@ class Command(BaseCommand):
                     departamento=row['departamento'],
                     calificacion=calificacion,
                     estado=estado,
-                    fecha_creacion=fecha_creacion
+                    fecha_creacion=fecha_creacion,
+                    latitud=latitud,
+                    longitud=longitud
                 ))
                 if len(to_create) >= batch_size:
                     self._bulk_insert(to_create)
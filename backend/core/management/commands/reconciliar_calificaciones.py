@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core import ratings
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde Review los agregados de calificación de hoteles, lugares y paquetes y corrige los desvíos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Solo informa cuántas filas corregiría")
+
+    def handle(self, *args, **options):
+        corregidas = ratings.reconciliar(dry_run=options['dry_run'])
+        detalle = ", ".join(f"{campo}: {n}" for campo, n in corregidas.items())
+        verbo = "A corregir" if options['dry_run'] else "Corregidas"
+        self.stdout.write(self.style.SUCCESS(f"{verbo} {sum(corregidas.values())} filas ({detalle})"))
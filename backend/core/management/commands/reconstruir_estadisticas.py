@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import rollups
+
+
+class Command(BaseCommand):
+    help = "Regenera desde Reserva y Pago los rollups diarios (OcupacionDiaria) de las estadísticas de reservas."
+
+    def handle(self, *args, **options):
+        try:
+            total = rollups.rebuild_all()
+        except Exception as e:
+            raise CommandError(f"Reconstrucción fallida: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Rollups reconstruidos: {total} filas hotel/día"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import occupancy
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde la BD los bitmaps de ocupación por habitación usados en las consultas de disponibilidad."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habitacion', type=int, help='Reconstruye solo esta habitación')
+
+    def handle(self, *args, **options):
+        try:
+            if options['habitacion'] is not None:
+                occupancy.rebuild(options['habitacion'])
+                total = 1
+            else:
+                total = occupancy.rebuild_all()
+        except Exception as e:
+            raise CommandError(f"Reconstrucción fallida: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Bitmaps de ocupación reconstruidos: {total} habitaciones (horizonte {occupancy.HORIZON_DAYS} días)"
+        ))
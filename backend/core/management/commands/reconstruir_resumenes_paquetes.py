@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import package_summaries
+
+
+class Command(BaseCommand):
+    help = "Recalcula el resumen (habitación más barata, próxima fecha libre, valoración del hotel) de todos los paquetes."
+
+    def handle(self, *args, **options):
+        try:
+            total = package_summaries.rebuild_all()
+        except Exception as e:
+            raise CommandError(f"Reconstrucción fallida: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes de paquete actualizados: {total}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.knowledge_sync import sync_vector_store
+
+
+class Command(BaseCommand):
+    help = "Sincroniza en el vector store del asistente los hoteles, lugares y paquetes modificados desde la última sincronización."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Ignora la marca de agua y reindexa todo el catálogo')
+
+    def handle(self, *args, **options):
+        try:
+            result = sync_vector_store(full=options['full'])
+        except Exception as e:
+            raise CommandError(f"Sincronización fallida: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Sincronización terminada: insertados={result['insertados']}, eliminados={result['eliminados']}"
+        ))
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='messages_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='title',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='avatar_url',
+            field=models.URLField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='reserva',
+            name='id_pago',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='core.pago'),
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('message', models.TextField()),
+                ('read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('link', models.CharField(blank=True, max_length=255)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id_review', models.BigAutoField(primary_key=True, serialize=False)),
+                ('calificacion', models.IntegerField(choices=[(1, 1), (2, 2), (3, 3), (4, 4), (5, 5)])),
+                ('comentario', models.TextField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('estado', models.BooleanField(default=True)),
+                ('hotel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='core.hotel')),
+                ('lugar_turistico', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='core.lugarturistico')),
+                ('paquete', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='core.paquete')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['hotel', 'estado'], name='core_review_hotel_i_35da8e_idx'), models.Index(fields=['lugar_turistico', 'estado'], name='core_review_lugar_t_91cc09_idx'), models.Index(fields=['paquete', 'estado'], name='core_review_paquete_e6403f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_notification_review_chatsession_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnowledgeSyncState',
+            fields=[
+                ('nombre', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('ultima_sincronizacion', models.DateTimeField(blank=True, null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='lugarturistico',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='paquete',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
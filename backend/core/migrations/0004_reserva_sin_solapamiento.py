@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:03
+
+import core.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def verificar_solapamientos(apps, schema_editor):
+    # La restricción no se puede crear sobre datos que ya la violan: se listan para corregirlos a mano.
+    Reserva = apps.get_model('core', 'Reserva')
+    otra = (Reserva.objects.filter(estado=True, num_habitacion=OuterRef('num_habitacion'),
+                                   fecha_reserva__lte=OuterRef('fecha_caducidad'),
+                                   fecha_caducidad__gte=OuterRef('fecha_reserva'))
+            .exclude(pk=OuterRef('pk')))
+    ids = list(Reserva.objects.filter(Exists(otra), estado=True)
+               .order_by('num_habitacion', 'fecha_reserva').values_list('pk', flat=True)[:100])
+    if ids:
+        raise RuntimeError(
+            "No se puede crear reserva_sin_solapamiento: hay reservas activas que se solapan en la misma "
+            f"habitación (id_reserva: {', '.join(map(str, ids))}). Cancela (estado=False) o corrige las "
+            "que sobran y vuelve a ejecutar migrate."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_catalog_change_tracking'),
+    ]
+
+    operations = [
+        # btree_gist permite la igualdad sobre num_habitacion dentro del índice GiST de la restricción
+        BtreeGistExtension(),
+        migrations.RunPython(verificar_solapamientos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('estado', True)), expressions=[(core.models.DateRange('fecha_reserva', 'fecha_caducidad', django.contrib.postgres.fields.ranges.RangeBoundary(inclusive_lower=True, inclusive_upper=True)), '&&'), ('num_habitacion', '=')], name='reserva_sin_solapamiento', violation_error_message='La habitación ya está reservada en el rango de fechas solicitado.'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_reserva_sin_solapamiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('grupo', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('enviado', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('enviado__isnull', True)), fields=['proximo_intento', 'id'], name='outbox_pendientes_idx')],
+            },
+        ),
+    ]
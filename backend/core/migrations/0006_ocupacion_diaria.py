@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcupacionDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('noches', models.PositiveIntegerField(default=0)),
+                ('reservas', models.PositiveIntegerField(default=0)),
+                ('cancelaciones', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.FloatField(default=0)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ocupacion_diaria', to='core.hotel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha'], name='core_ocupac_fecha_d14728_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ocupaciondiaria',
+            constraint=models.UniqueConstraint(fields=('hotel', 'fecha'), name='ocupacion_diaria_hotel_fecha'),
+        ),
+    ]
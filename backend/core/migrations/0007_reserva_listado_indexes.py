@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_ocupacion_diaria'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['id_usuario', 'estado', 'fecha_reserva'], name='reserva_usuario_estado_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['codigo_hotel', 'estado', 'fecha_reserva'], name='reserva_hotel_estado_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'fecha_reserva', 'id_reserva'], name='reserva_estado_fecha'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:12
+
+import core.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_reserva_listado_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='archivada',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(condition=models.Q(('estado', 'pendiente')), fields=['fecha_creacion'], name='pago_pendiente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('archivada', False), ('estado', True)), fields=['num_habitacion', 'fecha_reserva', 'fecha_caducidad'], name='reserva_vigente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('archivada', False), ('estado', True)), fields=['fecha_caducidad'], name='reserva_por_archivar_idx'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='reserva',
+            name='reserva_sin_solapamiento',
+        ),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('archivada', False), ('estado', True)), expressions=[(core.models.DateRange('fecha_reserva', 'fecha_caducidad', django.contrib.postgres.fields.ranges.RangeBoundary(inclusive_lower=True, inclusive_upper=True)), '&&'), ('num_habitacion', '=')], name='reserva_sin_solapamiento', violation_error_message='La habitación ya está reservada en el rango de fechas solicitado.'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_reserva_archivada'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='habitacion',
+            index=models.Index(condition=models.Q(('disponible', True)), fields=['codigo_hotel', 'precio'], name='habitacion_disp_hotel_precio'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['departamento', 'calificacion'], name='hotel_activo_depto_calif'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['calificacion'], name='hotel_activo_calif'),
+        ),
+        migrations.AddIndex(
+            model_name='lugarturistico',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['departamento', 'tipo'], name='lugar_activo_depto_tipo'),
+        ),
+        migrations.AddIndex(
+            model_name='lugarturistico',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['tipo'], name='lugar_activo_tipo'),
+        ),
+        migrations.AddIndex(
+            model_name='paquete',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['precio'], name='paquete_activo_precio'),
+        ),
+        migrations.AddIndex(
+            model_name='paquete',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['tipo', 'precio'], name='paquete_activo_tipo_precio'),
+        ),
+        migrations.AddIndex(
+            model_name='paquete',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['id_lugar'], name='paquete_activo_lugar'),
+        ),
+    ]
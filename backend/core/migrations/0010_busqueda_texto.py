@@ -0,0 +1,54 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:20
+
+import core.models
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations, models
+
+# unaccent() es STABLE; las columnas generadas y los índices de expresión necesitan una función IMMUTABLE.
+IMMUTABLE_UNACCENT = """
+CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_catalogo_busqueda_indexes'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        TrigramExtension(),
+        migrations.RunSQL(IMMUTABLE_UNACCENT, 'DROP FUNCTION IF EXISTS immutable_unaccent(text);'),
+        migrations.AddField(
+            model_name='hotel',
+            name='busqueda',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector(core.models.Unaccent('nombre'), config='spanish', weight='A'), '||', django.contrib.postgres.search.SearchVector(core.models.Unaccent('ubicacion'), config='spanish', weight='B'), django.contrib.postgres.search.SearchConfig('spanish')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddField(
+            model_name='lugarturistico',
+            name='busqueda',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector(core.models.Unaccent('nombre'), config='spanish', weight='A'), '||', django.contrib.postgres.search.SearchVector(core.models.Unaccent('ubicacion'), config='spanish', weight='B'), django.contrib.postgres.search.SearchConfig('spanish')), '||', django.contrib.postgres.search.SearchVector(core.models.Unaccent('descripcion'), config='spanish', weight='C'), django.contrib.postgres.search.SearchConfig('spanish')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busqueda'], name='hotel_busqueda_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(core.models.Unaccent(django.db.models.functions.text.Lower('nombre')), name='gin_trgm_ops'), name='hotel_nombre_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='lugarturistico',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busqueda'], name='lugar_busqueda_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='lugarturistico',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(core.models.Unaccent(django.db.models.functions.text.Lower('nombre')), name='gin_trgm_ops'), name='lugar_nombre_trgm'),
+        ),
+    ]
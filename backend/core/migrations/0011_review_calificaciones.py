@@ -0,0 +1,86 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:21
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_busqueda_texto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='calificacion_histograma',
+            field=models.JSONField(default=core.models.histograma_vacio),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='calificacion_promedio',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='calificacion_suma',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='calificacion_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lugarturistico',
+            name='calificacion_histograma',
+            field=models.JSONField(default=core.models.histograma_vacio),
+        ),
+        migrations.AddField(
+            model_name='lugarturistico',
+            name='calificacion_promedio',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='lugarturistico',
+            name='calificacion_suma',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lugarturistico',
+            name='calificacion_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='paquete',
+            name='calificacion_histograma',
+            field=models.JSONField(default=core.models.histograma_vacio),
+        ),
+        migrations.AddField(
+            model_name='paquete',
+            name='calificacion_promedio',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='paquete',
+            name='calificacion_suma',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='paquete',
+            name='calificacion_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(models.OrderBy(models.F('calificacion_promedio'), descending=True, nulls_last=True), condition=models.Q(('estado', True)), name='hotel_activo_valoracion'),
+        ),
+        migrations.AddIndex(
+            model_name='lugarturistico',
+            index=models.Index(models.OrderBy(models.F('calificacion_promedio'), descending=True, nulls_last=True), condition=models.Q(('estado', True)), name='lugar_activo_valoracion'),
+        ),
+        migrations.AddIndex(
+            model_name='paquete',
+            index=models.Index(models.OrderBy(models.F('calificacion_promedio'), descending=True, nulls_last=True), condition=models.Q(('estado', True)), name='paquete_activo_valoracion'),
+        ),
+    ]
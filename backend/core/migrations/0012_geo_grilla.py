@@ -0,0 +1,55 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:23
+
+import django.core.validators
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_review_calificaciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='latitud',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='longitud',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddField(
+            model_name='lugarturistico',
+            name='latitud',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='lugarturistico',
+            name='longitud',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='celda',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.math.Floor(django.db.models.expressions.CombinedExpression(models.F('latitud'), '/', models.Value(0.1))), '*', models.Value(4000)), '+', django.db.models.functions.math.Floor(django.db.models.expressions.CombinedExpression(models.F('longitud'), '/', models.Value(0.1)))), models.BigIntegerField()), output_field=models.BigIntegerField()),
+        ),
+        migrations.AddField(
+            model_name='lugarturistico',
+            name='celda',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.math.Floor(django.db.models.expressions.CombinedExpression(models.F('latitud'), '/', models.Value(0.1))), '*', models.Value(4000)), '+', django.db.models.functions.math.Floor(django.db.models.expressions.CombinedExpression(models.F('longitud'), '/', models.Value(0.1)))), models.BigIntegerField()), output_field=models.BigIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['celda'], name='hotel_activo_celda'),
+        ),
+        migrations.AddIndex(
+            model_name='lugarturistico',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['celda'], name='lugar_activo_celda'),
+        ),
+    ]
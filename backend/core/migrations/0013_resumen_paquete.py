@@ -0,0 +1,88 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:27
+
+import os
+from datetime import date, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+HORIZON_DAYS = int(os.environ.get('OCUPACION_HORIZONTE_DIAS', '400'))
+
+
+def _proxima_libre(tramos, hoy, fin):
+    """Primer día >= hoy fuera de los tramos [(inicio, fin)] ordenados por inicio, o None si no hay hasta fin."""
+    dia = hoy
+    for inicio, hasta in tramos:
+        if inicio > dia:
+            break
+        if hasta >= dia:
+            dia = hasta + timedelta(days=1)
+    return dia if dia <= fin else None
+
+
+def rellenar_resumenes(apps, schema_editor, hoy=None, batch_size=2000):
+    """Calcula los resúmenes de los paquetes existentes (mismos criterios que core.package_summaries)."""
+    Hotel = apps.get_model('core', 'Hotel')
+    Habitacion = apps.get_model('core', 'Habitacion')
+    Reserva = apps.get_model('core', 'Reserva')
+    Paquete = apps.get_model('core', 'Paquete')
+    ResumenPaquete = apps.get_model('core', 'ResumenPaquete')
+    hoy = hoy or date.today()
+    fin = hoy.replace(day=1) + timedelta(days=HORIZON_DAYS - 1)
+    ultimo = 0
+    while True:
+        paquetes = list(Paquete.objects.filter(pk__gt=ultimo).order_by('pk')
+                        .values_list('pk', 'id_hotel_id')[:batch_size])
+        if not paquetes:
+            return
+        ultimo = paquetes[-1][0]
+        valores = {pk: {'habitacion_precio_desde': None, 'habitaciones_disponibles': 0, 'proxima_fecha_libre': None,
+                        'hotel_calificacion': calif, 'hotel_calificacion_promedio': promedio,
+                        'hotel_calificacion_total': total}
+                   for pk, calif, promedio, total in Hotel.objects.filter(
+                       pk__in={h for _, h in paquetes if h}).values_list(
+                       'pk', 'calificacion', 'calificacion_promedio', 'calificacion_total')}
+        habitaciones = list(Habitacion.objects.filter(codigo_hotel_id__in=valores, disponible=True)
+                            .values_list('num', 'codigo_hotel_id', 'precio'))
+        tramos = {num: [] for num, _, _ in habitaciones}
+        for num, inicio, hasta in (Reserva.objects
+                                   .filter(num_habitacion_id__in=list(tramos), estado=True,
+                                           fecha_reserva__lte=fin, fecha_caducidad__gte=hoy)
+                                   .order_by('fecha_reserva')
+                                   .values_list('num_habitacion_id', 'fecha_reserva', 'fecha_caducidad')):
+            tramos[num].append((inicio, hasta))
+        for num, hotel_id, precio in habitaciones:
+            v = valores[hotel_id]
+            v['habitaciones_disponibles'] += 1
+            if v['habitacion_precio_desde'] is None or precio < v['habitacion_precio_desde']:
+                v['habitacion_precio_desde'] = precio
+            libre = _proxima_libre(tramos[num], hoy, fin)
+            if libre and (v['proxima_fecha_libre'] is None or libre < v['proxima_fecha_libre']):
+                v['proxima_fecha_libre'] = libre
+        ResumenPaquete.objects.bulk_create(
+            [ResumenPaquete(paquete_id=pk, **valores.get(hotel_id, {})) for pk, hotel_id in paquetes],
+            ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_geo_grilla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenPaquete',
+            fields=[
+                ('paquete', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen', serialize=False, to='core.paquete')),
+                ('habitacion_precio_desde', models.FloatField(blank=True, null=True)),
+                ('habitaciones_disponibles', models.PositiveIntegerField(default=0)),
+                ('proxima_fecha_libre', models.DateField(blank=True, db_index=True, null=True)),
+                ('hotel_calificacion', models.FloatField(blank=True, null=True)),
+                ('hotel_calificacion_promedio', models.FloatField(blank=True, null=True)),
+                ('hotel_calificacion_total', models.IntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(rellenar_resumenes, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,14 @@
 from django.db import models
+from django.db.models import F, Func, Q
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 import uuid
 from django.utils import timezone
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeBoundary, RangeOperators
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models.functions import Cast, Floor, Lower
 
 
 class UsuarioManager(BaseUserManager):
@@ -58,22 +65,82 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         return check_password(raw_password, self.contrasenia)
 
 
+class Unaccent(Func):
+    # Envoltorio IMMUTABLE de unaccent() (migración 0010) para columnas generadas e índices.
+    function = 'immutable_unaccent'
+    output_field = models.TextField()
+
+
+def _texto(*campos):
+    """tsvector ponderado (A, B, C...) sin acentos de los campos dados."""
+    vector = None
+    for campo, peso in zip(campos, 'ABCD'):
+        parte = SearchVector(Unaccent(campo), weight=peso, config='spanish')
+        vector = parte if vector is None else vector + parte
+    return vector
+
+
+# Lado de la celda de la grilla de core.geo, en grados (~11 km de norte a sur).
+CELDA_GRADOS = 0.1
+
+
+def _celda():
+    """Celda de grilla de (latitud, longitud), calculada por Postgres como columna generada."""
+    fila = Floor(F('latitud') / CELDA_GRADOS)
+    columna = Floor(F('longitud') / CELDA_GRADOS)
+    return Cast(fila * 4000 + columna, models.BigIntegerField())
+
+
+def _coordenada(limite):
+    return models.FloatField(null=True, blank=True, validators=[MinValueValidator(-limite), MaxValueValidator(limite)])
+
+
+def histograma_vacio():
+    return [0] * 5
+
+
 class Hotel(models.Model):
     id_hotel = models.BigAutoField(primary_key=True)
     nombre = models.CharField(max_length=255)
     ubicacion = models.CharField(max_length=255)
+    latitud = _coordenada(90)
+    longitud = _coordenada(180)
+    celda = models.GeneratedField(expression=_celda(), output_field=models.BigIntegerField(), db_persist=True)
     departamento = models.CharField(max_length=100)
     calificacion = models.FloatField()
     estado = models.BooleanField(default=True)
     fecha_creacion = models.DateField(auto_now_add=True)
     url = models.CharField(max_length=255, default="")
     url_imagen_hotel = models.TextField(blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True)
+    # Agregados de Review (activas), mantenidos de forma incremental por core.ratings.
+    calificacion_promedio = models.FloatField(null=True, blank=True)
+    calificacion_total = models.IntegerField(default=0)
+    calificacion_suma = models.IntegerField(default=0)
+    calificacion_histograma = models.JSONField(default=histograma_vacio)
+    busqueda = models.GeneratedField(expression=_texto('nombre', 'ubicacion'),
+                                     output_field=SearchVectorField(), db_persist=True)
+
+    class Meta:
+        # Filtros de la búsqueda facetada (core.search); solo interesan los activos.
+        indexes = [
+            models.Index(fields=["departamento", "calificacion"], name="hotel_activo_depto_calif", condition=Q(estado=True)),
+            models.Index(fields=["calificacion"], name="hotel_activo_calif", condition=Q(estado=True)),
+            models.Index(F("calificacion_promedio").desc(nulls_last=True), name="hotel_activo_valoracion",
+                         condition=Q(estado=True)),
+            GinIndex(fields=["busqueda"], name="hotel_busqueda_gin"),
+            models.Index(fields=["celda"], name="hotel_activo_celda", condition=Q(estado=True)),
+            GinIndex(OpClass(Unaccent(Lower('nombre')), name='gin_trgm_ops'), name="hotel_nombre_trgm"),
+        ]
 
 
 class LugarTuristico(models.Model):
     id_lugar = models.BigAutoField(primary_key=True)
     nombre = models.CharField(max_length=255)
     ubicacion = models.CharField(max_length=255)
+    latitud = _coordenada(90)
+    longitud = _coordenada(180)
+    celda = models.GeneratedField(expression=_celda(), output_field=models.BigIntegerField(), db_persist=True)
     departamento = models.CharField(max_length=100)
     tipo = models.CharField(max_length=50)
     fecha_creacion = models.DateField(auto_now_add=True)
@@ -81,6 +148,25 @@ class LugarTuristico(models.Model):
     descripcion = models.TextField(blank=True, default="")
     url_image_lugar_turistico = models.TextField(blank=True, default="")
     estado = models.BooleanField(default=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True)
+    # Agregados de Review (activas), mantenidos de forma incremental por core.ratings.
+    calificacion_promedio = models.FloatField(null=True, blank=True)
+    calificacion_total = models.IntegerField(default=0)
+    calificacion_suma = models.IntegerField(default=0)
+    calificacion_histograma = models.JSONField(default=histograma_vacio)
+    busqueda = models.GeneratedField(expression=_texto('nombre', 'ubicacion', 'descripcion'),
+                                     output_field=SearchVectorField(), db_persist=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["departamento", "tipo"], name="lugar_activo_depto_tipo", condition=Q(estado=True)),
+            models.Index(fields=["tipo"], name="lugar_activo_tipo", condition=Q(estado=True)),
+            models.Index(F("calificacion_promedio").desc(nulls_last=True), name="lugar_activo_valoracion",
+                         condition=Q(estado=True)),
+            GinIndex(fields=["busqueda"], name="lugar_busqueda_gin"),
+            models.Index(fields=["celda"], name="lugar_activo_celda", condition=Q(estado=True)),
+            GinIndex(OpClass(Unaccent(Lower('nombre')), name='gin_trgm_ops'), name="lugar_nombre_trgm"),
+        ]
 
 
 class Pago(models.Model):
@@ -100,6 +186,11 @@ class Pago(models.Model):
 
     estado = models.CharField(max_length=15, choices=Estado.choices, default=Estado.PENDIENTE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["fecha_creacion"], name="pago_pendiente_idx", condition=Q(estado='pendiente')),
+        ]
+
 
 class Habitacion(models.Model):
     num = models.BigAutoField(primary_key=True)
@@ -110,6 +201,12 @@ class Habitacion(models.Model):
     fecha_creacion = models.DateField(auto_now_add=True)
     cant_huespedes = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            # Precio mínimo y rango de precios por hotel sin leer las filas de la tabla.
+            models.Index(fields=["codigo_hotel", "precio"], name="habitacion_disp_hotel_precio", condition=Q(disponible=True)),
+        ]
+
 
 class Paquete(models.Model):
     id_paquete = models.BigAutoField(primary_key=True)
@@ -120,12 +217,37 @@ class Paquete(models.Model):
     id_lugar = models.ForeignKey(LugarTuristico, on_delete=models.CASCADE)
     estado = models.BooleanField(default=True)
     fecha_creacion = models.DateField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True)
+    # Agregados de Review (activas), mantenidos de forma incremental por core.ratings.
+    calificacion_promedio = models.FloatField(null=True, blank=True)
+    calificacion_total = models.IntegerField(default=0)
+    calificacion_suma = models.IntegerField(default=0)
+    calificacion_histograma = models.JSONField(default=histograma_vacio)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["precio"], name="paquete_activo_precio", condition=Q(estado=True)),
+            models.Index(fields=["tipo", "precio"], name="paquete_activo_tipo_precio", condition=Q(estado=True)),
+            models.Index(fields=["id_lugar"], name="paquete_activo_lugar", condition=Q(estado=True)),
+            models.Index(F("calificacion_promedio").desc(nulls_last=True), name="paquete_activo_valoracion",
+                         condition=Q(estado=True)),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.tipo})"
 
 
+class DateRange(Func):
+    function = 'DATERANGE'
+    output_field = DateRangeField()
+
+
 class Reserva(models.Model):
+    OVERLAP_CONSTRAINT = 'reserva_sin_solapamiento'
+    OVERLAP_MESSAGE = 'La habitación ya está reservada en el rango de fechas solicitado.'
+    # Reservas "vivas": ni canceladas ni archivadas por el barrido de caducadas (core.sweeper).
+    VIGENTE = Q(estado=True, archivada=False)
+
     id_reserva = models.BigAutoField(primary_key=True)
     fecha_reserva = models.DateField()
     fecha_caducidad = models.DateField()
@@ -136,11 +258,83 @@ class Reserva(models.Model):
     id_pago = models.ForeignKey(Pago, on_delete=models.CASCADE, null=True)
     estado = models.BooleanField(default=True)
     id_paquete = models.ForeignKey(Paquete, on_delete=models.SET_NULL, null=True, blank=True)
+    # True cuando fecha_caducidad ya pasó; sigue contando como reserva realizada (estado=True) pero sale del camino caliente.
+    archivada = models.BooleanField(default=False)
 
     class Meta:
         indexes = [
             models.Index(fields=["num_habitacion", "fecha_reserva", "fecha_caducidad"]),
+            models.Index(fields=["num_habitacion", "fecha_reserva", "fecha_caducidad"], name="reserva_vigente_idx",
+                         condition=Q(estado=True, archivada=False)),
+            models.Index(fields=["fecha_caducidad"], name="reserva_por_archivar_idx",
+                         condition=Q(estado=True, archivada=False)),
+            # Listados de ReservaViewSet: "mis reservas", filtros del panel admin y orden por fecha.
+            models.Index(fields=["id_usuario", "estado", "fecha_reserva"], name="reserva_usuario_estado_fecha"),
+            models.Index(fields=["codigo_hotel", "estado", "fecha_reserva"], name="reserva_hotel_estado_fecha"),
+            models.Index(fields=["estado", "fecha_reserva", "id_reserva"], name="reserva_estado_fecha"),
         ]
+        constraints = [
+            # Dos reservas vigentes (Reserva.VIGENTE) de la misma habitación no pueden solaparse (fechas inclusivas).
+            ExclusionConstraint(
+                name='reserva_sin_solapamiento',
+                expressions=[
+                    (DateRange('fecha_reserva', 'fecha_caducidad', RangeBoundary(inclusive_lower=True, inclusive_upper=True)),
+                     RangeOperators.OVERLAPS),
+                    ('num_habitacion', RangeOperators.EQUAL),
+                ],
+                condition=Q(estado=True, archivada=False),
+                violation_error_message='La habitación ya está reservada en el rango de fechas solicitado.',
+            ),
+        ]
+
+    @classmethod
+    def is_overlap_violation(cls, exc):
+        cause = getattr(exc, '__cause__', None)
+        return getattr(cause, 'pgcode', None) == '23P01' or cls.OVERLAP_CONSTRAINT in str(exc)
+
+
+class OcupacionDiaria(models.Model):
+    """
+    Rollup diario por hotel para las estadísticas de reservas (core.rollups).
+    noches: habitaciones ocupadas ese día; reservas/cancelaciones/ingresos: por día de check-in.
+    """
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='ocupacion_diaria')
+    fecha = models.DateField()
+    noches = models.PositiveIntegerField(default=0)
+    reservas = models.PositiveIntegerField(default=0)
+    cancelaciones = models.PositiveIntegerField(default=0)
+    ingresos = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'fecha'], name='ocupacion_diaria_hotel_fecha'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha']),
+        ]
+
+
+class ResumenPaquete(models.Model):
+    """
+    Resumen precalculado del hotel de un paquete para el listado (core.package_summaries):
+    habitación disponible más barata, próximo día con alguna libre y la valoración del hotel.
+    Tabla aparte para que guardar un Paquete no pise el resumen con valores viejos.
+    """
+    paquete = models.OneToOneField(Paquete, on_delete=models.CASCADE, primary_key=True, related_name='resumen')
+    habitacion_precio_desde = models.FloatField(null=True, blank=True)
+    habitaciones_disponibles = models.PositiveIntegerField(default=0)
+    proxima_fecha_libre = models.DateField(null=True, blank=True, db_index=True)
+    hotel_calificacion = models.FloatField(null=True, blank=True)
+    hotel_calificacion_promedio = models.FloatField(null=True, blank=True)
+    hotel_calificacion_total = models.IntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+
+class KnowledgeSyncState(models.Model):
+    """Marca de agua de la última sincronización catálogo -> asistente (p. ej. vector store)."""
+    nombre = models.CharField(max_length=50, primary_key=True)
+    ultima_sincronizacion = models.DateTimeField(null=True, blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
 
 
 class Sugerencias(models.Model):
@@ -231,6 +425,30 @@ class Notification(models.Model):
         return f"Notificación para {self.usuario.nombre}: {self.title}"
 
 
+class NotificationOutbox(models.Model):
+    """
+    Envíos pendientes al channel layer, escritos en la misma transacción que la reserva.
+    El despachador (core.outbox) los drena por lotes con reintentos: entrega al menos una vez.
+    """
+    id = models.BigAutoField(primary_key=True)
+    grupo = models.CharField(max_length=100)
+    payload = models.JSONField()
+    creado = models.DateTimeField(auto_now_add=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    enviado = models.DateTimeField(null=True, blank=True)
+    ultimo_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['proximo_intento', 'id'], name='outbox_pendientes_idx',
+                         condition=Q(enviado__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"Outbox #{self.id} -> {self.grupo}"
+
+
 class Review(models.Model):
     MIN_RATING = 1
     MAX_RATING = 5
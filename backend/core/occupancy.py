@@ -0,0 +1,209 @@
+"""
+Mapa de ocupación por habitación: un bitmap de días sobre un horizonte móvil.
+
+El bit i indica si el día `origen + i` está ocupado por una reserva activa. Junto al bitmap
+se guardan los tramos (inicio, fin) de cada reserva, para listar las reservas sin consultar
+Reserva. Se reconstruye desde la BD cuando falta o quedó viejo, y al confirmarse cualquier
+cambio de reservas (alta, cancelación, reactivación, fechas o habitación) las señales lo
+recalculan desde la BD (una consulta indexada) en vez de parchear la entrada: dos altas
+simultáneas en la misma habitación no pueden pisarse los bits. El camino de lectura llena el
+cache con add(), así una lectura que consultó Reserva antes de un commit nunca sobrescribe la
+entrada más nueva que escribió la señal.
+
+Con Redis (CACHE_REDIS_URL) el cache 'default' es compartido y todos los procesos ven las
+mismas entradas. Sin Redis es la memoria de cada proceso y las entradas duran un TTL corto:
+lo que cambie otro proceso (otro worker, un comando de manage.py) se ve a lo sumo CACHE_TTL
+segundos después.
+"""
+import os
+import uuid
+from datetime import date, timedelta
+
+from django.core.cache import caches
+
+from .models import Reserva
+
+HORIZON_DAYS = int(os.environ.get('OCUPACION_HORIZONTE_DIAS', '400'))
+_EN_REDIS = bool(os.environ.get('CACHE_REDIS_URL'))
+CACHE_ALIAS = os.environ.get('OCUPACION_CACHE', 'default')
+CACHE_TTL = int(os.environ.get('OCUPACION_CACHE_TTL', str(24 * 3600 if _EN_REDIS else 60)))
+# En un cache por proceso los tokens de hotel también caducan, para que los bumps de otro proceso se noten.
+VERSION_TTL = None if _EN_REDIS else CACHE_TTL
+
+
+def _key(num, origin):
+    # El origen va en la clave: al cambiar de mes la entrada nueva no choca con la vieja en add().
+    return f"ocupacion:hab:v2:{num}:{origin:%Y%m}"
+
+
+def _origin(today=None):
+    # El horizonte empieza el día 1 del mes en curso y "rueda" al cambiar de mes.
+    return (today or date.today()).replace(day=1)
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _range_mask(origin, inicio, fin, days=HORIZON_DAYS):
+    """Máscara de bits para [inicio, fin] recortada al horizonte que empieza en `origin`."""
+    start = max((inicio - origin).days, 0)
+    end = min((fin - origin).days, days - 1)
+    if end < start:
+        return 0
+    return ((1 << (end - start + 1)) - 1) << start
+
+
+def _fetch(nums, origin, days=HORIZON_DAYS):
+    """{num: (bits, tramos)} desde la BD con una consulta; tramos = ((inicio, fin) en ordinales, ...)."""
+    end = origin + timedelta(days=days - 1)
+    out = {num: (0, ()) for num in nums}
+    reservas = (Reserva.objects
+                .filter(num_habitacion_id__in=list(nums), estado=True,
+                        fecha_reserva__lte=end, fecha_caducidad__gte=origin)
+                .order_by('fecha_reserva', 'id_reserva')
+                .values_list('num_habitacion_id', 'fecha_reserva', 'fecha_caducidad'))
+    for num, inicio, fin in reservas:
+        bits, tramos = out[num]
+        out[num] = (bits | _range_mask(origin, inicio, fin, days), tramos + ((inicio.toordinal(), fin.toordinal()),))
+    return out
+
+
+def store(num, origin, bits, tramos=()):
+    _cache().set(_key(num, origin), (origin.toordinal(), bits, tuple(tramos)), CACHE_TTL)
+
+
+def rebuild(num, today=None):
+    origin = _origin(today)
+    bits, tramos = _fetch([num], origin)[num]
+    store(num, origin, bits, tramos)
+    return origin, bits
+
+
+def rebuild_many(nums, today=None):
+    """Recalcula desde la BD (una consulta) los bitmaps de esas habitaciones y los guarda."""
+    origin = _origin(today)
+    fetched = _fetch(set(nums), origin)
+    _cache().set_many({_key(n, origin): (origin.toordinal(), b, t) for n, (b, t) in fetched.items()}, CACHE_TTL)
+
+
+def rebuild_all(today=None, batch_size=2000):
+    """Reconstruye los bitmaps de todas las habitaciones con una sola pasada sobre Reserva."""
+    from .models import Habitacion
+    origin = _origin(today)
+    horizon_end = origin + timedelta(days=HORIZON_DAYS - 1)
+    por_hab = {num: (0, ()) for num in Habitacion.objects.values_list('num', flat=True)}
+    reservas = (Reserva.objects
+                .filter(estado=True, fecha_reserva__lte=horizon_end, fecha_caducidad__gte=origin)
+                .order_by('fecha_reserva', 'id_reserva')
+                .values_list('num_habitacion_id', 'fecha_reserva', 'fecha_caducidad')
+                .iterator(chunk_size=batch_size))
+    for num, inicio, fin in reservas:
+        bits, tramos = por_hab.get(num, (0, ()))
+        por_hab[num] = (bits | _range_mask(origin, inicio, fin), tramos + ((inicio.toordinal(), fin.toordinal()),))
+    for num, (bits, tramos) in por_hab.items():
+        store(num, origin, bits, tramos)
+    return len(por_hab)
+
+
+def _vigente(entry, origin):
+    return entry and len(entry) == 3 and entry[0] == origin.toordinal()
+
+
+def get_entry(num, today=None):
+    """(origen, bits, tramos) de la habitación; reconstruye desde la BD si falta o está viejo."""
+    origin = _origin(today)
+    cached = _cache().get(_key(num, origin))
+    if _vigente(cached, origin):
+        return origin, cached[1], cached[2]
+    bits, tramos = _fetch([num], origin)[num]
+    # add(): si una señal ya guardó una entrada más nueva, no se pisa con lo que se leyó antes.
+    _cache().add(_key(num, origin), (origin.toordinal(), bits, tuple(tramos)), CACHE_TTL)
+    return origin, bits, tramos
+
+
+def get(num, today=None):
+    """(origen, bits) del bitmap de la habitación; reconstruye desde la BD si falta o está viejo."""
+    return get_entry(num, today)[:2]
+
+
+def get_many(nums, today=None):
+    """{num: (origen, bits)} con un solo get_many al cache y una sola consulta para los que falten."""
+    origin = _origin(today)
+    nums = list(nums)
+    cached = _cache().get_many([_key(n, origin) for n in nums])
+    out, missing = {}, []
+    for num in nums:
+        entry = cached.get(_key(num, origin))
+        if _vigente(entry, origin):
+            out[num] = (origin, entry[1])
+        else:
+            missing.append(num)
+    if missing:
+        fetched = _fetch(missing, origin)
+        for n, (b, t) in fetched.items():
+            _cache().add(_key(n, origin), (origin.toordinal(), b, t), CACHE_TTL)
+        out.update({n: (origin, b) for n, (b, _) in fetched.items()})
+    return out
+
+
+def build_for(nums, origin, days=HORIZON_DAYS):
+    """Bitmaps de varias habitaciones desde la BD (una consulta), con origen y largo arbitrarios."""
+    return {num: (origin, bits) for num, (bits, _) in _fetch(nums, origin, days).items()}
+
+
+def covers(origin, desde, hasta):
+    return desde >= origin and hasta <= origin + timedelta(days=HORIZON_DAYS - 1)
+
+
+def is_free(num, desde, hasta):
+    origin, bits = get(num)
+    if not covers(origin, desde, hasta):
+        return None
+    return not (bits & _range_mask(origin, desde, hasta))
+
+
+def next_free_day(origin, bits, desde):
+    """Primer día libre >= desde dentro del horizonte (o el día siguiente al horizonte)."""
+    offset = max((desde - origin).days, 0)
+    free = ~bits & ((1 << HORIZON_DAYS) - 1)
+    rest = free >> offset
+    if not rest:
+        return origin + timedelta(days=HORIZON_DAYS)
+    return origin + timedelta(days=offset + (rest & -rest).bit_length() - 1)
+
+
+def reserved_intervals(tramos, desde, hasta):
+    """[(inicio, fin)] de cada reserva que toca [desde, hasta], ordenadas por inicio y sin recortar."""
+    lo, hi = desde.toordinal(), hasta.toordinal()
+    return [(date.fromordinal(i), date.fromordinal(f)) for i, f in tramos if i <= hi and f >= lo]
+
+
+def apply_created(reservas):
+    """Equivalente a las señales para reservas creadas con bulk_create (que no las dispara)."""
+    rebuild_many({r.num_habitacion_id for r in reservas})
+    for hotel_id in {r.codigo_hotel_id for r in reservas}:
+        bump_hotel(hotel_id)
+
+
+def invalidate(num, today=None):
+    _cache().delete(_key(num, _origin(today)))
+
+
+def _hotel_key(hotel_id):
+    return f"ocupacion:hotel:{hotel_id}:version"
+
+
+def hotel_version(hotel_id):
+    """Token que cambia cada vez que cambian las reservas o habitaciones del hotel (para ETag y cache)."""
+    token = _cache().get(_hotel_key(hotel_id))
+    if token is not None:
+        return token
+    token = uuid.uuid4().hex
+    if _cache().add(_hotel_key(hotel_id), token, VERSION_TTL):
+        return token
+    return _cache().get(_hotel_key(hotel_id)) or token
+
+
+def bump_hotel(hotel_id):
+    _cache().set(_hotel_key(hotel_id), uuid.uuid4().hex, VERSION_TTL)
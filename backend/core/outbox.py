@@ -0,0 +1,185 @@
+"""
+Outbox transaccional de notificaciones.
+
+`notify()` crea la Notification y su fila en NotificationOutbox dentro de la transacción
+del llamador; nada sale al channel layer durante la request. El despachador corre como
+tarea asyncio en el event loop de Daphne (se arranca al cargar la aplicación ASGI, ver
+`start()`), se despierta al confirmar cada transacción y además revisa la outbox cada
+OUTBOX_POLL_INTERVAL segundos. Las filas se reclaman con un lease: si el proceso cae antes
+de marcarlas como enviadas, se reintentan al vencer el lease (entrega al menos una vez).
+Las que llegan a OUTBOX_MAX_INTENTOS quedan "agotadas": se registran con logger.error, el
+comando las informa y puede reencolarlas, y `purge()` las borra pasado el plazo.
+
+Con un channel layer compartido (Redis) también puede drenarse desde fuera con
+`manage.py despachar_notificaciones`. Con InMemoryChannelLayer el comando se niega a drenar:
+lo que envíe no lo escucha ningún consumer y las filas quedarían marcadas como enviadas.
+"""
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '100'))
+MAX_INTENTOS = int(os.environ.get('OUTBOX_MAX_INTENTOS', '8'))
+POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', '5'))
+LEASE = timedelta(seconds=int(os.environ.get('OUTBOX_LEASE_SECONDS', '30')))
+MAX_BACKOFF = 300
+
+
+def notify(usuario, title, message, link, event):
+    """Notification + fila de outbox en la transacción actual; el push sale tras el commit."""
+    notif = Notification.objects.create(usuario=usuario, title=title, message=message, link=link)
+    NotificationOutbox.objects.create(
+        grupo=f"user_{notif.usuario_id}",
+        payload={"type": "notify", "payload": {"event": event, "title": title, "message": message}},
+    )
+    transaction.on_commit(wake)
+    return notif
+
+
+def claim(batch_size=BATCH_SIZE):
+    """Reclama un lote de pendientes (SKIP LOCKED) y les pone un lease para que otro despachador no los tome."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(NotificationOutbox.objects
+                   .select_for_update(skip_locked=True)
+                   .filter(enviado__isnull=True, intentos__lt=MAX_INTENTOS, proximo_intento__lte=now)
+                   .order_by('proximo_intento', 'id')
+                   .values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return []
+        NotificationOutbox.objects.filter(id__in=ids).update(proximo_intento=now + LEASE)
+    return list(NotificationOutbox.objects.filter(id__in=ids).order_by('id'))
+
+
+def complete(rows, results):
+    """Marca enviados y reprograma fallidos con backoff exponencial; devuelve (enviados, fallidos)."""
+    now = timezone.now()
+    sent, failed = [], []
+    for row, result in zip(rows, results):
+        if isinstance(result, Exception):
+            row.intentos += 1
+            row.proximo_intento = now + timedelta(seconds=min(2 ** row.intentos, MAX_BACKOFF))
+            row.ultimo_error = str(result)[:500]
+            failed.append(row)
+            if row.intentos >= MAX_INTENTOS:
+                logger.error("Outbox #%s agotada tras %s intentos, no se reintentará: %s",
+                             row.id, row.intentos, row.ultimo_error)
+            else:
+                logger.warning("Outbox #%s falló (intento %s): %s", row.id, row.intentos, row.ultimo_error)
+        else:
+            sent.append(row.id)
+    if sent:
+        NotificationOutbox.objects.filter(id__in=sent).update(enviado=now)
+    if failed:
+        NotificationOutbox.objects.bulk_update(failed, ['intentos', 'proximo_intento', 'ultimo_error'])
+    return len(sent), len(failed)
+
+
+async def _send_all(layer, rows):
+    return await asyncio.gather(*(layer.group_send(r.grupo, r.payload) for r in rows), return_exceptions=True)
+
+
+async def dispatch_batch_async(layer=None, batch_size=BATCH_SIZE):
+    layer = layer or get_channel_layer()
+    rows = await database_sync_to_async(claim)(batch_size)
+    if not rows:
+        return 0, 0
+    results = await _send_all(layer, rows)
+    return await database_sync_to_async(complete)(rows, results)
+
+
+def layer_en_proceso():
+    """True si el channel layer es InMemoryChannelLayer: solo lo escuchan los consumers del mismo proceso."""
+    return isinstance(get_channel_layer(), InMemoryChannelLayer)
+
+
+def drain(batch_size=BATCH_SIZE):
+    """Versión síncrona para el comando de gestión; devuelve (enviados, fallidos)."""
+    layer = get_channel_layer()
+    total_sent = total_failed = 0
+    while True:
+        rows = claim(batch_size)
+        if not rows:
+            return total_sent, total_failed
+        sent, failed = complete(rows, async_to_sync(_send_all)(layer, rows))
+        total_sent += sent
+        total_failed += failed
+
+
+def agotadas():
+    """Filas que ya no se reintentan (llegaron a MAX_INTENTOS sin enviarse)."""
+    return NotificationOutbox.objects.filter(enviado__isnull=True, intentos__gte=MAX_INTENTOS)
+
+
+def reintentar_agotadas():
+    """Vuelve a encolar las filas agotadas (p. ej. tras arreglar el channel layer); devuelve cuántas."""
+    return agotadas().update(intentos=0, proximo_intento=timezone.now(), ultimo_error='')
+
+
+def purge(days=7):
+    """Borra filas enviadas hace más de `days` días y las agotadas creadas antes de ese plazo."""
+    limite = timezone.now() - timedelta(days=days)
+    enviadas = NotificationOutbox.objects.filter(enviado__lt=limite).delete()[0]
+    return enviadas + agotadas().filter(creado__lt=limite).delete()[0]
+
+
+_loop = None
+_event = None
+
+
+async def _run():
+    layer = get_channel_layer()
+    while True:
+        try:
+            await asyncio.wait_for(_event.wait(), POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _event.clear()
+        try:
+            while True:
+                sent, failed = await dispatch_batch_async(layer)
+                if sent + failed < BATCH_SIZE:
+                    break
+        except Exception as e:
+            logger.warning("Despachador de outbox: %s", e)
+
+
+def ensure_dispatcher():
+    """Arranca el despachador en el event loop actual (una vez por loop). Llamar desde código async."""
+    global _loop, _event
+    loop = asyncio.get_running_loop()
+    if _loop is loop:
+        return
+    _loop, _event = loop, asyncio.Event()
+    loop.create_task(_run())
+
+
+def start(loop=None):
+    """
+    Programa el despachador en el event loop del servidor (desde config/asgi.py), para que la
+    outbox se drene aunque nadie se haya conectado por WebSocket. Daphne ya instaló su loop al
+    importar la aplicación pero aún no lo corre: el arranque queda en cola hasta entonces.
+    """
+    if loop is None:
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            return
+    loop.call_soon_threadsafe(ensure_dispatcher)
+
+
+def wake():
+    loop = _loop
+    if loop is not None and not loop.is_closed():
+        loop.call_soon_threadsafe(_event.set)
@@ -0,0 +1,155 @@
+"""
+Resumen precalculado por paquete (ResumenPaquete) para el listado de paquetes: precio de la
+habitación disponible más barata del hotel, cuántas hay, el próximo día con alguna libre
+(bitmaps de core.occupancy) y una foto de la valoración del hotel.
+
+Se refresca por hotel al confirmar cambios de habitaciones, reservas y del hotel (incluidos
+sus agregados de reviews), y desde las operaciones masivas, con `programar()`: en el proceso
+ASGI (config/asgi.py arranca el hilo con `start_worker()`) los hoteles se encolan y se
+refrescan fuera de la request, juntando los repetidos; sin el hilo (comandos, tests) se
+refresca en el momento. Solo se escriben las filas que cambian, y solo entonces se invalida
+el cache de respuestas de paquetes. En el barrido de core.sweeper, `refresh_vencidos()`
+corrige las fechas libres que quedaron en el pasado y reintenta las que no tenían ninguna
+(el horizonte de ocupación avanza cada mes). `rebuild_all()` (comando
+`reconstruir_resumenes_paquetes`) los regenera todos.
+"""
+import logging
+import threading
+import time
+from datetime import date, timedelta
+
+from django.db import close_old_connections
+from django.db.models import Q
+
+from .models import Hotel, Habitacion, Paquete, ResumenPaquete
+from . import occupancy, response_cache
+
+logger = logging.getLogger(__name__)
+
+REINTENTO_SEGUNDOS = 5
+
+CAMPOS = ['habitacion_precio_desde', 'habitaciones_disponibles', 'proxima_fecha_libre',
+          'hotel_calificacion', 'hotel_calificacion_promedio', 'hotel_calificacion_total']
+
+
+def _por_hotel(hotel_ids, hoy):
+    """{hotel: {campo: valor}} con una consulta de hoteles, una de habitaciones y los bitmaps cacheados."""
+    valores = {pk: {'habitacion_precio_desde': None, 'habitaciones_disponibles': 0, 'proxima_fecha_libre': None,
+                    'hotel_calificacion': calif, 'hotel_calificacion_promedio': promedio,
+                    'hotel_calificacion_total': total}
+               for pk, calif, promedio, total in Hotel.objects.filter(pk__in=hotel_ids).values_list(
+                   'pk', 'calificacion', 'calificacion_promedio', 'calificacion_total')}
+    habitaciones = list(Habitacion.objects.filter(codigo_hotel_id__in=valores, disponible=True)
+                        .values_list('num', 'codigo_hotel_id', 'precio'))
+    bitmaps = occupancy.get_many([num for num, _, _ in habitaciones], hoy)
+    for num, hotel_id, precio in habitaciones:
+        v = valores[hotel_id]
+        v['habitaciones_disponibles'] += 1
+        if v['habitacion_precio_desde'] is None or precio < v['habitacion_precio_desde']:
+            v['habitacion_precio_desde'] = precio
+        origin, bits = bitmaps[num]
+        libre = occupancy.next_free_day(origin, bits, hoy)
+        if libre < origin + timedelta(days=occupancy.HORIZON_DAYS) and (
+                v['proxima_fecha_libre'] is None or libre < v['proxima_fecha_libre']):
+            v['proxima_fecha_libre'] = libre
+    return valores
+
+
+def _guardar(paquetes, hoy=None):
+    """paquetes: [(id_paquete, id_hotel)]; escribe los resúmenes que cambiaron y devuelve cuántos."""
+    if not paquetes:
+        return 0
+    hoy = hoy or date.today()
+    valores = _por_hotel({h for _, h in paquetes if h}, hoy)
+    existentes = {r.pk: r for r in ResumenPaquete.objects.filter(pk__in=[p for p, _ in paquetes])}
+    cambios = []
+    for pk, hotel_id in paquetes:
+        nuevo = ResumenPaquete(paquete_id=pk, **valores.get(hotel_id, {}))
+        actual = existentes.get(pk)
+        if actual is None or any(getattr(actual, c) != getattr(nuevo, c) for c in CAMPOS):
+            cambios.append(nuevo)
+    if cambios:
+        ResumenPaquete.objects.bulk_create(cambios, batch_size=1000, update_conflicts=True,
+                                           unique_fields=['paquete'], update_fields=CAMPOS + ['fecha_actualizacion'])
+        response_cache.bump('paquete')  # el resumen va dentro de las respuestas de paquetes
+    return len(cambios)
+
+
+def refresh_hoteles(hotel_ids, hoy=None):
+    """Refresca los paquetes de esos hoteles."""
+    hotel_ids = {h for h in hotel_ids if h}
+    if not hotel_ids:
+        return 0
+    return _guardar(list(Paquete.objects.filter(id_hotel_id__in=hotel_ids).values_list('pk', 'id_hotel_id')), hoy)
+
+
+def refresh_paquetes(paquete_ids, hoy=None):
+    return _guardar(list(Paquete.objects.filter(pk__in=paquete_ids).values_list('pk', 'id_hotel_id')), hoy)
+
+
+def refresh_vencidos(hoy=None):
+    """Recalcula los paquetes cuya próxima fecha libre ya pasó o que no tenían ninguna dentro del horizonte."""
+    hoy = hoy or date.today()
+    hoteles = (ResumenPaquete.objects
+               .filter(Q(proxima_fecha_libre__lt=hoy)
+                       | Q(proxima_fecha_libre__isnull=True, habitaciones_disponibles__gt=0))
+               .values_list('paquete__id_hotel_id', flat=True).distinct())
+    return refresh_hoteles(list(hoteles), hoy)
+
+
+def rebuild_all(hoy=None, batch_size=2000):
+    """Recalcula todos los paquetes, por tandas de `batch_size`."""
+    total, ultimo = 0, 0
+    while True:
+        paquetes = list(Paquete.objects.filter(pk__gt=ultimo).order_by('pk')
+                        .values_list('pk', 'id_hotel_id')[:batch_size])
+        if not paquetes:
+            return total
+        total += _guardar(paquetes, hoy)
+        ultimo = paquetes[-1][0]
+
+
+_pendientes = set()
+_cond = threading.Condition()
+_worker = None
+
+
+def programar(hotel_ids):
+    """Refresca esos hoteles en el hilo de resúmenes si está corriendo; si no, en el momento."""
+    hotel_ids = {h for h in hotel_ids if h}
+    if not hotel_ids:
+        return
+    if _worker is None or not _worker.is_alive():
+        refresh_hoteles(hotel_ids)
+        return
+    with _cond:
+        _pendientes.update(hotel_ids)
+        _cond.notify()
+
+
+def _run():
+    while True:
+        with _cond:
+            while not _pendientes:
+                _cond.wait()
+            hoteles = set(_pendientes)
+            _pendientes.clear()
+        try:
+            close_old_connections()
+            refresh_hoteles(hoteles)
+        except Exception as e:
+            logger.warning("Resúmenes de paquetes de %s hoteles fallaron, se reintentan: %s", len(hoteles), e)
+            with _cond:
+                _pendientes.update(hoteles)
+            time.sleep(REINTENTO_SEGUNDOS)
+        finally:
+            close_old_connections()
+
+
+def start_worker():
+    """Arranca el hilo daemon que refresca los hoteles encolados por programar()."""
+    global _worker
+    if _worker and _worker.is_alive():
+        return
+    _worker = threading.Thread(target=_run, name="resumenes-paquetes", daemon=True)
+    _worker.start()
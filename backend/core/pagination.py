@@ -0,0 +1,104 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, CursorPagination, _reverse_ordering
+
+
+class StandardPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class StandardCursorPagination(CursorPagination):
+    """
+    Paginación por cursor para tablas grandes: costo constante sin importar la profundidad.
+
+    Con un ordering (campo, desempate único) en la misma dirección, p. ej. ('-fecha_reserva',
+    '-id_reserva'), la posición lleva los dos valores y se filtra por (campo, pk) > (valor, pk).
+    DRF solo posiciona con el primer campo y, si se repite (fechas), avanza con un offset que
+    además se corta a los 1000 ítems. Con un solo campo se usa el comportamiento de DRF.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+    def _get_position_from_instance(self, instance, ordering):
+        valores = [instance[f.lstrip('-')] if isinstance(instance, dict) else getattr(instance, f.lstrip('-'))
+                   for f in ordering[:2]]
+        return '|'.join(str(v) for v in valores)
+
+    def _after(self, position, reverse):
+        campo, desempate = (f.lstrip('-') for f in self.ordering[:2])
+        valor, _, pk = position.rpartition('|')
+        op = 'lt' if reverse != self.ordering[0].startswith('-') else 'gt'
+        return Q(**{f'{campo}__{op}': valor}) | Q(**{campo: valor, f'{desempate}__{op}': pk})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        if len(self.ordering) < 2:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor = self.decode_cursor(request)
+        _, reverse, position = self.cursor or (0, False, None)
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._after(position, reverse))
+            except (ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = (self._get_position_from_instance(results[-1], self.ordering)
+                     if len(results) > len(self.page) else None)
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, following is not None
+            self.next_position, self.previous_position = position, following
+        else:
+            self.has_next, self.has_previous = following is not None, position is not None
+            self.next_position, self.previous_position = following, position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+def optional_paginator(request, cursor_ordering=None):
+    """
+    Paginador según los parámetros de la request: `cursor` -> cursor, `page`/`page_size` -> páginas,
+    ninguno -> None (lista completa, como antes, para no romper clientes existentes).
+    """
+    params = request.query_params
+    if 'cursor' in params:
+        paginator = StandardCursorPagination()
+        if cursor_ordering:
+            paginator.ordering = cursor_ordering
+        return paginator
+    if 'page' in params or 'page_size' in params:
+        return StandardPagination()
+    return None
+
+
+class OptionalPaginationMixin:
+    """Paginación opt-in en `list` (ver optional_paginator); sin parámetros se mantiene la lista completa."""
+
+    def get_cursor_ordering(self):
+        return '-pk'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = optional_paginator(self.request, self.get_cursor_ordering()) if self.action == 'list' else None
+        return self._paginator
+
+    def paginate_queryset(self, queryset):
+        if self.paginator is not None and not queryset.ordered:
+            queryset = queryset.order_by('pk')  # páginas estables
+        return super().paginate_queryset(queryset)
@@ -0,0 +1,95 @@
+"""
+Agregados de calificación (promedio, total, histograma) de hoteles, lugares y paquetes.
+
+Cada alta, edición, ocultamiento o borrado de una Review aplica un delta sobre la fila del
+destino (señales en core.signals), con la fila bloqueada para que reviews concurrentes no
+pisen el conteo. Solo cuentan las reviews activas. `reconciliar()` (comando
+`reconciliar_calificaciones`) los recalcula desde Review y corrige cualquier desvío.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Hotel, LugarTuristico, Paquete, Review, histograma_vacio
+from . import package_summaries, response_cache
+
+# campo de Review -> (modelo destino, modelo del cache de respuestas)
+DESTINOS = {
+    'hotel': (Hotel, 'hotel'),
+    'lugar_turistico': (LugarTuristico, 'lugar'),
+    'paquete': (Paquete, 'paquete'),
+}
+CAMPOS = ['calificacion_promedio', 'calificacion_total', 'calificacion_suma', 'calificacion_histograma',
+          'fecha_actualizacion']
+
+
+def contribucion(review):
+    """(campo destino, pk, calificación) con la que la review cuenta, o None si no cuenta."""
+    if review is None or not review.estado:
+        return None
+    for campo in DESTINOS:
+        pk = getattr(review, f'{campo}_id')
+        if pk:
+            return campo, pk, review.calificacion
+    return None
+
+
+def _fijar(obj, total, suma, histograma):
+    obj.calificacion_total = total
+    obj.calificacion_suma = suma
+    obj.calificacion_histograma = histograma
+    obj.calificacion_promedio = round(suma / total, 2) if total else None
+
+
+def _aplicar(campo, pk, calificacion, signo):
+    model = DESTINOS[campo][0]
+    obj = model.objects.select_for_update().only(*CAMPOS).filter(pk=pk).first()
+    if obj is None:
+        return  # el destino se está borrando en cascada
+    histograma = list(obj.calificacion_histograma or histograma_vacio())
+    histograma[calificacion - Review.MIN_RATING] += signo
+    _fijar(obj, obj.calificacion_total + signo, obj.calificacion_suma + signo * calificacion, histograma)
+    obj.save(update_fields=CAMPOS)  # post_save invalida el cache del catálogo
+
+
+def review_cambiada(previa, actual):
+    """Aplica la diferencia entre cómo contaba la review antes (previa) y ahora (actual)."""
+    antes, despues = contribucion(previa), contribucion(actual)
+    if antes == despues:
+        return
+    with transaction.atomic():
+        if antes:
+            _aplicar(*antes, -1)
+        if despues:
+            _aplicar(*despues, 1)
+
+
+def reconciliar(dry_run=False):
+    """Recalcula los agregados desde Review; devuelve {campo: filas corregidas}."""
+    corregidas = {}
+    for campo, (model, cache_model) in DESTINOS.items():
+        esperado = defaultdict(histograma_vacio)
+        filas = (Review.objects.filter(estado=True, **{f'{campo}__isnull': False}).order_by()
+                 .values_list(campo, 'calificacion').annotate(n=Count('pk')))
+        for pk, calificacion, n in filas:
+            esperado[pk][calificacion - Review.MIN_RATING] = n
+
+        cambios = []
+        for obj in model.objects.only(*CAMPOS).iterator(chunk_size=2000):
+            histograma = esperado.get(obj.pk, histograma_vacio())
+            total = sum(histograma)
+            suma = sum(n * (i + Review.MIN_RATING) for i, n in enumerate(histograma))
+            if (obj.calificacion_total, obj.calificacion_suma, list(obj.calificacion_histograma or histograma_vacio())) \
+                    != (total, suma, histograma):
+                _fijar(obj, total, suma, histograma)
+                obj.fecha_actualizacion = timezone.now()
+                cambios.append(obj)
+        if cambios and not dry_run:
+            model.objects.bulk_update(cambios, CAMPOS, batch_size=1000)
+            response_cache.bump(cache_model)  # bulk_update no dispara señales
+            if campo == 'hotel':
+                package_summaries.refresh_hoteles([obj.pk for obj in cambios])
+        corregidas[campo] = len(cambios)
+    return corregidas
@@ -0,0 +1,273 @@
+"""
+Cache de respuestas públicas del catálogo (hoteles, lugares, paquetes, habitaciones).
+
+Las claves incluyen acción, pk, query params y el token de versión de cada modelo del que
+depende la respuesta (un paquete serializa su hotel y su lugar). Las escrituras cambian el
+token (señales en core.signals), así que las entradas viejas simplemente dejan de leerse.
+
+Por defecto las entradas viven en un LRU en memoria del proceso (CATALOG_CACHE_SIZE, con TTL
+CATALOG_CACHE_TTL como cota de frescura); con CATALOG_CACHE_ALIAS se usa un backend de cache de
+Django compartido (p. ej. Redis). Los tokens de versión van siempre al cache 'compartido', para
+que un bump desde un comando de gestión o desde otro worker invalide en todos los procesos; cada
+proceso recuerda los que leyó durante VERSION_MEMO_SECONDS (y los que escribe él mismo), así un
+acierto no consulta el cache compartido (una tabla de la BD sin Redis). Lo que cambie otro
+proceso se ve a lo sumo ese intervalo después.
+
+Last-Modified tiene resolución de segundos: se redondea hacia arriba y solo se envía cuando ese
+segundo ya pasó, así una escritura posterior siempre queda en un segundo más nuevo que el que
+vio el cliente y If-Modified-Since no puede devolver un 304 desactualizado.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.response import Response
+
+CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', '512'))
+CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', '300'))
+CACHE_ALIAS = os.environ.get('CATALOG_CACHE_ALIAS', '')
+VERSION_ALIAS = 'compartido'
+VERSION_MEMO_SECONDS = float(os.environ.get('CATALOG_VERSION_MEMO', '1'))
+
+# Modelos cuyas escrituras invalidan las respuestas de cada scope.
+DEPENDENCIAS = {
+    'hotel': ('hotel',),
+    'lugar': ('lugar',),
+    'paquete': ('paquete', 'hotel', 'lugar'),
+    'habitacion': ('habitacion', 'hotel'),
+}
+
+
+class LRUCache:
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _DjangoCache:
+    def __init__(self, alias, ttl=CACHE_TTL):
+        self._cache = caches[alias]
+        self.ttl = ttl
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value, self.ttl)
+
+
+_store = None
+_stats = {}
+_stats_lock = threading.Lock()
+_tokens = {}  # clave -> (vence, token): tokens de versión leídos o escritos por este proceso
+_tokens_lock = threading.Lock()
+
+
+def store():
+    global _store
+    if _store is None:
+        _store = _DjangoCache(CACHE_ALIAS) if CACHE_ALIAS else LRUCache()
+    return _store
+
+
+def _version_key(model):
+    return f"catalogo:{model}:version"
+
+
+def _new_token():
+    # "<epoch>-<aleatorio>": el prefijo sirve además como Last-Modified de la colección.
+    return f"{time.time():.6f}-{uuid.uuid4().hex[:12]}"
+
+
+def _remember(tokens):
+    vence = time.monotonic() + VERSION_MEMO_SECONDS
+    with _tokens_lock:
+        _tokens.update((key, (vence, token)) for key, token in tokens.items())
+
+
+def versions(models):
+    """Tokens de varios modelos: los recordados por el proceso y, para el resto, una lectura del cache compartido."""
+    keys = [_version_key(m) for m in models]
+    ahora = time.monotonic()
+    with _tokens_lock:
+        tokens = {key: _tokens[key][1] for key in keys if key in _tokens and _tokens[key][0] > ahora}
+    missing = [key for key in keys if key not in tokens]
+    if missing:
+        cache = caches[VERSION_ALIAS]
+        found = cache.get_many(missing)
+        for key in missing:
+            token = found.get(key)
+            if token is None:
+                token = _new_token()
+                if not cache.add(key, token, None):
+                    token = cache.get(key) or token
+            tokens[key] = token
+        _remember({key: tokens[key] for key in missing})
+    return [tokens[key] for key in keys]
+
+
+def version(model):
+    return versions([model])[0]
+
+
+def bump(*models):
+    tokens = {_version_key(m): _new_token() for m in models}
+    caches[VERSION_ALIAS].set_many(tokens, None)
+    _remember(tokens)
+
+
+def cache_key(prefix, request, models, *parts):
+    """
+    (clave, tokens) para una respuesta: prefijo, partes fijas, query params ordenados y los tokens
+    de versión de `models`. Las vistas cacheadas del catálogo arman así sus claves.
+    """
+    tokens = versions(models)
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.lists()))
+    return ":".join([prefix, *(str(p) for p in parts), params, *tokens]), tokens
+
+
+def cached_data(scope, key, build):
+    """
+    (datos, acierto): los de `key` en el store o los que arma build(), que se guardan salvo que
+    sea None (nada cacheable); registra las stats.
+    """
+    data = store().get(key)
+    if data is not None:
+        _record(scope, True)
+        return data, True
+    t0 = time.perf_counter()
+    data = build()
+    if data is not None:
+        store().set(key, data)
+    _record(scope, False, (time.perf_counter() - t0) * 1000)
+    return data, False
+
+
+def token_time(token):
+    try:
+        return float(token.split('-', 1)[0])
+    except (AttributeError, ValueError):
+        return None
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def not_modified(request, etag, last_modified=None):
+    """True si los validadores del cliente coinciden (If-None-Match tiene prioridad sobre If-Modified-Since)."""
+    inm = request.headers.get('If-None-Match')
+    if inm is not None:
+        tags = [t.strip() for t in inm.split(',')]
+        return '*' in tags or etag in tags or f"W/{etag}" in tags
+    ims = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return ims is not None and last_modified is not None and math.ceil(last_modified) <= ims
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None and math.ceil(last_modified) < time.time():
+        response['Last-Modified'] = http_date(math.ceil(last_modified))
+    response['Cache-Control'] = 'no-cache'
+    response['Vary'] = 'Authorization'
+    return response
+
+
+def _record(scope, hit, elapsed_ms=0.0):
+    with _stats_lock:
+        st = _stats.setdefault(scope, {"hits": 0, "misses": 0, "rebuild_ms_total": 0.0, "rebuild_ms_max": 0.0})
+        if hit:
+            st["hits"] += 1
+        else:
+            st["misses"] += 1
+            st["rebuild_ms_total"] += elapsed_ms
+            st["rebuild_ms_max"] = max(st["rebuild_ms_max"], elapsed_ms)
+
+
+def stats():
+    with _stats_lock:
+        out = {}
+        for scope, st in _stats.items():
+            total = st["hits"] + st["misses"]
+            out[scope] = {
+                "hits": st["hits"],
+                "misses": st["misses"],
+                "hit_ratio": round(st["hits"] / total, 4) if total else None,
+                "rebuild_ms_avg": round(st["rebuild_ms_total"] / st["misses"], 2) if st["misses"] else None,
+                "rebuild_ms_max": round(st["rebuild_ms_max"], 2),
+            }
+    backend = store()
+    return {"backend": CACHE_ALIAS or "lru", "entradas": len(backend) if isinstance(backend, LRUCache) else None,
+            "scopes": out}
+
+
+class CachedCatalogMixin:
+    """
+    list/retrieve con GET condicional (ETag/Last-Modified) y, para usuarios que no son
+    superadmin, servidos desde el cache de respuestas.
+    """
+    cache_scope = None
+
+    def _cached(self, request, action, build, pk=None):
+        key, tokens = cache_key('catalogo', request, DEPENDENCIAS[self.cache_scope], self.cache_scope, action, pk or '')
+        superadmin = getattr(request.user, "rol", None) == "superadmin"
+        # ETag/Last-Modified salen de los tokens de versión: validar no serializa ni consulta el catálogo.
+        etag = make_etag(key, "superadmin" if superadmin else "publico")
+        last_modified = max(filter(None, (token_time(t) for t in tokens)), default=None)
+        if not_modified(request, etag, last_modified):
+            return set_validators(Response(status=304), etag, last_modified)
+
+        if superadmin:
+            # Los superadmin ven también los inactivos, así que no comparten el cache público.
+            response = build()
+        else:
+            built = []
+
+            def _build():
+                built.append(build())
+                return built[0].data if built[0].status_code == 200 else None
+
+            data, hit = cached_data(self.cache_scope, key, _build)
+            response = Response(data) if hit else built[0]
+            response["X-Cache"] = "HIT" if hit else "MISS"
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, 'list', lambda: super(CachedCatalogMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, 'retrieve',
+                            lambda: super(CachedCatalogMixin, self).retrieve(request, *args, **kwargs),
+                            pk=kwargs.get(self.lookup_url_kwarg or self.lookup_field))
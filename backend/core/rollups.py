@@ -0,0 +1,98 @@
+"""
+Rollups diarios por hotel (OcupacionDiaria) para las estadísticas de reservas.
+
+Las señales de Reserva y Pago llaman a `refresh(hotel, desde, hasta)` al confirmar,
+que recalcula solo los días tocados de ese hotel. Los refrescos de un mismo hotel se
+serializan con un bloqueo sobre su fila y leen las reservas ya con el bloqueo tomado,
+así dos confirmaciones simultáneas no chocan en la restricción única ni escriben datos viejos. `rebuild_all()` (comando
+`reconstruir_estadisticas`) los regenera completos con una pasada sobre Reserva.
+
+Convenciones: `noches` cuenta cada día entre fecha_reserva y fecha_caducidad (inclusive)
+de las reservas activas; reservas, cancelaciones e ingresos se imputan al día de
+check-in. Los ingresos son Pago.monto de pagos completados, repartido entre las
+reservas que comparten el pago.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Hotel, Reserva, Pago, OcupacionDiaria
+
+METRICS = ('noches', 'reservas', 'cancelaciones', 'ingresos')
+
+
+def _days(inicio, fin):
+    d = inicio
+    while d <= fin:
+        yield d
+        d += timedelta(days=1)
+
+
+def _pago_shares(pago_ids):
+    """id_pago -> monto por reserva, solo para pagos completados."""
+    if not pago_ids:
+        return {}
+    montos = dict(Pago.objects.filter(pk__in=pago_ids, estado=Pago.Estado.COMPLETADO).values_list('pk', 'monto'))
+    counts = dict(Reserva.objects.filter(id_pago__in=list(montos)).order_by()
+                  .values('id_pago').annotate(n=Count('pk')).values_list('id_pago', 'n'))
+    return {pk: monto / counts[pk] for pk, monto in montos.items() if counts.get(pk)}
+
+
+def _accumulate(rows, desde=None, hasta=None):
+    """rows: (hotel, inicio, fin, estado, id_pago) -> {(hotel, día): {métrica: valor}}."""
+    rows = list(rows)
+    shares = _pago_shares({r[4] for r in rows if r[4]})
+    acc = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    for hotel, inicio, fin, activa, pago in rows:
+        in_range = (desde is None or inicio >= desde) and (hasta is None or inicio <= hasta)
+        if not activa:
+            if in_range:
+                acc[(hotel, inicio)]['cancelaciones'] += 1
+            continue
+        lo = max(inicio, desde) if desde else inicio
+        hi = min(fin, hasta) if hasta else fin
+        for d in _days(lo, hi):
+            acc[(hotel, d)]['noches'] += 1
+        if in_range:
+            acc[(hotel, inicio)]['reservas'] += 1
+            acc[(hotel, inicio)]['ingresos'] += shares.get(pago, 0)
+    return acc
+
+
+def _rows(acc):
+    return [OcupacionDiaria(hotel_id=hotel, fecha=fecha, **m) for (hotel, fecha), m in acc.items() if any(m.values())]
+
+
+def refresh(hotel_id, desde, hasta):
+    """Recalcula los días [desde, hasta] de un hotel."""
+    with transaction.atomic():
+        list(Hotel.objects.select_for_update().filter(pk=hotel_id).values_list('pk'))
+        rows = (Reserva.objects
+                .filter(codigo_hotel_id=hotel_id, fecha_reserva__lte=hasta, fecha_caducidad__gte=desde)
+                .values_list('codigo_hotel_id', 'fecha_reserva', 'fecha_caducidad', 'estado', 'id_pago_id'))
+        acc = _accumulate(rows, desde, hasta)
+        OcupacionDiaria.objects.filter(hotel_id=hotel_id, fecha__range=(desde, hasta)).delete()
+        OcupacionDiaria.objects.bulk_create(_rows(acc))
+
+
+def refresh_reservas(reservas):
+    """Refresca los rangos de un conjunto de reservas, agrupando por hotel."""
+    rangos = {}
+    for r in reservas:
+        lo, hi = rangos.get(r.codigo_hotel_id, (r.fecha_reserva, r.fecha_caducidad))
+        rangos[r.codigo_hotel_id] = (min(lo, r.fecha_reserva), max(hi, r.fecha_caducidad))
+    for hotel_id, (lo, hi) in rangos.items():
+        refresh(hotel_id, lo, hi)
+
+
+def rebuild_all(batch_size=5000):
+    rows = (Reserva.objects
+            .values_list('codigo_hotel_id', 'fecha_reserva', 'fecha_caducidad', 'estado', 'id_pago_id')
+            .iterator(chunk_size=batch_size))
+    objs = _rows(_accumulate(rows))
+    with transaction.atomic():
+        OcupacionDiaria.objects.all().delete()
+        OcupacionDiaria.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
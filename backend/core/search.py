@@ -0,0 +1,168 @@
+"""
+Búsqueda facetada del catálogo (hoteles, lugares, paquetes).
+
+Cada entidad arma su queryset base (solo activos) y un diccionario de filtros con nombre.
+Los resultados aplican todos los filtros; cada faceta se cuenta aplicando todos menos el
+suyo, así el cliente ve cuántos resultados obtendría al cambiar esa selección.
+Los filtros son igualdades/rangos sobre columnas con índices parciales (WHERE estado),
+de modo que el plan sigue usando índices aunque el catálogo crezca.
+
+`texto()` y `sugerir()` hacen la búsqueda de texto libre sin acentos sobre hoteles y lugares:
+tsvector ('spanish') en la columna generada `busqueda` con índice GIN, más similitud de
+trigramas sobre el nombre normalizado para tolerar variantes ("tiahuanaco", "uyuni").
+"""
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import Count, Exists, F, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Floor, Lower
+
+from .models import Hotel, LugarTuristico, Paquete, Habitacion, Unaccent
+
+
+def _lista(value):
+    return [v.strip() for v in (value or '').split(',') if v.strip()]
+
+
+def _rango(params, campo):
+    """Q del rango precio_min/precio_max sobre `campo`; ValueError si no son numéricos."""
+    q = Q()
+    if params.get('precio_min'):
+        q &= Q(**{f'{campo}__gte': float(params['precio_min'])})
+    if params.get('precio_max'):
+        q &= Q(**{f'{campo}__lte': float(params['precio_max'])})
+    return q
+
+
+def _hoteles(params):
+    libres = Habitacion.objects.filter(codigo_hotel=OuterRef('pk'), disponible=True).order_by().values('codigo_hotel')
+    qs = (Hotel.objects.filter(estado=True).defer('busqueda')
+          .annotate(precio_desde=Subquery(libres.annotate(m=Min('precio')).values('m'))))
+    filtros = {}
+    if params.get('departamento'):
+        filtros['departamento'] = Q(departamento__in=_lista(params['departamento']))
+    if params.get('calificacion_min'):
+        filtros['calificacion'] = Q(calificacion__gte=float(params['calificacion_min']))
+    precio = _rango(params, 'precio')
+    if precio:
+        # Hay al menos una habitación disponible dentro del rango.
+        filtros['precio'] = Exists(Habitacion.objects.filter(precio, codigo_hotel=OuterRef('pk'), disponible=True))
+    return qs, filtros
+
+
+def _lugares(params):
+    filtros = {}
+    if params.get('departamento'):
+        filtros['departamento'] = Q(departamento__in=_lista(params['departamento']))
+    if params.get('tipo'):
+        filtros['tipo'] = Q(tipo__in=_lista(params['tipo']))
+    return LugarTuristico.objects.filter(estado=True).defer('busqueda'), filtros
+
+
+def _paquetes(params):
+    filtros = {}
+    if params.get('departamento'):
+        filtros['departamento'] = Q(id_lugar__departamento__in=_lista(params['departamento']))
+    if params.get('tipo'):
+        filtros['tipo'] = Q(tipo__in=_lista(params['tipo']))
+    if params.get('hotel'):
+        filtros['hotel'] = Q(id_hotel_id=int(params['hotel']))
+    if params.get('lugar'):
+        filtros['lugar'] = Q(id_lugar_id=int(params['lugar']))
+    precio = _rango(params, 'precio')
+    if precio:
+        filtros['precio'] = precio
+    return (Paquete.objects.filter(estado=True).select_related('id_hotel', 'id_lugar', 'resumen')
+            .defer('id_hotel__busqueda', 'id_lugar__busqueda')), filtros
+
+
+# Promedio de las reviews (índices *_activo_valoracion); a igual promedio, el que tiene más reviews.
+_VALORACION = (F('calificacion_promedio').desc(nulls_last=True), '-calificacion_total')
+
+# entidad -> (constructor, facetas {nombre: expresión}, órdenes, modelos de los que depende)
+ENTIDADES = {
+    'hoteles': (_hoteles, {'departamento': F('departamento'), 'calificacion': Floor('calificacion')},
+                {'calificacion': ('-calificacion', 'id_hotel'), 'valoracion': _VALORACION + ('id_hotel',),
+                 'precio': (F('precio_desde').asc(nulls_last=True), 'id_hotel'), 'nombre': ('nombre', 'id_hotel')},
+                ('hotel', 'habitacion')),
+    'lugares': (_lugares, {'departamento': F('departamento'), 'tipo': F('tipo')},
+                {'nombre': ('nombre', 'id_lugar'), 'valoracion': _VALORACION + ('id_lugar',)},
+                ('lugar',)),
+    'paquetes': (_paquetes, {'departamento': F('id_lugar__departamento'), 'tipo': F('tipo')},
+                 {'precio': ('precio', 'id_paquete'), 'nombre': ('nombre', 'id_paquete'),
+                  'valoracion': _VALORACION + ('id_paquete',)},
+                 ('paquete', 'hotel', 'lugar')),
+}
+
+
+def buscar(entidad, params):
+    """(queryset ordenado de resultados, facetas); KeyError/ValueError si los parámetros no son válidos."""
+    build, facetas, ordenes, _ = ENTIDADES[entidad]
+    orden = params.get('orden') or next(iter(ordenes))
+    if orden not in ordenes:
+        raise ValueError(f"orden inválido. Opciones: {', '.join(ordenes)}")
+    base, filtros = build(params)
+    resultados = base.filter(*filtros.values()).order_by(*ordenes[orden])
+
+    conteos = {}
+    for nombre, expr in facetas.items():
+        qs = base.filter(*[f for k, f in filtros.items() if k != nombre])
+        filas = (qs.order_by().annotate(valor=expr).values('valor')
+                 .annotate(total=Count('pk')).order_by('valor').values_list('valor', 'total'))
+        conteos[nombre] = [{'valor': valor, 'total': total} for valor, total in filas]
+    return resultados, conteos
+
+
+# entidad -> (modelo, pk, columna de imagen)
+TEXTO = {
+    'hoteles': (Hotel, 'id_hotel', 'url_imagen_hotel'),
+    'lugares': (LugarTuristico, 'id_lugar', 'url_image_lugar_turistico'),
+}
+COLUMNAS = ('entidad', 'id', 'nombre', 'ubicacion', 'departamento', 'imagen', 'relevancia')
+
+
+def normalizar(q):
+    """Minúsculas y sin acentos, igual que immutable_unaccent(lower(...)) en la BD."""
+    q = unicodedata.normalize('NFKD', (q or '').strip().lower())
+    return ''.join(c for c in q if not unicodedata.combining(c))
+
+
+def _nombre_norm():
+    # Misma expresión que los índices *_nombre_trgm, para que el planner los use.
+    return Unaccent(Lower('nombre'))
+
+
+def _texto_qs(entidad, q):
+    model, pk, imagen = TEXTO[entidad]
+    query = SearchQuery(q, config='spanish', search_type='websearch')
+    return (model.objects.filter(estado=True)
+            .annotate(nombre_norm=_nombre_norm())
+            .filter(Q(busqueda=query) | Q(nombre_norm__trigram_similar=q))
+            .annotate(entidad=Value(entidad), id=F(pk), imagen=F(imagen),
+                      relevancia=SearchRank(F('busqueda'), query) + TrigramSimilarity(_nombre_norm(), q))
+            .values(*COLUMNAS))
+
+
+def texto(q, entidades=tuple(TEXTO)):
+    """Resultados de hoteles y lugares ordenados por relevancia (queryset de dicts, paginable)."""
+    q = normalizar(q)
+    qs = [_texto_qs(e, q) for e in entidades]
+    union = qs[0].union(*qs[1:], all=True) if len(qs) > 1 else qs[0]
+    return union.order_by('-relevancia', 'entidad', 'id')
+
+
+def sugerir(q, limite=8, entidades=tuple(TEXTO)):
+    """Autocompletado: nombres que contienen el texto (índice de trigramas), los más parecidos primero."""
+    q = normalizar(q)
+    filas = []
+    for entidad in entidades:
+        model, pk, _ = TEXTO[entidad]
+        filas += [(sim, entidad, ident, nombre) for ident, nombre, sim in
+                  (model.objects.filter(estado=True)
+                   .annotate(nombre_norm=_nombre_norm())
+                   .filter(nombre_norm__contains=q)
+                   .annotate(sim=TrigramSimilarity(_nombre_norm(), q))
+                   .order_by('-sim', 'nombre')
+                   .values_list(pk, 'nombre', 'sim')[:limite])]
+    filas.sort(key=lambda f: -f[0])
+    return [{'entidad': entidad, 'id': ident, 'nombre': nombre} for _, entidad, ident, nombre in filas[:limite]]
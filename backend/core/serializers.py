@@ -1,7 +1,11 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from . import signals
 from .models import (
     Usuario, Hotel, LugarTuristico, Pago, Habitacion, Reserva, Paquete,
-    Sugerencias, Notification, ChatSession, Review
+    Sugerencias, Notification, ChatSession, Review, ResumenPaquete
 )
 
 class UsuarioSerializer(serializers.ModelSerializer):
@@ -48,16 +52,22 @@ class RegistroSerializer(serializers.ModelSerializer):
         return Usuario.objects.create_user(**validated_data)
 
 
+# Mantenidos por core.ratings a partir de las reviews; no se escriben por la API.
+CALIFICACION_AGREGADOS = ('calificacion_promedio', 'calificacion_total', 'calificacion_histograma')
+
+
 class HotelSerializer(serializers.ModelSerializer):
     class Meta:
         model = Hotel
-        fields = '__all__'
+        exclude = ('busqueda', 'celda', 'calificacion_suma')
+        read_only_fields = CALIFICACION_AGREGADOS
 
 
 class LugarTuristicoSerializer(serializers.ModelSerializer):
     class Meta:
         model = LugarTuristico
-        fields = '__all__'
+        exclude = ('busqueda', 'celda', 'calificacion_suma')
+        read_only_fields = CALIFICACION_AGREGADOS
 
 
 class PagoSerializer(serializers.ModelSerializer):
@@ -86,11 +96,17 @@ class HabitacionSerializer(serializers.ModelSerializer):
         fields = ['num', 'caracteristicas', 'precio', 'codigo_hotel', 'hotel', 'disponible', 'fecha_creacion', 'cant_huespedes']
 
 
+class HabitacionDisponibleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Habitacion
+        fields = ['num', 'caracteristicas', 'precio', 'cant_huespedes']
+
+
 class ReservaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reserva
         fields = '__all__'
-        read_only_fields = ('id_reserva', 'fecha_creacion', 'estado', 'id_usuario')
+        read_only_fields = ('id_reserva', 'fecha_creacion', 'estado', 'id_usuario', 'archivada')
 
     def validate(self, attrs):
         habitacion = attrs.get('num_habitacion')
@@ -107,33 +123,150 @@ class ReservaSerializer(serializers.ModelSerializer):
 
         if habitacion and fecha_reserva and fecha_caducidad:
             overlapping = Reserva.objects.filter(
+                Reserva.VIGENTE,
                 num_habitacion=habitacion,
-                estado=True,
                 fecha_reserva__lte=fecha_caducidad,
                 fecha_caducidad__gte=fecha_reserva
             )
             if self.instance:
                 overlapping = overlapping.exclude(pk=self.instance.pk)
             if overlapping.exists():
-                raise serializers.ValidationError('La habitación ya está reservada en el rango de fechas solicitado.')
+                raise serializers.ValidationError(Reserva.OVERLAP_MESSAGE)
 
         return attrs
 
+    def _save_checked(self, save, *args):
+        # La restricción de exclusión en la BD es la garantía final ante reservas concurrentes.
+        try:
+            with transaction.atomic():
+                return save(*args)
+        except IntegrityError as e:
+            if Reserva.is_overlap_violation(e):
+                raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [Reserva.OVERLAP_MESSAGE]})
+            raise
+
     def create(self, validated_data):
         from datetime import date
         if 'fecha_creacion' not in validated_data:
             validated_data['fecha_creacion'] = date.today()
-        return super().create(validated_data)
+        return self._save_checked(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        from datetime import date
+        # Si las nuevas fechas vuelven a estar vigentes, la reserva deja de estar archivada.
+        if instance.archivada and validated_data.get('fecha_caducidad', instance.fecha_caducidad) >= date.today():
+            validated_data['archivada'] = False
+        return self._save_checked(super().update, instance, validated_data)
+
+
+class ReservaLoteItemSerializer(serializers.Serializer):
+    num_habitacion = serializers.IntegerField()
+    fecha_reserva = serializers.DateField()
+    fecha_caducidad = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['fecha_caducidad'] < attrs['fecha_reserva']:
+            raise serializers.ValidationError('La fecha_caducidad no puede ser anterior a fecha_reserva.')
+        return attrs
+
+
+class ReservaLoteSerializer(serializers.Serializer):
+    """
+    Varias reservas (p. ej. un grupo o un paquete) validadas y creadas juntas: todas o ninguna.
+    Habitaciones y solapamientos se comprueban con una consulta cada uno, sin importar el tamaño del lote.
+    """
+    MAX_ITEMS = 50
+
+    id_paquete = serializers.PrimaryKeyRelatedField(
+        queryset=Paquete.objects.filter(estado=True), required=False, allow_null=True
+    )
+    reservas = ReservaLoteItemSerializer(many=True, allow_empty=False)
+
+    def validate_reservas(self, items):
+        if len(items) > self.MAX_ITEMS:
+            raise serializers.ValidationError(f'Máximo {self.MAX_ITEMS} reservas por lote.')
+        return items
+
+    def validate(self, attrs):
+        items = attrs['reservas']
+        paquete = attrs.get('id_paquete')
+        nums = {it['num_habitacion'] for it in items}
+        habitaciones = Habitacion.objects.in_bulk(nums)
+        errores = []
+        for i, it in enumerate(items):
+            hab = habitaciones.get(it['num_habitacion'])
+            if hab is None:
+                errores.append(f"Ítem {i}: la habitación {it['num_habitacion']} no existe.")
+            elif paquete and paquete.id_hotel_id and hab.codigo_hotel_id != paquete.id_hotel_id:
+                errores.append(f"Ítem {i}: la habitación {hab.num} no pertenece al hotel del paquete.")
+        # Solapamientos dentro del mismo lote
+        for i, a in enumerate(items):
+            for j in range(i):
+                b = items[j]
+                if (a['num_habitacion'] == b['num_habitacion']
+                        and a['fecha_reserva'] <= b['fecha_caducidad'] and b['fecha_reserva'] <= a['fecha_caducidad']):
+                    errores.append(f"Ítem {i}: se solapa con el ítem {j} del mismo lote.")
+        if errores:
+            raise serializers.ValidationError({'reservas': errores})
+
+        # Solapamientos con reservas existentes: una sola consulta para todo el lote.
+        rango = Q()
+        for it in items:
+            rango |= Q(num_habitacion_id=it['num_habitacion'],
+                       fecha_reserva__lte=it['fecha_caducidad'], fecha_caducidad__gte=it['fecha_reserva'])
+        ocupadas = list(Reserva.objects.filter(rango, Reserva.VIGENTE)
+                        .values_list('num_habitacion_id', 'fecha_reserva', 'fecha_caducidad'))
+        for i, it in enumerate(items):
+            if any(num == it['num_habitacion'] and ini <= it['fecha_caducidad'] and it['fecha_reserva'] <= fin
+                   for num, ini, fin in ocupadas):
+                errores.append(f"Ítem {i}: {Reserva.OVERLAP_MESSAGE}")
+        if errores:
+            raise serializers.ValidationError({'reservas': errores})
+
+        attrs['habitaciones'] = habitaciones
+        return attrs
+
+    def create(self, validated_data):
+        from datetime import date
+        habitaciones = validated_data['habitaciones']
+        paquete = validated_data.get('id_paquete')
+        objs = [Reserva(
+            fecha_reserva=it['fecha_reserva'],
+            fecha_caducidad=it['fecha_caducidad'],
+            num_habitacion=habitaciones[it['num_habitacion']],
+            codigo_hotel_id=habitaciones[it['num_habitacion']].codigo_hotel_id,
+            id_usuario=validated_data['id_usuario'],
+            id_paquete=paquete,
+            fecha_creacion=date.today(),
+        ) for it in validated_data['reservas']]
+        try:
+            with transaction.atomic():
+                Reserva.objects.bulk_create(objs)
+        except IntegrityError as e:
+            if Reserva.is_overlap_violation(e):
+                raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [Reserva.OVERLAP_MESSAGE]})
+            raise
+        # bulk_create no dispara post_save: bitmaps de ocupación y rollups se actualizan aquí.
+        transaction.on_commit(lambda: signals.reservas_creadas(objs), robust=True)
+        return objs
+
+
+class ResumenPaqueteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ResumenPaquete
+        exclude = ('paquete',)
 
 
 class PaqueteSerializer(serializers.ModelSerializer):
     hotel = HotelSerializer(source='id_hotel', read_only=True)
     lugar = LugarTuristicoSerializer(source='id_lugar', read_only=True)
+    # Precalculado (core.package_summaries); null hasta el primer refresco.
+    resumen = ResumenPaqueteSerializer(read_only=True)
 
     class Meta:
         model = Paquete
-        fields = '__all__'
-        read_only_fields = ('id_paquete', 'fecha_creacion')
+        exclude = ('calificacion_suma',)
+        read_only_fields = ('id_paquete', 'fecha_creacion') + CALIFICACION_AGREGADOS
 
 
 class SugerenciasSerializer(serializers.ModelSerializer):
@@ -190,8 +323,15 @@ class ChatSessionPatchSerializer(serializers.ModelSerializer):
         }
 
 
+class ReviewAutorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Usuario
+        fields = ['id', 'nombre', 'pais', 'avatar_url']
+
+
 class ReviewSerializer(serializers.ModelSerializer):
-    usuario = UsuarioSerializer(read_only=True)
+    # Las reviews son públicas: del autor solo se expone lo que se muestra junto al comentario.
+    usuario = ReviewAutorSerializer(read_only=True)
     usuario_id = serializers.IntegerField(write_only=True, required=False)
 
     class Meta:
@@ -203,11 +343,19 @@ class ReviewSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id_review', 'fecha_creacion']
 
+    def validate_estado(self, value):
+        # El autor oculta con DELETE; mostrar u ocultar por PATCH (p. ej. deshacer una moderación) es del superadmin.
+        user = getattr(self.context.get('request'), 'user', None)
+        actual = self.instance.estado if self.instance is not None else True
+        if value != actual and getattr(user, 'rol', None) != 'superadmin':
+            raise serializers.ValidationError('Solo un superadmin puede cambiar el estado de una review.')
+        return value
+
     def validate(self, data):
+        # En updates parciales el destino que no viene en la request es el que ya tenía la review.
         targets = sum([
-            data.get('hotel') is not None,
-            data.get('lugar_turistico') is not None,
-            data.get('paquete') is not None
+            data.get(campo, getattr(self.instance, campo, None)) is not None
+            for campo in ('hotel', 'lugar_turistico', 'paquete')
         ])
         if targets != 1:
             raise serializers.ValidationError(
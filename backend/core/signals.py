@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Reserva, Habitacion, Pago, Hotel, LugarTuristico, Paquete, Review
+from . import occupancy, package_summaries, ratings, response_cache, rollups
+
+_PREVIA_FIELDS = {'fecha_reserva', 'fecha_caducidad', 'codigo_hotel', 'codigo_hotel_id',
+                  'num_habitacion', 'num_habitacion_id'}
+_REVIEW_FIELDS = {'calificacion', 'estado', 'hotel', 'lugar_turistico', 'paquete',
+                  'hotel_id', 'lugar_turistico_id', 'paquete_id'}
+
+
+def _reserva_changed(reserva, previa=None):
+    # Siempre desde la BD ya confirmada: parchear la entrada cacheada perdería altas concurrentes.
+    occupancy.rebuild(reserva.num_habitacion_id)
+    occupancy.bump_hotel(reserva.codigo_hotel_id)
+    if previa is not None and previa.num_habitacion_id != reserva.num_habitacion_id:
+        # Cambio de habitación: la anterior queda libre en esas fechas.
+        occupancy.rebuild(previa.num_habitacion_id)
+        occupancy.bump_hotel(previa.codigo_hotel_id)
+    rollups.refresh_reservas([r for r in (reserva, previa) if r is not None])
+    package_summaries.programar({r.codigo_hotel_id for r in (reserva, previa) if r is not None})
+
+
+def reservas_creadas(reservas):
+    """Equivalente a post_save para reservas creadas con bulk_create (que no dispara señales)."""
+    occupancy.apply_created(reservas)
+    rollups.refresh_reservas(reservas)
+    package_summaries.programar({r.codigo_hotel_id for r in reservas})
+
+
+@receiver(pre_save, sender=Reserva)
+def reserva_previa(sender, instance, update_fields=None, **kwargs):
+    # Fechas, hotel o habitación anteriores, para refrescar también lo que la reserva deja libre.
+    instance._previa = None
+    if instance.pk and (update_fields is None or _PREVIA_FIELDS & set(update_fields)):
+        instance._previa = (Reserva.objects.filter(pk=instance.pk)
+                            .only('codigo_hotel_id', 'num_habitacion_id', 'fecha_reserva', 'fecha_caducidad').first())
+
+
+@receiver(post_save, sender=Reserva)
+def reserva_guardada(sender, instance, created, **kwargs):
+    # Se aplica al confirmar: una transacción revertida no debe marcar días en el bitmap.
+    previa = getattr(instance, '_previa', None)
+    # robust: un fallo al refrescar cachés/estadísticas se registra, no convierte en 500 algo ya confirmado.
+    transaction.on_commit(lambda: _reserva_changed(instance, previa=previa), robust=True)
+
+
+@receiver(post_delete, sender=Reserva)
+def reserva_eliminada(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _reserva_changed(instance), robust=True)
+
+
+@receiver(post_save, sender=Pago)
+def pago_guardado(sender, instance, created, **kwargs):
+    if created:
+        return  # Un pago nuevo todavía no tiene reservas enlazadas.
+    transaction.on_commit(lambda: rollups.refresh_reservas(list(Reserva.objects.filter(id_pago=instance.pk))),
+                          robust=True)
+
+
+@receiver(post_save, sender=Habitacion)
+@receiver(post_delete, sender=Habitacion)
+def habitacion_cambiada(sender, instance, **kwargs):
+    # Precio o disponibilidad cambian el calendario del hotel y el resumen de sus paquetes.
+    def _aplicar():
+        occupancy.bump_hotel(instance.codigo_hotel_id)
+        package_summaries.programar([instance.codigo_hotel_id])
+    transaction.on_commit(_aplicar, robust=True)
+
+
+@receiver(post_save, sender=Hotel)
+def hotel_guardado(sender, instance, **kwargs):
+    # Incluye los agregados de reviews, que core.ratings guarda con save(update_fields).
+    transaction.on_commit(lambda: package_summaries.programar([instance.pk]), robust=True)
+
+
+@receiver(post_save, sender=Paquete)
+def paquete_guardado(sender, instance, **kwargs):
+    # Alta o cambio de hotel.
+    transaction.on_commit(lambda: package_summaries.refresh_paquetes([instance.pk]), robust=True)
+
+
+_CATALOGO = {Hotel: 'hotel', LugarTuristico: 'lugar', Paquete: 'paquete', Habitacion: 'habitacion'}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def catalogo_cambiado(sender, **kwargs):
+    # Alta, edición o baja lógica (destroy pone estado=False) invalidan las respuestas cacheadas del modelo.
+    model = _CATALOGO.get(sender)
+    if model:
+        transaction.on_commit(lambda: response_cache.bump(model), robust=True)
+
+
+@receiver(pre_save, sender=Review)
+def review_previa(sender, instance, update_fields=None, **kwargs):
+    instance._previa = None
+    if instance.pk and (update_fields is None or _REVIEW_FIELDS & set(update_fields)):
+        qs = Review.objects.filter(pk=instance.pk)
+        if transaction.get_connection().in_atomic_block:
+            qs = qs.select_for_update()  # un cambio concurrente espera y parte del estado ya aplicado
+        instance._previa = qs.only('calificacion', 'estado', 'hotel_id', 'lugar_turistico_id', 'paquete_id').first()
+    elif instance.pk:
+        instance._previa = instance  # no cambió nada que cuente para los agregados
+
+
+@receiver(post_save, sender=Review)
+def review_guardada(sender, instance, created, **kwargs):
+    # Sin on_commit: el delta va en la misma transacción que la review.
+    ratings.review_cambiada(getattr(instance, '_previa', None), instance)
+
+
+@receiver(post_delete, sender=Review)
+def review_eliminada(sender, instance, **kwargs):
+    ratings.review_cambiada(instance, None)
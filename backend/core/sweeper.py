@@ -0,0 +1,82 @@
+"""
+Barrido de datos caducados.
+
+- Reservas activas cuya fecha_caducidad ya pasó se marcan archivada=True (siguen
+  contando como realizadas para historial y estadísticas, pero salen de las consultas
+  de solapamiento/disponibilidad, que filtran por Reserva.VIGENTE y usan índices parciales).
+- Pagos en 'pendiente' con más de PAGO_PENDIENTE_DIAS días pasan a 'cancelado'.
+- Resúmenes de paquetes cuya próxima fecha libre ya pasó se recalculan (core.package_summaries).
+
+Se ejecuta con `manage.py barrer_caducados` (cron) o, si SWEEP_INTERVAL_MINUTES > 0,
+en un hilo periódico dentro del proceso ASGI.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from django.db import close_old_connections, transaction
+
+from .models import Reserva, Pago
+from . import package_summaries
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.environ.get('SWEEP_BATCH_SIZE', '1000'))
+PAGO_PENDIENTE_DIAS = int(os.environ.get('PAGO_PENDIENTE_DIAS', '2'))
+SWEEP_INTERVAL_MINUTES = float(os.environ.get('SWEEP_INTERVAL_MINUTES', '0'))
+
+
+def _in_batches(qs, pk_field, update, batch_size):
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(qs.select_for_update(skip_locked=True).values_list(pk_field, flat=True)[:batch_size])
+            if not ids:
+                return total
+            total += qs.model.objects.filter(**{f"{pk_field}__in": ids}).update(**update)
+
+
+def reservas_por_archivar(hoy=None):
+    return Reserva.objects.filter(Reserva.VIGENTE, fecha_caducidad__lt=hoy or date.today()).order_by('fecha_caducidad')
+
+
+def pagos_vencidos(hoy=None):
+    limite = (hoy or date.today()) - timedelta(days=PAGO_PENDIENTE_DIAS)
+    return Pago.objects.filter(estado=Pago.Estado.PENDIENTE, fecha_creacion__lt=limite).order_by('fecha_creacion')
+
+
+def sweep(batch_size=BATCH_SIZE, hoy=None):
+    """Archiva reservas caducadas, vence pagos pendientes y refresca resúmenes vencidos; devuelve los conteos."""
+    reservas = _in_batches(reservas_por_archivar(hoy), 'id_reserva', {'archivada': True}, batch_size)
+    pagos = _in_batches(pagos_vencidos(hoy), 'id_pago', {'estado': Pago.Estado.CANCELADO}, batch_size)
+    resumenes = package_summaries.refresh_vencidos(hoy)
+    if reservas or pagos or resumenes:
+        logger.info("Barrido de caducados: %s reservas archivadas, %s pagos vencidos, %s resúmenes de paquete",
+                    reservas, pagos, resumenes)
+    return {"reservas_archivadas": reservas, "pagos_vencidos": pagos, "resumenes_paquete": resumenes}
+
+
+_worker = None
+
+
+def _run(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            close_old_connections()
+            sweep()
+        except Exception as e:
+            logger.warning("Barrido de caducados falló: %s", e)
+        finally:
+            close_old_connections()
+
+
+def start_periodic(minutes=SWEEP_INTERVAL_MINUTES):
+    """Arranca el barrido periódico en un hilo daemon (no hace nada si minutes <= 0)."""
+    global _worker
+    if minutes <= 0 or (_worker and _worker.is_alive()):
+        return
+    _worker = threading.Thread(target=_run, args=(minutes * 60,), name="sweeper", daemon=True)
+    _worker.start()
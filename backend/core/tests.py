@@ -1 +1,979 @@
-from django.test import TestCase
+import asyncio
+import base64
+import importlib
+import json
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from llm import llm_client
+from llm.snapshot import Snapshot, build_snapshot, load_snapshot
+from rag.batching import MicroBatchEmbedder
+from rag.documents import build_documents
+from rag.evaluate import build_queries, evaluate
+from rag.retrieval import HashingEmbedding, HybridRetriever, KeywordRetriever, VectorRetriever
+
+from .models import (Usuario, Hotel, LugarTuristico, Habitacion, Paquete, Reserva, Review, Notification,
+                     NotificationOutbox, OcupacionDiaria, Pago, ResumenPaquete)
+from .serializers import ReservaSerializer
+from .views import CercanosView, ReviewViewSet
+from . import exports, knowledge_sync, occupancy, outbox, package_summaries, ratings, response_cache, rollups, sweeper
+
+
+def recordar_tokens(test):
+    """
+    Tokens de versión del cache de respuestas recordados por el proceso: vacíos al empezar y sin vencer
+    durante el test, así los conteos de consultas no dependen del reloj ni de lo que dejó otro test.
+    """
+    response_cache._tokens.clear()
+    test.addCleanup(response_cache._tokens.clear)
+    patcher = mock.patch.object(response_cache, 'VERSION_MEMO_SECONDS', 3600)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+
+class CatalogQueryCountTests(TestCase):
+    """Los listados del catálogo deben costar un número fijo de consultas, sin importar cuántas filas devuelvan."""
+
+    def setUp(self):
+        self.client = APIClient()
+        recordar_tokens(self)
+
+    def _seed(self, n):
+        hoteles = Hotel.objects.bulk_create([
+            Hotel(nombre=f'Hotel {i}', ubicacion='c', departamento='La Paz', calificacion=4) for i in range(n)
+        ])
+        lugares = LugarTuristico.objects.bulk_create([
+            LugarTuristico(nombre=f'Lugar {i}', ubicacion='u', departamento='La Paz', tipo='t',
+                           descripcion='d', horario='h') for i in range(n)
+        ])
+        Habitacion.objects.bulk_create([
+            Habitacion(caracteristicas='c', precio=100 + i, codigo_hotel=h, cant_huespedes=2)
+            for i, h in enumerate(hoteles)
+        ])
+        Paquete.objects.bulk_create([
+            Paquete(nombre=f'Paquete {i}', precio=500, id_hotel=h, id_lugar=l)
+            for i, (h, l) in enumerate(zip(hoteles, lugares))
+        ])
+        # bulk_create no dispara señales: invalidar a mano para medir el costo real en BD.
+        response_cache.bump(*response_cache.DEPENDENCIAS)
+
+    def _assert_constant(self, url, expected, cached=True):
+        # _seed() cambia los tokens de versión y el proceso los recuerda: ni MISS ni HIT leen el cache compartido.
+        for n in (2, 20):
+            self._seed(n)
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            if not cached:
+                continue
+            self.assertEqual(response['X-Cache'], 'MISS')
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+    def test_hoteles(self):
+        self._assert_constant('/api/hoteles/', 1)
+
+    def test_lugares(self):
+        self._assert_constant('/api/lugares/', 1)
+
+    def test_habitaciones(self):
+        self._assert_constant('/api/habitaciones/', 1)
+
+    def test_conditional_get(self):
+        self._seed(2)
+        response = self.client.get('/api/hoteles/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/hoteles/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        response_cache.bump('hotel')
+        self.assertEqual(self.client.get('/api/hoteles/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_tokens_recordados_por_proceso(self):
+        self._seed(2)
+        self.client.get('/api/hoteles/')
+        response_cache._tokens.clear()  # como un proceso que todavía no leyó los tokens
+        with self.assertNumQueries(1):  # una lectura del cache compartido, que el proceso recuerda
+            self.assertEqual(self.client.get('/api/hoteles/')['X-Cache'], 'HIT')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/hoteles/')['X-Cache'], 'HIT')
+        # Un bump de otro proceso se ve cuando vence lo recordado.
+        caches['compartido'].set(response_cache._version_key('hotel'), response_cache._new_token(), None)
+        self.assertEqual(self.client.get('/api/hoteles/')['X-Cache'], 'HIT')
+        response_cache._tokens.clear()
+        self.assertEqual(self.client.get('/api/hoteles/')['X-Cache'], 'MISS')
+
+    def test_last_modified_por_segundos(self):
+        self._seed(2)
+        reloj = mock.Mock(wraps=time)
+        with mock.patch.object(response_cache, 'time', reloj):
+            reloj.time.return_value = 1000.3
+            response_cache.bump('hotel')
+            # El segundo de la escritura todavía no terminó: solo ETag.
+            self.assertNotIn('Last-Modified', self.client.get('/api/hoteles/'))
+            reloj.time.return_value = 1001.2
+            response = self.client.get('/api/hoteles/')
+            self.assertEqual(response['Last-Modified'], http_date(1001))
+            ims = {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}
+            self.assertEqual(self.client.get('/api/hoteles/', **ims).status_code, 304)
+            # Una escritura en el mismo segundo de Last-Modified ya no pasa por no modificada.
+            reloj.time.return_value = 1001.4
+            response_cache.bump('hotel')
+            self.assertEqual(self.client.get('/api/hoteles/', **ims).status_code, 200)
+
+    def test_paquetes(self):
+        self._assert_constant('/api/paquetes/', 1)
+
+    def test_hoteles_paginado(self):
+        # Con page/page_size se suma la consulta del COUNT.
+        self._assert_constant('/api/hoteles/?page=1&page_size=5', 2)
+
+    def test_paquetes_cursor(self):
+        self._assert_constant('/api/paquetes/?cursor=&page_size=5', 1)
+
+    def test_sparse_fields(self):
+        self._seed(2)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/habitaciones/?fields=num,precio')
+        self.assertEqual(set(response.data[0]), {'num', 'precio'})
+        self.assertEqual(self.client.get('/api/hoteles/?fields=nombre,inexistente').status_code, 400)
+
+    def test_busqueda_facetada(self):
+        # COUNT + página + una consulta por faceta.
+        self._assert_constant('/api/catalogo/buscar/hoteles/?departamento=La Paz&precio_max=110', 4)
+        response = self.client.get('/api/catalogo/buscar/lugares/?tipo=t')
+        self.assertEqual(response.data['count'], 22)
+        self.assertEqual(response.data['facetas']['departamento'], [{'valor': 'La Paz', 'total': 22}])
+
+    def test_busqueda_texto_sin_acentos(self):
+        LugarTuristico.objects.create(nombre='Tiwanaku', ubicacion='Tiahuanaco', departamento='La Paz',
+                                      tipo='arqueologico', descripcion='Puerta del Sol')
+        response = self.client.get('/api/catalogo/texto/?q=Tiwanakú')
+        self.assertEqual([r['nombre'] for r in response.data['results']], ['Tiwanaku'])
+        response = self.client.get('/api/catalogo/texto/?q=tiwa&modo=sugerir')
+        self.assertEqual(response.data['resultados'][0]['nombre'], 'Tiwanaku')
+
+        antes = response_cache.stats()['scopes']['texto']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/catalogo/texto/?modo=sugerir&q=tiwa')['X-Cache'], 'HIT')
+        despues = response_cache.stats()['scopes']['texto']
+        self.assertEqual((despues['hits'] - antes['hits'], despues['misses'] - antes['misses']), (1, 0))
+
+    def test_habitaciones_disponibles(self):
+        hoy = date.today()
+        self._assert_constant(f'/api/habitaciones/disponibles/?desde={hoy}&hasta={hoy + timedelta(days=2)}', 3, cached=False)
+
+    def test_reservas(self):
+        usuario = Usuario.objects.create_user('u@u.com', 'x', nombre='U', pais='BO', pasaporte='1')
+        self.client.force_authenticate(usuario)
+        hoy = date.today()
+        for n in (2, 20):
+            self._seed(n)
+            Reserva.objects.bulk_create([
+                Reserva(fecha_reserva=hoy + timedelta(days=i), fecha_caducidad=hoy + timedelta(days=i),
+                        num_habitacion=h, codigo_hotel_id=h.codigo_hotel_id, id_usuario=usuario)
+                for i, h in enumerate(Habitacion.objects.order_by('-num')[:n])
+            ])
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/reservas/')
+            self.assertEqual(response.status_code, 200)
+
+    def test_stats_del_catalogo(self):
+        self._seed(2)
+        antes = response_cache.stats()['scopes'].get('hotel', {'hits': 0, 'misses': 0})
+        self.assertEqual(self.client.get('/api/hoteles/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/hoteles/')['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/api/hoteles/?fields=nombre')['X-Cache'], 'MISS')
+        despues = response_cache.stats()['scopes']['hotel']
+        self.assertEqual((despues['hits'] - antes['hits'], despues['misses'] - antes['misses']), (1, 2))
+
+    def test_bump_fallido_no_rompe_la_escritura(self):
+        # El hook corre con la escritura ya confirmada: un error del cache se registra y no sube al llamador.
+        with mock.patch.object(response_cache, 'bump', side_effect=OperationalError('cache caído')), \
+                self.assertLogs('django.test', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                Hotel.objects.create(nombre='H', ubicacion='c', departamento='La Paz', calificacion=4)
+        self.assertTrue(Hotel.objects.filter(nombre='H').exists())
+
+
+class CatalogoLoteTests(TestCase):
+    def setUp(self):
+        admin = Usuario.objects.create_superuser('s@s.com', 'x', nombre='S', pais='BO', pasaporte='1')
+        self.hotel = Hotel.objects.create(nombre='H', ubicacion='c', departamento='La Paz', calificacion=4)
+        Habitacion.objects.bulk_create([
+            Habitacion(caracteristicas='c', precio=100, codigo_hotel=self.hotel, cant_huespedes=2) for _ in range(5)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def _lote(self, **body):
+        return self.client.post('/api/catalogo/lote/habitaciones/', {'filtro': {'hotel': [self.hotel.pk]}, **body},
+                                format='json')
+
+    def test_ajuste_de_precio_por_lotes(self):
+        # 3 lotes: SELECT de pks + UPDATE (con SAVEPOINT/RELEASE) cada uno, más el SELECT final vacío
+        # y el de los paquetes del hotel (core.package_summaries; aquí no tiene), más los 5 del token de
+        # respuestas de habitaciones en el cache compartido (DatabaseCache: COUNT de purga, SAVEPOINT,
+        # SELECT, INSERT, RELEASE). La versión de ocupación del hotel, sin Redis, queda en memoria.
+        with self.assertNumQueries(3 * 4 + 2 + 5):
+            response = self._lote(accion='ajustar_precio', porcentaje=15, batch_size=2)
+        self.assertEqual(response.data, {'afectados': 5, 'lotes': 3})
+        self.assertEqual(set(Habitacion.objects.values_list('precio', flat=True)), {115.0})
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self._lote(accion='actualizar', campos=['precio']).status_code, 400)
+        self.assertEqual(self._lote(accion='actualizar', campos={'codigo_hotel': 1}).status_code, 400)
+        self.assertEqual(self._lote(accion='actualizar', campos={'precio': 'caro'}).status_code, 400)
+        self.assertEqual(self._lote(accion='borrar').status_code, 400)
+        self.assertEqual(set(Habitacion.objects.values_list('precio', flat=True)), {100.0})
+
+    def test_fallo_parcial(self):
+        update = QuerySet.update
+        llamadas = []
+
+        def update_que_falla(qs, **kwargs):
+            llamadas.append(kwargs)
+            if len(llamadas) == 2:
+                raise OperationalError('conexión perdida')
+            return update(qs, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', update_que_falla):
+            response = self._lote(accion='actualizar', campos={'precio': 90}, batch_size=2)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual((response.data['afectados'], response.data['lotes']), (2, 1))
+        self.assertIn('conexión perdida', response.data['error'])
+        self.assertEqual(sorted(Habitacion.objects.values_list('precio', flat=True)), [90, 90, 100, 100, 100])
+
+
+class GeoCercanosTests(TestCase):
+    def test_cercanos_por_grilla(self):
+        lugar = LugarTuristico.objects.create(nombre='Salar', ubicacion='u', departamento='Potosí', tipo='t',
+                                              latitud=-20.1338, longitud=-67.4891)
+        Hotel.objects.create(nombre='Colchani', ubicacion='c', departamento='Potosí', calificacion=4,
+                             latitud=-20.2987, longitud=-67.5437)
+        Hotel.objects.create(nombre='Uyuni', ubicacion='c', departamento='Potosí', calificacion=4,
+                             latitud=-20.4603, longitud=-66.8261)
+        Hotel.objects.create(nombre='Sin coordenadas', ubicacion='c', departamento='Potosí', calificacion=4)
+        with self.assertNumQueries(2):
+            response = APIClient().get(f'/api/cercanos/?lugar={lugar.pk}&radio_km=100')
+        self.assertEqual([h['nombre'] for h in response.data['resultados']], ['Colchani', 'Uyuni'])
+        response = APIClient().get(f'/api/cercanos/?lugar={lugar.pk}&radio_km=30')
+        self.assertEqual([h['nombre'] for h in response.data['resultados']], ['Colchani'])
+        for limite in (0, -1, CercanosView.MAX_LIMITE + 1, 'x'):
+            response = APIClient().get(f'/api/cercanos/?lugar={lugar.pk}&limite={limite}')
+            self.assertEqual(response.status_code, 400)
+        response = APIClient().get(f'/api/cercanos/?lugar={lugar.pk}&radio_km=30&limite=1')
+        self.assertEqual(len(response.data['resultados']), 1)
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user('r@r.com', 'x', nombre='R', pais='BO', pasaporte='1')
+        self.hotel = Hotel.objects.create(nombre='H', ubicacion='c', departamento='La Paz', calificacion=4)
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def _agregados(self):
+        h = Hotel.objects.get(pk=self.hotel.pk)
+        return h.calificacion_promedio, h.calificacion_total, h.calificacion_histograma
+
+    def test_incremental(self):
+        r = self.client.post('/api/reviews/', {'hotel': self.hotel.pk, 'calificacion': 4, 'comentario': 'ok'}, format='json')
+        self.assertEqual(self._agregados(), (4.0, 1, [0, 0, 0, 1, 0]))
+        self.client.patch(f"/api/reviews/{r.data['id_review']}/", {'calificacion': 2}, format='json')
+        self.assertEqual(self._agregados(), (2.0, 1, [0, 1, 0, 0, 0]))
+        self.client.delete(f"/api/reviews/{r.data['id_review']}/")
+        self.assertEqual(self._agregados(), (None, 0, [0, 0, 0, 0, 0]))
+
+    def test_estado_solo_superadmin(self):
+        r = self.client.post('/api/reviews/', {'hotel': self.hotel.pk, 'calificacion': 4, 'comentario': 'ok'}, format='json')
+        url = f"/api/reviews/{r.data['id_review']}/"
+        admin = Usuario.objects.create_superuser('sa@sa.com', 'x', nombre='S', pais='BO', pasaporte='2')
+        moderador = APIClient()
+        moderador.force_authenticate(admin)
+        self.assertEqual(moderador.delete(url).status_code, 200)
+        self.assertEqual(self._agregados(), (None, 0, [0, 0, 0, 0, 0]))
+
+        # El autor no puede deshacer la moderación.
+        response = self.client.patch(url, {'estado': True}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('estado', response.data)
+        self.assertEqual(self.client.patch(url, {'calificacion': 5, 'estado': False}, format='json').status_code, 200)
+        self.assertEqual(self._agregados(), (None, 0, [0, 0, 0, 0, 0]))
+
+        self.assertEqual(moderador.patch(url, {'estado': True}, format='json').status_code, 200)
+        self.assertEqual(self._agregados(), (5.0, 1, [0, 0, 0, 0, 1]))
+
+    def test_edicion_sobre_instancia_vieja(self):
+        r = Review.objects.create(usuario=self.usuario, hotel=self.hotel, calificacion=4, comentario='x')
+        vieja = Review.objects.get(pk=r.pk)
+        oculta = Review.objects.get(pk=r.pk)
+        oculta.estado = False
+        oculta.save()  # ocultada por otro mientras el autor editaba
+        with mock.patch.object(ReviewViewSet, 'get_object', return_value=vieja):
+            self.assertEqual(self.client.patch(f'/api/reviews/{r.pk}/', {'calificacion': 1}, format='json').status_code, 200)
+        self.assertFalse(Review.objects.get(pk=r.pk).estado)
+        self.assertEqual(self._agregados(), (None, 0, [0, 0, 0, 0, 0]))
+
+    def test_reconciliar(self):
+        Review.objects.create(usuario=self.usuario, hotel=self.hotel, calificacion=5, comentario='x')
+        Hotel.objects.filter(pk=self.hotel.pk).update(calificacion_total=7, calificacion_suma=1)
+        self.assertEqual(ratings.reconciliar()['hotel'], 1)
+        self.assertEqual(self._agregados(), (5.0, 1, [0, 0, 0, 0, 1]))
+
+
+class ResumenPaqueteTests(TestCase):
+    def setUp(self):
+        recordar_tokens(self)
+
+    def test_resumen_incremental(self):
+        usuario = Usuario.objects.create_user('p@p.com', 'x', nombre='P', pais='BO', pasaporte='1')
+        hoy = date.today()
+        with self.captureOnCommitCallbacks(execute=True):
+            hotel = Hotel.objects.create(nombre='H', ubicacion='c', departamento='La Paz', calificacion=4)
+            barata = Habitacion.objects.create(caracteristicas='c', precio=80, codigo_hotel=hotel, cant_huespedes=2)
+            cara = Habitacion.objects.create(caracteristicas='c', precio=120, codigo_hotel=hotel, cant_huespedes=2)
+            lugar = LugarTuristico.objects.create(nombre='L', ubicacion='u', departamento='La Paz', tipo='t')
+            paquete = Paquete.objects.create(nombre='P', precio=500, id_hotel=hotel, id_lugar=lugar)
+        with self.captureOnCommitCallbacks(execute=True):
+            for hab, noches in ((barata, 3), (cara, 1)):
+                Reserva.objects.create(fecha_reserva=hoy, fecha_caducidad=hoy + timedelta(days=noches),
+                                       num_habitacion=hab, codigo_hotel=hotel, id_usuario=usuario)
+            Review.objects.create(usuario=usuario, hotel=hotel, calificacion=5, comentario='x')
+
+        with self.assertNumQueries(1):
+            resumen = APIClient().get('/api/paquetes/').data[0]['resumen']
+        self.assertEqual(
+            (resumen['habitacion_precio_desde'], resumen['habitaciones_disponibles'], resumen['proxima_fecha_libre'],
+             resumen['hotel_calificacion_promedio'], resumen['hotel_calificacion_total']),
+            (80.0, 2, str(hoy + timedelta(days=2)), 5.0, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            barata.disponible = False
+            barata.save()
+        self.assertEqual(APIClient().get(f'/api/paquetes/{paquete.pk}/').data['resumen']['habitacion_precio_desde'], 120.0)
+
+    def _paquete(self, noches=2):
+        usuario = Usuario.objects.create_user('q@q.com', 'x', nombre='Q', pais='BO', pasaporte='2')
+        with self.captureOnCommitCallbacks(execute=True):
+            hotel = Hotel.objects.create(nombre='H', ubicacion='c', departamento='La Paz', calificacion=4)
+            hab = Habitacion.objects.create(caracteristicas='c', precio=90, codigo_hotel=hotel, cant_huespedes=2)
+            lugar = LugarTuristico.objects.create(nombre='L', ubicacion='u', departamento='La Paz', tipo='t')
+            paquete = Paquete.objects.create(nombre='P', precio=500, id_hotel=hotel, id_lugar=lugar)
+            Reserva.objects.create(fecha_reserva=date.today(), fecha_caducidad=date.today() + timedelta(days=noches),
+                                   num_habitacion=hab, codigo_hotel=hotel, id_usuario=usuario)
+        return paquete
+
+    def test_sin_fecha_libre_se_recalcula(self):
+        # Sin día libre dentro del horizonte queda en None; el barrido lo reintenta al avanzar el horizonte.
+        paquete = self._paquete()
+        ResumenPaquete.objects.filter(pk=paquete.pk).update(proxima_fecha_libre=None)
+        self.assertEqual(package_summaries.refresh_vencidos(), 1)
+        self.assertEqual(ResumenPaquete.objects.get(pk=paquete.pk).proxima_fecha_libre, date.today() + timedelta(days=3))
+
+    def test_migracion_rellena_resumenes(self):
+        paquete = self._paquete()
+        esperado = ResumenPaquete.objects.values().get(pk=paquete.pk)
+        ResumenPaquete.objects.all().delete()
+        migracion = importlib.import_module('core.migrations.0013_resumen_paquete')
+        migracion.rellenar_resumenes(django_apps, None)
+        self.assertEqual({k: v for k, v in ResumenPaquete.objects.values().get(pk=paquete.pk).items()
+                          if k != 'fecha_actualizacion'},
+                         {k: v for k, v in esperado.items() if k != 'fecha_actualizacion'})
+
+
+class RagDocumentsTests(SimpleTestCase):
+    DEP = {
+        "nombre": "Oruro", "capital": "Oruro", "clima": "n/d", "comida_tradicional": "Charquekan",
+        "platos_adicionales": [{"nombre": "Rostro asado", "costo_aprox_bs": 30}, {"nombre": ""}],
+        "transporte": {"acceso": "Buses desde La Paz", "aeropuerto": "N/D"},
+    }
+
+    def test_departamento_por_tema(self):
+        docs = {d["metadata"]["tema"]: d for d in build_documents({"departamentos": [self.DEP]})}
+        # Sin festividades, costos ni seguridad no se generan esos documentos.
+        self.assertEqual(set(docs), {"general", "gastronomia", "transporte"})
+        self.assertEqual(docs["gastronomia"]["id"], "departamento:Oruro:gastronomia")
+        self.assertIn("- Rostro asado (Bs. 30)", docs["gastronomia"]["text"])
+        self.assertNotIn("Clima", docs["general"]["text"])
+        self.assertEqual(docs["transporte"]["text"], "Oruro — transporte\nTransporte:\n- acceso: Buses desde La Paz")
+
+    def test_metadata_compacta(self):
+        hotel = {"id_hotel": 7, "nombre": "Hotel Sol", "departamento": "Oruro", "calificacion": 4,
+                 "amenidades": ["Wi-Fi", ""], "url_imagen_hotel": "https://x"}
+        docs = build_documents({"hoteles": [hotel, {"nombre": ""}], "paquetes": [{"id_paquete": 2, "nombre": "Carnaval"}]})
+        self.assertEqual([d["id"] for d in docs], ["hotel:7", "paquete:2"])
+        self.assertEqual(docs[0]["metadata"],
+                         {"tipo": "hotel", "id": 7, "nombre": "Hotel Sol", "departamento": "Oruro", "tema": "hotel"})
+        self.assertIn("Amenidades: Wi-Fi", docs[0]["text"])
+        self.assertNotIn("https://x", docs[0]["text"])
+
+    def test_lista_cruda(self):
+        self.assertEqual(build_documents([{"a": 1}]), [{"id": "item:0", "text": '{"a": 1}', "metadata": {"tipo": "item"}}])
+
+
+class RagEvaluationTests(SimpleTestCase):
+    DATA = {"hoteles": [{"id_hotel": 1, "nombre": "Hotel Sol"}, {"id_hotel": 2, "nombre": "Casa Luna"}],
+            "lugares_turisticos": [{"id_lugar": 3, "nombre": "Salar de Uyuni", "horario": "24h"}]}
+
+    def test_recuperadores(self):
+        docs = build_documents(self.DATA)
+        keyword = KeywordRetriever(docs)
+        self.assertEqual(keyword.search("cuéntame sobre casa luna", 1)[0][0], "hotel:2")
+        hybrid = HybridRetriever(keyword, VectorRetriever(docs, HashingEmbedding(64)))
+        self.assertEqual(hybrid.search("horario del salar de uyuni", 1)[0][0], "lugar:3")
+
+    def test_recall_y_mrr(self):
+        class Fijo:
+            name = "fijo"
+
+            def search(self, query, k):
+                return [("hotel:2", 1.0), ("hotel:1", 0.5)][:k]
+
+        queries = build_queries(self.DATA)
+        self.assertEqual([q["expected"] for q in queries], ["hotel:1", "hotel:2", "lugar:3"])
+        report = evaluate(Fijo(), queries, [1, 2])
+        self.assertEqual(report["recall"], {"@1": round(1 / 3, 4), "@2": round(2 / 3, 4)})
+        self.assertEqual(report["mrr"], round((1 / 2 + 1) / 3, 4))
+
+
+class KnowledgeSnapshotTests(SimpleTestCase):
+    DATA = {"info_base_datos": {"version": "9"},
+            "departamentos": [{"nombre": "Potosí"}],
+            "hoteles": [{"nombre": "Hotel Tomás Katari", "departamento": "Potosí"},
+                        {"nombre": "Otro", "departamento": "La Paz"}]}
+
+    def _escribir(self, raw):
+        fd, path = tempfile.mkstemp(suffix='.kb')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_registros_e_indices(self):
+        snap = Snapshot(self._escribir(build_snapshot(self.DATA)))
+        hoteles = snap.records("hoteles")
+        self.assertEqual(len(hoteles), 2)
+        self.assertIs(hoteles[0], hoteles[0])  # decodificado una sola vez
+        self.assertEqual(snap.index("hoteles")["hotel tomas katari"]["departamento"], "Potosí")
+        self.assertEqual([h["nombre"] for h in hoteles.by_departamento("potosi")], ["Hotel Tomás Katari"])
+        self.assertEqual(snap.meta, {"version": "9"})
+
+    def test_desactualizado_o_invalido(self):
+        fuente = self._escribir(b"{}")
+        snap_path = self._escribir(build_snapshot(self.DATA, source_stat=os.stat(fuente)))
+        self.assertIsNotNone(load_snapshot(snap_path, fuente))
+        with open(fuente, 'ab') as f:
+            f.write(b" ")
+        self.assertIsNone(load_snapshot(snap_path, fuente))
+        self.assertIsNone(load_snapshot(self._escribir(b"XXXX" + bytes(10)), fuente))
+
+
+class KnowledgeSyncTests(TestCase):
+    def setUp(self):
+        # apply_catalog_changes reemplaza las listas del módulo; se restauran al terminar.
+        for nombre in ('_HOTELS', '_HOTEL_INDEX', '_PLACES', '_PLACE_INDEX', '_PACKAGES'):
+            patcher = mock.patch.object(llm_client, nombre, getattr(llm_client, nombre))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for nombre, valor in (('_watermark', None), ('_applied', {})):
+            patcher = mock.patch.object(knowledge_sync, nombre, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_incremental_en_memoria(self):
+        hotel = Hotel.objects.create(nombre='Hotel Nuevo Sync', ubicacion='c', departamento='Tarija', calificacion=4)
+        self.assertGreaterEqual(knowledge_sync.sync_in_memory()['hotel'], 1)
+        self.assertEqual(llm_client._HOTEL_INDEX['hotel nuevo sync']['id_hotel'], hotel.pk)
+        # Las filas ya aplicadas dentro de la ventana de solape no se reaplican.
+        self.assertEqual(knowledge_sync.sync_in_memory(), {})
+
+        hotel.estado = False
+        hotel.save()
+        self.assertEqual(knowledge_sync.sync_in_memory(), {'hotel': 1})
+        self.assertNotIn('hotel nuevo sync', llm_client._HOTEL_INDEX)
+
+    def test_paquete_hereda_departamento(self):
+        lugar = LugarTuristico.objects.create(nombre='Valle', ubicacion='u', departamento='Tarija', tipo='t')
+        Paquete.objects.create(nombre='Vendimia', precio=300, id_lugar=lugar)
+        knowledge_sync.sync_in_memory()
+        paquete = next(p for p in llm_client._PACKAGES if p['nombre'] == 'Vendimia')
+        self.assertEqual((paquete['departamento'], paquete['lugar'], paquete['hotel']), ('Tarija', 'Valle', ''))
+
+
+class MicroBatchEmbedderTests(SimpleTestCase):
+    def test_agrupa_y_deduplica(self):
+        llamadas = []
+
+        def embed(texts):
+            llamadas.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        batcher = MicroBatchEmbedder(embed, max_wait_ms=50)
+        self.assertEqual(batcher(['a', 'bb', 'a']), [[1.0], [2.0], [1.0]])
+        self.assertEqual(llamadas, [['a', 'bb']])
+        self.assertEqual(batcher.stats()['batch_size']['count'], 1)
+
+    def test_largo_distinto_falla_todo_el_lote(self):
+        batcher = MicroBatchEmbedder(lambda texts: [[0.0]], max_wait_ms=50)
+        futuros = [batcher.submit(t) for t in ('x', 'y')]
+        for f in futuros:
+            with self.assertRaises(ValueError):
+                f.result(timeout=5)
+        # El worker sigue vivo para los lotes siguientes.
+        self.assertEqual(batcher.embed('z', timeout=5), [0.0])
+
+
+class DisponibilidadTests(TestCase):
+    def setUp(self):
+        self.hoy = date.today()
+        self.usuario = Usuario.objects.create_user('d@d.com', 'x', nombre='D', pais='BO', pasaporte='1')
+        self.hotel = Hotel.objects.create(nombre='H', ubicacion='c', departamento='La Paz', calificacion=4)
+        self.otro = Hotel.objects.create(nombre='O', ubicacion='c', departamento='Oruro', calificacion=3)
+        self.doble = Habitacion.objects.create(caracteristicas='d', precio=100, codigo_hotel=self.hotel, cant_huespedes=2)
+        self.suite = Habitacion.objects.create(caracteristicas='s', precio=250, codigo_hotel=self.hotel, cant_huespedes=4)
+        self.simple = Habitacion.objects.create(caracteristicas='x', precio=60, codigo_hotel=self.otro, cant_huespedes=1)
+        self.client = APIClient()
+
+    def _dia(self, n):
+        return self.hoy + timedelta(days=n)
+
+    def _reservar(self, hab, desde, hasta, **extra):
+        return Reserva.objects.create(fecha_reserva=self._dia(desde), fecha_caducidad=self._dia(hasta),
+                                      num_habitacion=hab, codigo_hotel_id=hab.codigo_hotel_id,
+                                      id_usuario=self.usuario, **extra)
+
+    def _buscar(self, desde, hasta, **params):
+        query = '&'.join(f'{k}={v}' for k, v in params.items())
+        return self.client.get(f'/api/habitaciones/disponibles/?desde={self._dia(desde)}&hasta={self._dia(hasta)}&{query}')
+
+    def test_busqueda_excluye_solapadas(self):
+        self._reservar(self.doble, 2, 4)
+        self._reservar(self.suite, 0, 1)  # termina antes de la ventana
+        self._reservar(self.simple, 3, 3, estado=False)  # cancelada
+        data = self._buscar(3, 5).data
+        self.assertEqual([(r['hotel']['nombre'], r['precio_min'], r['habitaciones_libres']) for r in data['results']],
+                         [('O', 60, 1), ('H', 250, 1)])
+        self.assertEqual([h['num'] for h in data['results'][1]['habitaciones']], [self.suite.num])
+
+    def test_busqueda_filtros(self):
+        data = self._buscar(1, 2, huespedes=2, departamento='la paz', orden='-precio').data
+        self.assertEqual([r['hotel']['nombre'] for r in data['results']], ['H'])
+        self.assertEqual([h['precio'] for h in data['results'][0]['habitaciones']], [100, 250])
+        self.assertEqual(self._buscar(2, 1).status_code, 400)
+        self.assertEqual(self._buscar(1, 2, huespedes='dos').status_code, 400)
+
+    def _crear(self, hab, desde, hasta):
+        self.client.force_authenticate(self.usuario)
+        return self.client.post('/api/reservas/', {'num_habitacion': hab.num, 'codigo_hotel': hab.codigo_hotel_id,
+                                                   'fecha_reserva': self._dia(desde), 'fecha_caducidad': self._dia(hasta)},
+                                format='json')
+
+    def test_solapamiento_por_restriccion(self):
+        self._reservar(self.doble, 1, 3)
+        self.assertEqual(self._crear(self.doble, 3, 4).data['non_field_errors'], [Reserva.OVERLAP_MESSAGE])
+        # Sin la verificación previa (dos solicitudes simultáneas) responde la restricción de exclusión.
+        with mock.patch.object(ReservaSerializer, 'validate', lambda self, attrs: attrs):
+            response = self._crear(self.doble, 2, 5)
+        self.assertEqual((response.status_code, response.data['non_field_errors']), (400, [Reserva.OVERLAP_MESSAGE]))
+        self.assertEqual(self._crear(self.doble, 4, 5).status_code, 201)
+
+    def test_reactivar_solapada(self):
+        cancelada = self._reservar(self.doble, 1, 3, estado=False)
+        nueva = self._reservar(self.doble, 2, 2)
+        self.client.force_authenticate(self.usuario)
+        url = f'/api/reservas/{cancelada.pk}/reactivar/?estado=false'
+        self.assertEqual(self.client.post(url).status_code, 400)
+        Reserva.objects.filter(pk=nueva.pk).update(estado=False)
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertTrue(Reserva.objects.get(pk=cancelada.pk).estado)
+
+    def test_bitmap(self):
+        origin = date(2030, 1, 1)
+        bits = (occupancy._range_mask(origin, date(2029, 12, 30), date(2030, 1, 2))
+                | occupancy._range_mask(origin, date(2030, 1, 3), date(2030, 1, 4)))
+        self.assertEqual(bits, 0b1111)
+        self.assertEqual(occupancy.next_free_day(origin, bits, origin), date(2030, 1, 5))
+        self.assertEqual(occupancy.next_free_day(origin, bits, date(2030, 1, 9)), date(2030, 1, 9))
+        self.assertEqual(occupancy._range_mask(origin, date(2029, 1, 1), date(2029, 2, 1)), 0)
+
+    def _disponibilidad(self, hab, desde, hasta):
+        return self.client.get(f'/api/habitaciones/{hab.num}/disponibilidad/?desde={self._dia(desde)}&hasta={self._dia(hasta)}').data
+
+    def test_disponibilidad_por_reserva(self):
+        occupancy.get(self.doble.num)  # bitmap en cache: las altas lo recalculan desde la BD al confirmar
+        with self.captureOnCommitCallbacks(execute=True):
+            self._reservar(self.doble, 1, 2)
+            movida = self._reservar(self.doble, 3, 4)
+        with self.assertNumQueries(1):  # la habitación; bitmap y versión del hotel salen del cache
+            data = self._disponibilidad(self.doble, 2, 10)
+        # Una entrada por reserva, aunque sean contiguas, y sin recortar a la ventana.
+        self.assertEqual(data['intervalos_reservados'],
+                         [{'inicio': str(self._dia(1)), 'fin': str(self._dia(2))},
+                          {'inicio': str(self._dia(3)), 'fin': str(self._dia(4))}])
+        self.assertEqual(data['next_available_from'], str(self._dia(5)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            movida.num_habitacion = self.suite
+            movida.save()
+        self.assertEqual(len(self._disponibilidad(self.doble, 2, 10)['intervalos_reservados']), 1)
+        self.assertEqual(self._disponibilidad(self.doble, 2, 10)['next_available_from'], str(self._dia(3)))
+        self.assertEqual(self._disponibilidad(self.suite, 0, 10)['next_available_from'], str(self._dia(0)))
+        self.assertFalse(occupancy.is_free(self.suite.num, self._dia(4), self._dia(4)))
+
+    def test_lectura_vieja_no_pisa_el_bitmap(self):
+        # Una lectura que consultó Reserva antes de que se confirme un alta no sobrescribe al guardar.
+        occupancy.invalidate(self.doble.num)
+        fetch, leidas = occupancy._fetch, []
+
+        def lectura_lenta(nums, origin, *args):
+            vieja = fetch(nums, origin, *args)
+            if not leidas:
+                leidas.append(nums)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self._reservar(self.doble, 1, 2)
+            return vieja
+
+        with mock.patch.object(occupancy, '_fetch', side_effect=lectura_lenta):
+            self.assertTrue(occupancy.is_free(self.doble.num, self._dia(1), self._dia(1)))
+        self.assertFalse(occupancy.is_free(self.doble.num, self._dia(1), self._dia(1)))
+
+    def _calendario(self, headers=None, **params):
+        return self.client.get(f'/api/hoteles/{self.hotel.pk}/calendario/', params, **(headers or {}))
+
+    def _dias(self, data):
+        return {d['fecha']: (d['habitaciones_libres'], d['precio_min']) for d in data['dias']}
+
+    def test_calendario(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._reservar(self.doble, 0, 1)
+        mes = self.hoy.replace(day=1)
+        siguiente = (mes + timedelta(days=32)).replace(day=1)
+        rango = {'desde': f'{mes:%Y-%m}', 'hasta': f'{siguiente:%Y-%m}'}
+        response = self._calendario(**rango)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_habitaciones'], 2)
+        dias = self._dias(response.data)
+        self.assertEqual(dias[str(self._dia(0))], (1, 250))
+        self.assertEqual(dias[str(self._dia(1))], (1, 250))
+        self.assertEqual(dias[str(self._dia(2))], (2, 100))
+
+        headers = {'HTTP_IF_NONE_MATCH': response['ETag']}
+        with self.assertNumQueries(1):  # el hotel; su versión de ocupación sale del cache
+            self.assertEqual(self._calendario(headers=headers, **rango).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._reservar(self.suite, 2, 2)
+        response = self._calendario(headers=headers, **rango)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._dias(response.data)[str(self._dia(2))], (1, 100))
+
+    def test_calendario_meses_pasados(self):
+        pasado = (self.hoy.replace(day=1) - timedelta(days=400)).replace(day=10)
+        Reserva.objects.create(fecha_reserva=pasado, fecha_caducidad=pasado, num_habitacion=self.suite,
+                               codigo_hotel=self.hotel, id_usuario=self.usuario)
+        data = self._calendario(desde=f'{pasado:%Y-%m}').data
+        self.assertEqual(data['desde'], str(pasado.replace(day=1)))
+        self.assertEqual(self._dias(data)[str(pasado)], (1, 100))
+        self.assertEqual(self._dias(data)[str(pasado + timedelta(days=1))], (2, 100))
+
+    def _lote(self, *items, **extra):
+        self.client.force_authenticate(self.usuario)
+        body = {'reservas': [{'num_habitacion': hab.num, 'fecha_reserva': self._dia(desde),
+                              'fecha_caducidad': self._dia(hasta)} for hab, desde, hasta in items], **extra}
+        return self.client.post('/api/reservas/lote/', body, format='json')
+
+    def test_reserva_por_lote(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._lote((self.doble, 1, 2), (self.suite, 1, 2), (self.doble, 4, 5))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['reservas']), 3)
+        self.assertEqual(Reserva.objects.filter(id_usuario=self.usuario, codigo_hotel=self.hotel).count(), 3)
+        # Una sola notificación (y fila de outbox) para todo el lote.
+        self.assertEqual(Notification.objects.filter(usuario=self.usuario).count(), 1)
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+        # bulk_create no dispara post_save: los bitmaps se actualizan desde reservas_creadas.
+        self.assertFalse(occupancy.is_free(self.doble.num, self._dia(4), self._dia(4)))
+        self.assertTrue(occupancy.is_free(self.doble.num, self._dia(3), self._dia(3)))
+        self.assertFalse(occupancy.is_free(self.suite.num, self._dia(2), self._dia(2)))
+
+    def test_reserva_por_lote_todo_o_nada(self):
+        self._reservar(self.suite, 3, 3)
+        response = self._lote((self.doble, 1, 2), (self.doble, 2, 3), (self.suite, 2, 4))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['reservas'], ['Ítem 1: se solapa con el ítem 0 del mismo lote.'])
+        response = self._lote((self.doble, 1, 2), (self.suite, 2, 4))
+        self.assertEqual(response.data['reservas'], [f'Ítem 1: {Reserva.OVERLAP_MESSAGE}'])
+        lugar = LugarTuristico.objects.create(nombre='L', ubicacion='u', departamento='La Paz', tipo='t')
+        paquete = Paquete.objects.create(nombre='P', precio=10, id_hotel=self.hotel, id_lugar=lugar)
+        response = self._lote((self.doble, 1, 2), (self.simple, 1, 2), id_paquete=paquete.pk)
+        self.assertEqual(response.data['reservas'],
+                         [f'Ítem 1: la habitación {self.simple.num} no pertenece al hotel del paquete.'])
+        self.assertEqual(self._lote(*[(self.doble, 2 * i, 2 * i) for i in range(51)]).status_code, 400)
+        self.assertEqual(Reserva.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+    def _rollup(self, hotel, n):
+        fila = OcupacionDiaria.objects.filter(hotel=hotel, fecha=self._dia(n)).first()
+        return fila and (fila.noches, fila.reservas, fila.cancelaciones, fila.ingresos)
+
+    def test_rollups_diarios(self):
+        pago = Pago.objects.create(tipo_pago='qr', monto=300, fecha=self.hoy)
+        with self.captureOnCommitCallbacks(execute=True):
+            a = self._reservar(self.doble, 1, 2, id_pago=pago)
+            self._reservar(self.suite, 2, 3, id_pago=pago)
+        self.assertEqual(self._rollup(self.hotel, 1), (1, 1, 0, 0))
+        self.assertEqual(self._rollup(self.hotel, 2), (2, 1, 0, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            pago.estado = Pago.Estado.COMPLETADO
+            pago.save()
+        # El pago completado se reparte entre las dos reservas que lo comparten.
+        self.assertEqual(self._rollup(self.hotel, 1), (1, 1, 0, 150))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            a.estado = False
+            a.save()
+        self.assertEqual(self._rollup(self.hotel, 1), (0, 0, 1, 0))
+        self.assertEqual(self._rollup(self.hotel, 2), (1, 1, 0, 150))
+        # Mover la reserva de hotel recalcula también los días que deja en el anterior.
+        with self.captureOnCommitCallbacks(execute=True):
+            Reserva.objects.filter(pk=a.pk).delete()
+            b = self._reservar(self.doble, 5, 5)
+            b.num_habitacion, b.codigo_hotel = self.simple, self.otro
+            b.save()
+        self.assertIsNone(self._rollup(self.hotel, 1))
+        self.assertIsNone(self._rollup(self.hotel, 5))
+        self.assertEqual(self._rollup(self.otro, 5), (1, 1, 0, 0))
+
+        OcupacionDiaria.objects.all().delete()
+        self.assertEqual(rollups.rebuild_all(), 3)
+        self.assertEqual(self._rollup(self.hotel, 3), (1, 0, 0, 0))
+
+    def test_estadisticas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._reservar(self.doble, 0, 1)
+            self._reservar(self.simple, 0, 0)
+        admin = Usuario.objects.create_superuser('sa@sa.com', 'x', nombre='S', pais='BO', pasaporte='2')
+        self.client.force_authenticate(admin)
+        url = '/api/estadisticas/reservas/'
+        rango = {'desde': self._dia(0), 'hasta': self._dia(1)}
+        data = self.client.get(url, {**rango, 'hotel': self.hotel.pk}).data
+        self.assertEqual(data['totales']['noches'], 2)
+        self.assertEqual(data['totales']['ocupacion'], 0.5)  # 2 noches / (2 habitaciones x 2 días)
+        data = self.client.get(url, {**rango, 'por': 'departamento'}).data
+        self.assertEqual([(f['departamento'], f['noches']) for f in data['resultados']],
+                         [('La Paz', 1), ('Oruro', 1), ('La Paz', 1)])
+        self.assertEqual(self.client.get(url, {'hotel': 'abc'}).status_code, 400)
+        self.client.force_authenticate(self.usuario)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_exportar_en_streaming(self):
+        for n in range(5):
+            self._reservar(self.doble, 2 * n, 2 * n)
+        admin = Usuario.objects.create_superuser('sa@sa.com', 'x', nombre='S', pais='BO', pasaporte='2')
+        self.client.force_authenticate(admin)
+
+        async def leer(contenido):
+            # Un bloque por vuelta: cada uno sale del cursor recién cuando se pide.
+            return [bloque async for bloque in contenido]
+
+        with mock.patch.object(exports, 'CHUNK_SIZE', 2):
+            response = self.client.get('/api/exportar/reservas/', {'formato': 'ndjson', 'hotel': self.hotel.pk})
+        self.assertTrue(response.is_async)
+        bloques = [b.decode().splitlines() for b in async_to_sync(leer)(response.streaming_content)]
+        self.assertEqual([len(b) for b in bloques], [2, 2, 1])
+        filas = [json.loads(line) for b in bloques for line in b]
+        self.assertEqual([f['fecha_reserva'] for f in filas], [str(self._dia(2 * n)) for n in range(5)])
+        self.assertEqual(filas[0]['hotel'], 'H')
+
+        response = self.client.get('/api/exportar/reservas/', {'formato': 'csv', 'estado': 'false'})
+        cabecera = ','.join(nombre for nombre, _ in exports.EXPORTS['reservas'][1]) + '\r\n'
+        self.assertEqual(b''.join(async_to_sync(leer)(response.streaming_content)).decode('utf-8-sig'), cabecera)
+        self.assertEqual(self.client.get('/api/exportar/reservas/', {'desde': 'ayer'}).status_code, 400)
+
+    def test_reservas_cursor_con_fechas_repetidas(self):
+        habitaciones = Habitacion.objects.bulk_create([
+            Habitacion(caracteristicas='c', precio=80, codigo_hotel=self.otro, cant_huespedes=2) for _ in range(6)
+        ])
+        # 18 reservas en solo 3 fechas de check-in distintas.
+        for hab in habitaciones:
+            for n in range(3):
+                self._reservar(hab, 3 * n, 3 * n + 1)
+        self.client.force_authenticate(self.usuario)
+        esperado = list(Reserva.objects.order_by('-fecha_reserva', '-id_reserva').values_list('pk', flat=True))
+
+        vistos, paginas = [], []
+        url = '/api/reservas/?cursor=&page_size=4&ordering=-fecha_reserva'
+        while url:
+            data = self.client.get(url).data
+            paginas.append(data)
+            vistos += [r['id_reserva'] for r in data['results']]
+            url = data['next']
+        self.assertEqual(vistos, esperado)
+        self.assertEqual(len(paginas), 5)
+        # La posición lleva fecha e id: sin offset aunque la fecha se repita en toda la página.
+        cursor = parse_qs(urlparse(paginas[1]['next']).query)['cursor'][0]
+        self.assertEqual(parse_qs(base64.b64decode(cursor).decode()),
+                         {'p': [f"{self._dia(3)}|{esperado[7]}"]})
+        # Y de vuelta con 'previous' desde la última página.
+        previa = self.client.get(paginas[-1]['previous']).data
+        self.assertEqual([r['id_reserva'] for r in previa['results']], esperado[12:16])
+
+        ascendente = self.client.get('/api/reservas/?cursor=&page_size=10&ordering=fecha_reserva').data
+        siguiente = self.client.get(ascendente['next']).data
+        self.assertEqual([r['id_reserva'] for r in ascendente['results'] + siguiente['results']],
+                         list(Reserva.objects.order_by('fecha_reserva', 'id_reserva').values_list('pk', flat=True)))
+        cursor = base64.b64encode(b'p=ayer|1').decode()
+        self.assertEqual(self.client.get('/api/reservas/', {'cursor': cursor}).status_code, 404)
+
+    def test_reservas_filtros(self):
+        pago = Pago.objects.create(tipo_pago='qr', monto=10, fecha=self.hoy, estado=Pago.Estado.COMPLETADO)
+        a = self._reservar(self.doble, 1, 2, id_pago=pago)
+        b = self._reservar(self.simple, 2, 5)
+        c = self._reservar(self.suite, 8, 9, archivada=True)
+        self._reservar(self.suite, 1, 1, estado=False)
+        self.client.force_authenticate(self.usuario)
+
+        def ids(**params):
+            response = self.client.get('/api/reservas/', params)
+            return sorted(r['id_reserva'] for r in response.data)
+
+        self.assertEqual(ids(), sorted([a.pk, b.pk, c.pk]))
+        self.assertEqual(ids(hotel=self.otro.pk), [b.pk])
+        self.assertEqual(ids(habitacion=self.doble.num), [a.pk])
+        self.assertEqual(ids(desde=self._dia(3), hasta=self._dia(8)), sorted([b.pk, c.pk]))
+        self.assertEqual(ids(vigentes='true'), sorted([a.pk, b.pk]))
+        self.assertEqual(ids(pago_estado='completado'), [a.pk])
+        self.assertEqual(ids(pago_estado='sin_pago'), sorted([b.pk, c.pk]))
+        self.assertEqual(len(ids(estado='false')), 1)
+        for params in ({'hotel': 'x'}, {'desde': 'ayer'}, {'pago_estado': 'regalado'}, {'ordering': 'precio'}):
+            self.assertEqual(self.client.get('/api/reservas/', params).status_code, 400)
+
+    def test_barrido_de_caducados(self):
+        vencida = self._reservar(self.doble, -5, -2)
+        cancelada = self._reservar(self.suite, -5, -2, estado=False)
+        futura = self._reservar(self.doble, 1, 2)
+        viejo = Pago.objects.create(tipo_pago='qr', monto=10, fecha=self.hoy)
+        nuevo = Pago.objects.create(tipo_pago='qr', monto=10, fecha=self.hoy)
+        Pago.objects.filter(pk=viejo.pk).update(fecha_creacion=self.hoy - timedelta(days=sweeper.PAGO_PENDIENTE_DIAS + 1))
+
+        salida = StringIO()
+        call_command('barrer_caducados', '--dry-run', stdout=salida)
+        self.assertIn('Por archivar: 1 reservas, 1 pagos pendientes vencidos', salida.getvalue())
+        resultado = sweeper.sweep(batch_size=1)
+        self.assertEqual((resultado['reservas_archivadas'], resultado['pagos_vencidos']), (1, 1))
+        self.assertEqual(
+            list(Reserva.objects.filter(archivada=True).values_list('pk', flat=True)), [vencida.pk])
+        self.assertFalse(Reserva.objects.get(pk=cancelada.pk).archivada)
+        self.assertFalse(Reserva.objects.get(pk=futura.pk).archivada)
+        self.assertEqual(Pago.objects.get(pk=viejo.pk).estado, Pago.Estado.CANCELADO)
+        self.assertEqual(Pago.objects.get(pk=nuevo.pk).estado, Pago.Estado.PENDIENTE)
+        self.assertEqual(sweeper.sweep()['reservas_archivadas'], 0)
+
+        # Las archivadas salen de la restricción de solapamiento, como de Reserva.VIGENTE.
+        self._reservar(self.doble, -4, -3)
+
+    def test_calendario_rango_invalido(self):
+        self.assertEqual(self._calendario(desde='2030-13').status_code, 400)
+        self.assertEqual(self._calendario(desde='2030-05', hasta='2030-04').status_code, 400)
+        self.assertEqual(self._calendario(desde='2030-01', hasta='2031-01').status_code, 400)
+        self.assertEqual(self.client.get('/api/hoteles/999999/calendario/').status_code, 404)
+
+
+class _Layer:
+    """Channel layer de prueba: registra los group_send o falla con `error`."""
+    def __init__(self, error=None):
+        self.error = error
+        self.enviados = []
+
+    async def group_send(self, grupo, payload):
+        if self.error:
+            raise self.error
+        self.enviados.append(grupo)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user('n@n.com', 'x', nombre='N', pais='BO', pasaporte='1')
+
+    def _drain(self, layer):
+        with mock.patch.object(outbox, 'get_channel_layer', return_value=layer):
+            return outbox.drain()
+
+    def _vencer(self):
+        NotificationOutbox.objects.update(proximo_intento=timezone.now())
+
+    def test_reintento_con_backoff(self):
+        outbox.notify(self.usuario, 't', 'm', '/x', 'e')
+        with self.assertLogs('core.outbox', 'WARNING'):
+            self.assertEqual(self._drain(_Layer(ConnectionError('caído'))), (0, 1))
+        fila = NotificationOutbox.objects.get()
+        self.assertEqual((fila.intentos, fila.ultimo_error, fila.enviado), (1, 'caído', None))
+        self.assertGreater(fila.proximo_intento, timezone.now())
+        # En backoff: nadie la reclama todavía.
+        self.assertEqual(self._drain(_Layer()), (0, 0))
+
+        self._vencer()
+        layer = _Layer()
+        self.assertEqual(self._drain(layer), (1, 0))
+        self.assertEqual(layer.enviados, [f'user_{self.usuario.pk}'])
+        self.assertIsNotNone(NotificationOutbox.objects.get().enviado)
+
+    def test_agotadas(self):
+        outbox.notify(self.usuario, 't', 'm', '/x', 'e')
+        NotificationOutbox.objects.update(intentos=outbox.MAX_INTENTOS - 1)
+        with self.assertLogs('core.outbox', 'ERROR'):
+            self._drain(_Layer(ConnectionError('caído')))
+        self.assertEqual(outbox.agotadas().count(), 1)
+        self._vencer()
+        self.assertEqual(self._drain(_Layer()), (0, 0))
+
+        self.assertEqual(outbox.reintentar_agotadas(), 1)
+        self.assertEqual(self._drain(_Layer()), (1, 0))
+        self.assertFalse(outbox.agotadas().exists())
+
+        outbox.notify(self.usuario, 't', 'm', '/x', 'e')
+        NotificationOutbox.objects.filter(enviado__isnull=True).update(
+            intentos=outbox.MAX_INTENTOS, creado=timezone.now() - timedelta(days=8))
+        NotificationOutbox.objects.filter(enviado__isnull=False).update(enviado=timezone.now() - timedelta(days=8))
+        self.assertEqual(outbox.purge(7), 2)
+
+    def test_comando_con_layer_en_memoria(self):
+        outbox.notify(self.usuario, 't', 'm', '/x', 'e')
+        with self.assertRaises(CommandError):
+            call_command('despachar_notificaciones', stdout=StringIO())
+        # Purgar y reencolar siguen disponibles, pero la fila pendiente no se marca como enviada.
+        call_command('despachar_notificaciones', '--purgar-dias', '7', stdout=StringIO(), stderr=StringIO())
+        self.assertIsNone(NotificationOutbox.objects.get().enviado)
+
+        layer = _Layer()
+        with mock.patch.object(outbox, 'get_channel_layer', return_value=layer):
+            call_command('despachar_notificaciones', stdout=StringIO())
+        self.assertEqual(layer.enviados, [f'user_{self.usuario.pk}'])
+
+    def test_arranca_con_el_loop(self):
+        async def _run():
+            pass
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        with mock.patch.object(outbox, '_run', _run), mock.patch.object(outbox, '_loop', None), \
+                mock.patch.object(outbox, '_event', None):
+            outbox.start(loop)
+            self.assertIsNone(outbox._loop)
+            loop.run_until_complete(asyncio.sleep(0))
+            self.assertIs(outbox._loop, loop)
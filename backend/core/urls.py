@@ -5,7 +5,9 @@ from .views import (
     # Importas normalmente todos tus viewsets/clases como antes
     UsuarioViewSet, HotelViewSet, LugarTuristicoViewSet,
     PagoViewSet, HabitacionViewSet, ReservaViewSet, PaqueteViewSet, SugerenciasViewSet,
-    NotificationViewSet, home, LLMGenerateView, HabitacionDisponibilidadView,
+    NotificationViewSet, ReviewViewSet, home, LLMGenerateView, HabitacionDisponibilidadView, DisponibilidadBusquedaView,
+    HotelCalendarioView, EstadisticasReservasView, ExportarView,
+    CatalogoCacheStatsView, CatalogoBusquedaView, CatalogoTextoView, CercanosView, CatalogoLoteView,
     RegistroView, LoginView, SuperUsuarioRegistroView, SuperadminLoginView, MeView,
     ChatSessionViewSet, healthz,   # <-- añadimos healthz
 )
@@ -21,6 +23,7 @@ router.register(r'habitaciones', HabitacionViewSet)
 router.register(r'reservas', ReservaViewSet)
 router.register(r'paquetes', PaqueteViewSet)
 router.register(r'sugerencias', SugerenciasViewSet)
+router.register(r'reviews', ReviewViewSet, basename='reviews')
 router.register(r'notifications', NotificationViewSet, basename='notifications')
 router.register(r'chat/sessions', ChatSessionViewSet, basename='chat-sessions')
 reserva_cancelar_view = ReservaViewSet.as_view({'post': 'cancelar'})
@@ -38,7 +41,16 @@ urlpatterns = [
     path('auth/github/login-url/', GitHubLoginURLAPIView.as_view(), name='github-login-url'),
     path('auth/github/exchange/', GitHubExchangeCodeAPIView.as_view(), name='github-exchange'),
     path('llm/generate/', LLMGenerateView.as_view(), name='llm-generate'),
+    path('habitaciones/disponibles/', DisponibilidadBusquedaView.as_view(), name='habitaciones-disponibles'),
     path('habitaciones/<str:num>/disponibilidad/', HabitacionDisponibilidadView.as_view(), name='habitacion-disponibilidad'),
+    path('hoteles/<int:pk>/calendario/', HotelCalendarioView.as_view(), name='hotel-calendario'),
+    path('estadisticas/reservas/', EstadisticasReservasView.as_view(), name='estadisticas-reservas'),
+    path('catalogo/buscar/<str:entidad>/', CatalogoBusquedaView.as_view(), name='catalogo-buscar'),
+    path('catalogo/texto/', CatalogoTextoView.as_view(), name='catalogo-texto'),
+    path('cercanos/', CercanosView.as_view(), name='cercanos'),
+    path('catalogo/lote/<str:entidad>/', CatalogoLoteView.as_view(), name='catalogo-lote'),
+    path('catalogo/cache/', CatalogoCacheStatsView.as_view(), name='catalogo-cache'),
+    path('exportar/<str:entidad>/', ExportarView.as_view(), name='exportar'),
     path('reservas/<int:pk>/cancelar/', reserva_cancelar_view, name='reserva-cancelar'),
     path('reservas/<int:pk>/reactivar/', reserva_reactivar_view, name='reserva-reactivar'),
     path('', include(router.urls)),
@@ -1,18 +1,24 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django.http import HttpResponse
 from .models import (
-    Usuario, Hotel, LugarTuristico, Pago, Habitacion, Reserva, Paquete, Sugerencias, Notification, ChatSession
+    Usuario, Hotel, LugarTuristico, Pago, Habitacion, Reserva, Paquete, Sugerencias, Notification, ChatSession,
+    OcupacionDiaria, Review
 )
 from .serializers import (
     UsuarioSerializer, HotelSerializer, LugarTuristicoSerializer, PagoSerializer,
     HabitacionSerializer, ReservaSerializer, PaqueteSerializer, SugerenciasSerializer,
     LoginSerializer, RegistroSerializer, SuperUsuarioRegistroSerializer, NotificationSerializer,
     ChatSessionListSerializer, ChatSessionDetailSerializer, ChatSessionCreateSerializer, ChatSessionPatchSerializer,
-    ChatMessageSerializer
+    ChatMessageSerializer, HabitacionDisponibleSerializer, ReservaLoteSerializer, ReviewSerializer
 )
 from .permissions import IsSuperAdmin
+from .fieldsets import SparseFieldsMixin
+from .pagination import StandardPagination, OptionalPaginationMixin
+from .response_cache import CachedCatalogMixin
+from . import bulk, exports, geo, occupancy, outbox, response_cache, search
 import logging
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -25,7 +31,11 @@ from django.contrib.auth.hashers import check_password
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.utils import timezone
-from django.db.models import Q
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.core.cache import caches
+from django.db.models import Q, F, Exists, OuterRef, Subquery, Min, Count, Sum
+from django.db.models.functions import TruncMonth
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +49,8 @@ def healthz(request):
 # Import del LLM en tiempo de uso y con fallback robusto
 def send_message_safe(prompt, chat_id=None, usuario=None, **kwargs):
     try:
+        from .knowledge_sync import sync_if_due
+        sync_if_due()
         from llm.llm_client import send_message as _send_message
         return _send_message(prompt, chat_id=chat_id, usuario=usuario, **kwargs)
     except Exception as e:
@@ -69,23 +81,37 @@ class HabitacionDisponibilidadView(APIView):
         if ventana_hasta < ventana_desde:
             return Response({"error": "'hasta' no puede ser anterior a 'desde'"}, status=400)
 
-        reservas = (Reserva.objects
-                    .filter(
-            num_habitacion=habitacion,
-            estado=True,
-            fecha_reserva__lte=ventana_hasta,
-            fecha_caducidad__gte=ventana_desde
-        )
-                    .order_by('fecha_reserva'))
+        # La versión del hotel cambia con cada reserva o habitación tocada: validar cuesta un get al cache.
+        etag = response_cache.make_etag(habitacion.num, habitacion.codigo_hotel_id,
+                                        occupancy.hotel_version(habitacion.codigo_hotel_id),
+                                        ventana_desde, ventana_hasta)
+        if response_cache.not_modified(request, etag):
+            return response_cache.set_validators(Response(status=304), etag)
+
+        origin, bits, tramos = occupancy.get_entry(habitacion.num)
+        if occupancy.covers(origin, ventana_desde, ventana_hasta):
+            # Reservas y próximo día libre salen del cache de ocupación, sin consultar Reserva.
+            intervalos = [{"inicio": ini.isoformat(), "fin": fin.isoformat()}
+                          for ini, fin in occupancy.reserved_intervals(tramos, ventana_desde, ventana_hasta)]
+            cursor = occupancy.next_free_day(origin, bits, ventana_desde)
+        else:
+            reservas = (Reserva.objects
+                        .filter(
+                num_habitacion=habitacion,
+                estado=True,
+                fecha_reserva__lte=ventana_hasta,
+                fecha_caducidad__gte=ventana_desde
+            )
+                        .order_by('fecha_reserva'))
 
-        intervalos = [{"inicio": r.fecha_reserva.isoformat(), "fin": r.fecha_caducidad.isoformat()} for r in reservas]
+            intervalos = [{"inicio": r.fecha_reserva.isoformat(), "fin": r.fecha_caducidad.isoformat()} for r in reservas]
 
-        cursor = ventana_desde
-        for r in reservas:
-            if r.fecha_reserva <= cursor <= r.fecha_caducidad:
-                cursor = r.fecha_caducidad + timedelta(days=1)
+            cursor = ventana_desde
+            for r in reservas:
+                if r.fecha_reserva <= cursor <= r.fecha_caducidad:
+                    cursor = r.fecha_caducidad + timedelta(days=1)
 
-        return Response({
+        return response_cache.set_validators(Response({
             'habitacion': habitacion.num,
             'codigo_hotel': habitacion.codigo_hotel_id,
             'intervalos_reservados': intervalos,
@@ -94,9 +120,442 @@ class HabitacionDisponibilidadView(APIView):
                 'desde': ventana_desde.isoformat(),
                 'hasta': ventana_hasta.isoformat()
             }
+        }), etag)
+
+
+def _parse_month(value, default):
+    if not value:
+        return default
+    year, month = value.split('-')[:2]
+    return date(int(year), int(month), 1)
+
+
+class HotelCalendarioView(APIView):
+    """
+    Calendario mensual de un hotel: habitaciones libres y precio mínimo libre por día.
+    Parámetros 'desde' y 'hasta' en formato YYYY-MM (por defecto el mes actual), máximo 12 meses.
+    Se arma con los bitmaps de ocupación y responde 304 si el ETag no cambió.
+    """
+    permission_classes = [AllowAny]
+    MAX_MONTHS = 12
+    CACHE_TTL = 3600
+
+    def get(self, request, pk):
+        hotel = Hotel.objects.filter(pk=pk, estado=True).only('id_hotel').first()
+        if hotel is None:
+            return Response({"error": "Hotel no encontrado"}, status=404)
+        hoy = date.today()
+        try:
+            desde = _parse_month(request.query_params.get('desde'), hoy.replace(day=1))
+            hasta_mes = _parse_month(request.query_params.get('hasta'), desde)
+        except ValueError:
+            return Response({"error": "Formato de mes inválido (YYYY-MM)"}, status=400)
+        meses = (hasta_mes.year - desde.year) * 12 + hasta_mes.month - desde.month + 1
+        if meses < 1:
+            return Response({"error": "'hasta' no puede ser anterior a 'desde'"}, status=400)
+        if meses > self.MAX_MONTHS:
+            return Response({"error": f"El rango máximo es de {self.MAX_MONTHS} meses"}, status=400)
+        siguiente = date(hasta_mes.year + hasta_mes.month // 12, hasta_mes.month % 12 + 1, 1)
+        hasta = siguiente - timedelta(days=1)
+
+        version = occupancy.hotel_version(hotel.pk)
+        etag = f'"{hotel.pk}-{version}-{desde:%Y%m}-{hasta:%Y%m}"'
+        if response_cache.not_modified(request, etag):
+            return response_cache.set_validators(Response(status=304), etag)
+
+        cache = caches[occupancy.CACHE_ALIAS]
+        cache_key = f"calendario:{hotel.pk}:{version}:{desde:%Y%m}:{hasta:%Y%m}"
+        data = cache.get(cache_key)
+        if data is None:
+            data = self._build(hotel, desde, hasta)
+            cache.set(cache_key, data, self.CACHE_TTL)
+        return response_cache.set_validators(Response(data), etag)
+
+    def _build(self, hotel, desde, hasta):
+        habitaciones = list(Habitacion.objects
+                            .filter(codigo_hotel=hotel, disponible=True)
+                            .order_by('precio', 'num')
+                            .values_list('num', 'precio'))
+        nums = [num for num, _ in habitaciones]
+        bitmaps = occupancy.get_many(nums)
+        if any(not occupancy.covers(origin, desde, hasta) for origin, _ in bitmaps.values()):
+            # Meses fuera del horizonte (p.ej. pasados): bitmaps temporales con una sola consulta.
+            bitmaps = occupancy.build_for(nums, desde, (hasta - desde).days + 1)
+
+        dias = []
+        dia = desde
+        while dia <= hasta:
+            libres, precio_min = 0, None
+            for num, precio in habitaciones:
+                origin, bits = bitmaps[num]
+                if not (bits >> (dia - origin).days) & 1:
+                    libres += 1
+                    if precio_min is None:
+                        precio_min = precio
+            dias.append({"fecha": dia.isoformat(), "habitaciones_libres": libres, "precio_min": precio_min})
+            dia += timedelta(days=1)
+        return {
+            "hotel": hotel.pk,
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "total_habitaciones": len(habitaciones),
+            "dias": dias,
+        }
+
+
+def habitaciones_libres(desde, hasta):
+    """Habitaciones activas sin reservas activas que se solapen con [desde, hasta] (anti-join)."""
+    ocupadas = Reserva.objects.filter(
+        Reserva.VIGENTE,
+        num_habitacion=OuterRef('pk'),
+        fecha_reserva__lte=hasta,
+        fecha_caducidad__gte=desde
+    )
+    return Habitacion.objects.filter(disponible=True, codigo_hotel__estado=True).filter(~Exists(ocupadas))
+
+
+class DisponibilidadBusquedaView(APIView):
+    """
+    Busca habitaciones libres entre 'desde' y 'hasta' agrupadas por hotel.
+    Filtros: huespedes, departamento, precio_min, precio_max. Orden: precio, -precio, calificacion, -calificacion.
+    """
+    permission_classes = [AllowAny]
+    ORDERINGS = {
+        'precio': ('precio_min', 'id_hotel'),
+        '-precio': ('-precio_min', 'id_hotel'),
+        'calificacion': ('calificacion', 'precio_min', 'id_hotel'),
+        '-calificacion': ('-calificacion', 'precio_min', 'id_hotel'),
+    }
+
+    def get(self, request):
+        params = request.query_params
+        if not params.get('desde') or not params.get('hasta'):
+            return Response({"error": "Los parámetros 'desde' y 'hasta' son requeridos"}, status=400)
+        try:
+            desde = date.fromisoformat(params['desde'])
+            hasta = date.fromisoformat(params['hasta'])
+        except ValueError:
+            return Response({"error": "Formato de fecha inválido (YYYY-MM-DD)"}, status=400)
+        if hasta < desde:
+            return Response({"error": "'hasta' no puede ser anterior a 'desde'"}, status=400)
+
+        orden = params.get('orden', 'precio')
+        if orden not in self.ORDERINGS:
+            return Response({"error": f"Orden inválido. Opciones: {', '.join(self.ORDERINGS)}"}, status=400)
+
+        libres = habitaciones_libres(desde, hasta)
+        try:
+            if params.get('huespedes'):
+                libres = libres.filter(cant_huespedes__gte=int(params['huespedes']))
+            if params.get('precio_min'):
+                libres = libres.filter(precio__gte=float(params['precio_min']))
+            if params.get('precio_max'):
+                libres = libres.filter(precio__lte=float(params['precio_max']))
+        except ValueError:
+            return Response({"error": "huespedes, precio_min y precio_max deben ser numéricos"}, status=400)
+        departamento = (params.get('departamento') or '').strip()
+        if departamento:
+            libres = libres.filter(codigo_hotel__departamento__iexact=departamento)
+
+        por_hotel = libres.filter(codigo_hotel=OuterRef('pk')).order_by().values('codigo_hotel')
+        hoteles = (Hotel.objects
+                   .annotate(
+                       precio_min=Subquery(por_hotel.annotate(m=Min('precio')).values('m')),
+                       habitaciones_libres=Subquery(por_hotel.annotate(c=Count('pk')).values('c')),
+                   )
+                   .filter(precio_min__isnull=False)
+                   .order_by(*self.ORDERINGS[orden]))
+
+        paginator = StandardPagination()
+        page = paginator.paginate_queryset(hoteles, request, view=self)
+
+        habitaciones = {}
+        for hab in libres.filter(codigo_hotel__in=[h.id_hotel for h in page]).order_by('precio', 'num'):
+            habitaciones.setdefault(hab.codigo_hotel_id, []).append(hab)
+
+        results = [{
+            "hotel": HotelSerializer(h).data,
+            "precio_min": h.precio_min,
+            "habitaciones_libres": h.habitaciones_libres,
+            "habitaciones": HabitacionDisponibleSerializer(habitaciones.get(h.id_hotel, []), many=True).data,
+        } for h in page]
+        response = paginator.get_paginated_response(results)
+        response.data['ventana_consulta'] = {'desde': desde.isoformat(), 'hasta': hasta.isoformat()}
+        return response
+
+
+class EstadisticasReservasView(APIView):
+    """
+    Estadísticas de reservas desde los rollups diarios (OcupacionDiaria), sin recorrer Reserva.
+    Parámetros: desde, hasta (YYYY-MM-DD; por defecto los últimos 30 días), agrupar=dia|mes,
+    por=total|hotel|departamento, hotel, departamento.
+    """
+    permission_classes = [IsSuperAdmin]
+    AGRUPAR = ('dia', 'mes')
+    POR = {'total': [], 'hotel': ['hotel', 'hotel__nombre'], 'departamento': ['hotel__departamento']}
+    MAX_DIAS = 731
+
+    def get(self, request):
+        params = request.query_params
+        hoy = date.today()
+        try:
+            hasta = date.fromisoformat(params['hasta']) if params.get('hasta') else hoy
+            desde = date.fromisoformat(params['desde']) if params.get('desde') else hasta - timedelta(days=29)
+        except ValueError:
+            return Response({"error": "Formato de fecha inválido (YYYY-MM-DD)"}, status=400)
+        try:
+            hotel = int(params['hotel']) if params.get('hotel') else None
+        except ValueError:
+            return Response({"error": "hotel debe ser un entero"}, status=400)
+        if hasta < desde:
+            return Response({"error": "'hasta' no puede ser anterior a 'desde'"}, status=400)
+        if (hasta - desde).days >= self.MAX_DIAS:
+            return Response({"error": f"El rango máximo es de {self.MAX_DIAS} días"}, status=400)
+        agrupar = params.get('agrupar', 'dia')
+        por = params.get('por', 'total')
+        if agrupar not in self.AGRUPAR or por not in self.POR:
+            return Response({"error": "agrupar debe ser dia|mes y por debe ser total|hotel|departamento"}, status=400)
+
+        rollups = OcupacionDiaria.objects.filter(fecha__range=(desde, hasta))
+        habitaciones = Habitacion.objects.all()
+        if hotel is not None:
+            rollups = rollups.filter(hotel_id=hotel)
+            habitaciones = habitaciones.filter(codigo_hotel_id=hotel)
+        if params.get('departamento'):
+            rollups = rollups.filter(hotel__departamento__iexact=params['departamento'])
+            habitaciones = habitaciones.filter(codigo_hotel__departamento__iexact=params['departamento'])
+
+        campos = self.POR[por]
+        periodo = TruncMonth('fecha') if agrupar == 'mes' else F('fecha')
+        filas = (rollups.annotate(periodo=periodo)
+                 .values('periodo', *campos)
+                 .annotate(noches=Sum('noches'), reservas=Sum('reservas'),
+                           cancelaciones=Sum('cancelaciones'), ingresos=Sum('ingresos'))
+                 .order_by('periodo', *campos))
+
+        # Capacidad = habitaciones del grupo x días del período dentro de [desde, hasta]
+        campos_hab = [c.replace('hotel', 'codigo_hotel', 1) for c in campos[:1]]
+        if campos_hab:
+            capacidad = {tuple(r[c] for c in campos_hab): r['n']
+                         for r in habitaciones.order_by().values(*campos_hab).annotate(n=Count('pk'))}
+        else:
+            capacidad = {(): habitaciones.count()}
+
+        def dias_periodo(p):
+            if agrupar == 'dia':
+                return 1
+            fin_mes = date(p.year + p.month // 12, p.month % 12 + 1, 1) - timedelta(days=1)
+            return (min(fin_mes, hasta) - max(p, desde)).days + 1
+
+        resultados = []
+        for f in filas:
+            cap = capacidad.get(tuple(f[c] for c in campos[:1]), 0) * dias_periodo(f['periodo'])
+            fila = {
+                "periodo": f['periodo'].strftime('%Y-%m') if agrupar == 'mes' else f['periodo'].isoformat(),
+                "noches": f['noches'],
+                "ocupacion": round(f['noches'] / cap, 4) if cap else None,
+                "reservas": f['reservas'],
+                "cancelaciones": f['cancelaciones'],
+                "ingresos": round(f['ingresos'], 2),
+            }
+            if por == 'hotel':
+                fila.update({"hotel": f['hotel'], "hotel_nombre": f['hotel__nombre']})
+            elif por == 'departamento':
+                fila["departamento"] = f['hotel__departamento']
+            resultados.append(fila)
+
+        totales = rollups.aggregate(noches=Sum('noches'), reservas=Sum('reservas'),
+                                    cancelaciones=Sum('cancelaciones'), ingresos=Sum('ingresos'))
+        cap_total = sum(capacidad.values()) * ((hasta - desde).days + 1)
+        return Response({
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "agrupar": agrupar,
+            "por": por,
+            "totales": {
+                "noches": totales['noches'] or 0,
+                "ocupacion": round((totales['noches'] or 0) / cap_total, 4) if cap_total else None,
+                "reservas": totales['reservas'] or 0,
+                "cancelaciones": totales['cancelaciones'] or 0,
+                "ingresos": round(totales['ingresos'] or 0, 2),
+            },
+            "resultados": resultados,
         })
 
 
+class ExportarView(APIView):
+    """
+    Export en streaming para superadmins: /exportar/<reservas|pagos|usuarios>/?formato=csv|ndjson
+    Filtros: desde, hasta, hotel, estado.
+    """
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request, entidad):
+        if entidad not in exports.EXPORTS:
+            return Response({"error": f"Entidad inválida. Opciones: {', '.join(exports.EXPORTS)}"}, status=404)
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exports.FORMATOS:
+            return Response({"error": "formato debe ser csv o ndjson"}, status=400)
+        try:
+            return exports.stream(entidad, formato, request.query_params)
+        except ValueError as e:
+            return Response({"error": f"Parámetros inválidos: {e}"}, status=400)
+
+
+class CatalogoCacheStatsView(APIView):
+    """Aciertos, fallos y tiempos de reconstrucción del cache de respuestas del catálogo (proceso actual)."""
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request):
+        return Response(response_cache.stats())
+
+
+class CatalogoBusquedaView(APIView):
+    """
+    Búsqueda facetada: GET catalogo/buscar/<hoteles|lugares|paquetes>/ con filtros combinables
+    (departamento y tipo admiten varios valores separados por coma), precio_min/precio_max,
+    calificacion_min (hoteles), hotel/lugar (paquetes) y orden. Devuelve una página de
+    resultados y los conteos por faceta.
+    """
+    permission_classes = [AllowAny]
+    SERIALIZERS = {'hoteles': HotelSerializer, 'lugares': LugarTuristicoSerializer, 'paquetes': PaqueteSerializer}
+
+    def get(self, request, entidad):
+        if entidad not in search.ENTIDADES:
+            return Response({"error": f"Entidad inválida. Opciones: {', '.join(search.ENTIDADES)}"}, status=400)
+        key, _ = response_cache.cache_key('busqueda', request, search.ENTIDADES[entidad][3], entidad)
+        etag = response_cache.make_etag(key)
+        if response_cache.not_modified(request, etag):
+            return response_cache.set_validators(Response(status=304), etag)
+
+        def build():
+            resultados, facetas = search.buscar(entidad, request.query_params)
+            paginator = StandardPagination()
+            page = paginator.paginate_queryset(resultados, request, view=self)
+            items = self.SERIALIZERS[entidad](page, many=True).data
+            if entidad == 'hoteles':
+                for item, hotel in zip(items, page):
+                    item['precio_desde'] = hotel.precio_desde
+            data = paginator.get_paginated_response(items).data
+            data['facetas'] = facetas
+            return data
+
+        try:
+            data, hit = response_cache.cached_data('busqueda', key, build)
+        except ValueError as e:
+            return Response({"error": f"Parámetros inválidos: {e}"}, status=400)
+        return response_cache.set_validators(Response(data, headers={"X-Cache": "HIT" if hit else "MISS"}), etag)
+
+
+class CatalogoTextoView(APIView):
+    """
+    Búsqueda de texto libre sin acentos sobre hoteles y lugares: GET catalogo/texto/?q=...
+    ordenada por relevancia y paginada; con modo=sugerir devuelve solo nombres para autocompletar.
+    entidad=hoteles|lugares limita a una de las dos.
+    """
+    permission_classes = [AllowAny]
+    MIN_CHARS = 2
+
+    def get(self, request):
+        q = (request.query_params.get('q') or '').strip()
+        if len(q) < self.MIN_CHARS:
+            return Response({"error": f"q debe tener al menos {self.MIN_CHARS} caracteres"}, status=400)
+        entidad = request.query_params.get('entidad')
+        if entidad and entidad not in search.TEXTO:
+            return Response({"error": f"Entidad inválida. Opciones: {', '.join(search.TEXTO)}"}, status=400)
+        entidades = (entidad,) if entidad else tuple(search.TEXTO)
+        sugerir = request.query_params.get('modo') == 'sugerir'
+
+        key, _ = response_cache.cache_key('texto', request, ('hotel', 'lugar'))
+
+        def build():
+            if sugerir:
+                return {"resultados": search.sugerir(q, entidades=entidades)}
+            paginator = StandardPagination()
+            page = paginator.paginate_queryset(search.texto(q, entidades), request, view=self)
+            return paginator.get_paginated_response(page).data
+
+        data, hit = response_cache.cached_data('texto', key, build)
+        return Response(data, headers={"X-Cache": "HIT" if hit else "MISS"})
+
+
+class CercanosView(APIView):
+    """
+    Hoteles o lugares a menos de radio_km (por defecto 10) de un punto, ordenados por distancia:
+    GET cercanos/?entidad=hoteles|lugares&lat=..&lng=.. o bien &lugar=<id> / &hotel=<id> como origen.
+    """
+    permission_classes = [AllowAny]
+    SERIALIZERS = {'hoteles': HotelSerializer, 'lugares': LugarTuristicoSerializer}
+    ORIGENES = {'lugar': LugarTuristico, 'hotel': Hotel}
+    MAX_LIMITE = 100
+
+    def get(self, request):
+        params = request.query_params
+        entidad = params.get('entidad', 'hoteles')
+        if entidad not in geo.ENTIDADES:
+            return Response({"error": f"Entidad inválida. Opciones: {', '.join(geo.ENTIDADES)}"}, status=400)
+        try:
+            radio_km = float(params.get('radio_km', 10))
+            limite = int(params.get('limite', 20))
+            if not 1 <= limite <= self.MAX_LIMITE:
+                raise ValueError(f"limite debe estar entre 1 y {self.MAX_LIMITE}")
+            excluir = None
+            origen = next((k for k in self.ORIGENES if params.get(k)), None)
+            if origen:
+                obj = self.ORIGENES[origen].objects.filter(pk=int(params[origen])).only('latitud', 'longitud').first()
+                if obj is None or obj.latitud is None or obj.longitud is None:
+                    return Response({"error": f"El {origen} no existe o no tiene coordenadas"}, status=404)
+                lat, lng = obj.latitud, obj.longitud
+                if self.ORIGENES[origen] is geo.ENTIDADES[entidad][0]:
+                    excluir = obj.pk  # no listar el propio origen
+            else:
+                lat, lng = float(params['lat']), float(params['lng'])
+            resultados = geo.cercanos(entidad, lat, lng, radio_km, limite, excluir=excluir)
+        except KeyError:
+            return Response({"error": "Indica lat y lng, o un lugar/hotel de origen"}, status=400)
+        except ValueError as e:
+            return Response({"error": f"Parámetros inválidos: {e}"}, status=400)
+
+        items = self.SERIALIZERS[entidad](resultados, many=True).data
+        for item, obj in zip(items, resultados):
+            item['distancia_km'] = obj.distancia_km
+        return Response({"origen": {"lat": lat, "lng": lng}, "radio_km": radio_km, "resultados": items})
+
+
+class CatalogoLoteView(APIView):
+    """
+    Operación masiva de superadmin: POST catalogo/lote/<hoteles|lugares|paquetes|habitaciones>/
+    {"filtro": {...}, "accion": "actualizar|activar|desactivar|ajustar_precio",
+     "campos": {...}, "porcentaje": 10, "batch_size": 1000, "dry_run": false}
+    """
+    permission_classes = [IsSuperAdmin]
+
+    def post(self, request, entidad):
+        if entidad not in bulk.ENTIDADES:
+            return Response({"error": f"Entidad inválida. Opciones: {', '.join(bulk.ENTIDADES)}"}, status=400)
+        data = request.data
+        try:
+            qs = bulk.queryset(entidad, data.get('filtro'))
+            update = bulk.valores(entidad, data.get('accion'), data.get('campos'), data.get('porcentaje'))
+            batch_size = min(int(data.get('batch_size') or bulk.BATCH_SIZE), bulk.MAX_BATCH_SIZE)
+            if batch_size < 1:
+                raise ValueError("batch_size debe ser positivo")
+        except DjangoValidationError as e:
+            return Response({"error": e.messages}, status=400)
+        except (TypeError, ValueError) as e:
+            return Response({"error": f"Parámetros inválidos: {e}"}, status=400)
+
+        if data.get('dry_run'):
+            return Response({"afectados": qs.count(), "dry_run": True})
+        try:
+            afectados, lotes = bulk.aplicar(entidad, qs, update, batch_size)
+        except bulk.AplicacionParcial as e:
+            # Los lotes anteriores quedaron aplicados: se informan para poder reintentar el resto.
+            return Response({"error": f"Falló el lote {e.lotes + 1}: {e}", "afectados": e.afectados, "lotes": e.lotes},
+                            status=500)
+        return Response({"afectados": afectados, "lotes": lotes})
+
+
 class RegistroView(APIView):
     permission_classes = [AllowAny]
 
@@ -199,7 +658,7 @@ class MeView(APIView):
         return Response(serializer.data)
 
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
     authentication_classes = [JWTAuthentication]
@@ -250,7 +709,8 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         return super().partial_update(request, *args, **kwargs)
 
 
-class HotelViewSet(viewsets.ModelViewSet):
+class HotelViewSet(CachedCatalogMixin, SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
+    cache_scope = 'hotel'
     queryset = Hotel.objects.all()
     serializer_class = HotelSerializer
 
@@ -262,8 +722,8 @@ class HotelViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if hasattr(user, "is_authenticated") and getattr(user, "rol", None) == "superadmin":
-            return Hotel.objects.all()
-        return Hotel.objects.filter(estado=True)
+            return Hotel.objects.defer('busqueda')
+        return Hotel.objects.filter(estado=True).defer('busqueda')
 
     def destroy(self, request, *args, **kwargs):
         hotel = self.get_object()
@@ -272,7 +732,8 @@ class HotelViewSet(viewsets.ModelViewSet):
         return Response({"message": "Hotel desactivado correctamente"}, status=status.HTTP_200_OK)
 
 
-class LugarTuristicoViewSet(viewsets.ModelViewSet):
+class LugarTuristicoViewSet(CachedCatalogMixin, SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
+    cache_scope = 'lugar'
     queryset = LugarTuristico.objects.all()
     serializer_class = LugarTuristicoSerializer
 
@@ -284,8 +745,8 @@ class LugarTuristicoViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if hasattr(user, "is_authenticated") and getattr(user, "rol", None) == "superadmin":
-            return LugarTuristico.objects.all()
-        return LugarTuristico.objects.filter(estado=True)
+            return LugarTuristico.objects.defer('busqueda')
+        return LugarTuristico.objects.filter(estado=True).defer('busqueda')
 
     def destroy(self, request, *args, **kwargs):
         lugar = self.get_object()
@@ -294,7 +755,7 @@ class LugarTuristicoViewSet(viewsets.ModelViewSet):
         return Response({"message": "Lugar turístico desactivado correctamente"}, status=status.HTTP_200_OK)
 
 
-class PagoViewSet(viewsets.ModelViewSet):
+class PagoViewSet(SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
     queryset = Pago.objects.all()
     serializer_class = PagoSerializer
 
@@ -306,7 +767,8 @@ class PagoViewSet(viewsets.ModelViewSet):
         return [AllowAny()]
 
 
-class HabitacionViewSet(viewsets.ModelViewSet):
+class HabitacionViewSet(CachedCatalogMixin, SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
+    cache_scope = 'habitacion'
     queryset = Habitacion.objects.all()
     serializer_class = HabitacionSerializer
 
@@ -316,7 +778,7 @@ class HabitacionViewSet(viewsets.ModelViewSet):
         return [AllowAny()]
 
     def get_queryset(self):
-        queryset = Habitacion.objects.all()
+        queryset = Habitacion.objects.select_related('codigo_hotel').defer('codigo_hotel__busqueda')
         codigo_hotel = self.request.query_params.get('codigo_hotel')
         user = self.request.user
         if not (hasattr(user, "is_authenticated") and getattr(user, "rol", None) == "superadmin"):
@@ -332,7 +794,7 @@ class HabitacionViewSet(viewsets.ModelViewSet):
         return Response({"message": "Habitación desactivada correctamente"}, status=status.HTTP_200_OK)
 
 
-class ReservaViewSet(viewsets.ModelViewSet):
+class ReservaViewSet(SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
     queryset = Reserva.objects.all()
     serializer_class = ReservaSerializer
     authentication_classes = [JWTAuthentication]
@@ -340,6 +802,43 @@ class ReservaViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         return [IsAuthenticated()]
 
+    ORDERINGS = ('fecha_reserva', 'fecha_caducidad', 'fecha_creacion', 'id_reserva')
+    PAGO_ESTADOS = set(Pago.Estado.values) | {'sin_pago'}
+
+    def _ordering(self):
+        orden = self.request.query_params.get('ordering', '-fecha_reserva')
+        if orden.lstrip('-') not in self.ORDERINGS:
+            raise ValidationError({"ordering": f"Opciones: {', '.join(self.ORDERINGS)} (prefijo '-' para descendente)"})
+        desc = orden.startswith('-')
+        tie = '-id_reserva' if desc else 'id_reserva'
+        return (orden,) if orden.lstrip('-') == 'id_reserva' else (orden, tie)
+
+    def get_cursor_ordering(self):
+        return self._ordering()
+
+    def _filter(self, qs):
+        params = self.request.query_params
+        try:
+            if params.get('hotel'):
+                qs = qs.filter(codigo_hotel_id=int(params['hotel']))
+            if params.get('habitacion'):
+                qs = qs.filter(num_habitacion_id=int(params['habitacion']))
+            # Reservas que se solapan con [desde, hasta]
+            if params.get('desde'):
+                qs = qs.filter(fecha_caducidad__gte=date.fromisoformat(params['desde']))
+            if params.get('hasta'):
+                qs = qs.filter(fecha_reserva__lte=date.fromisoformat(params['hasta']))
+        except ValueError:
+            raise ValidationError({"error": "hotel y habitacion deben ser enteros; desde y hasta YYYY-MM-DD"})
+        if params.get('vigentes') == 'true':
+            qs = qs.filter(archivada=False)
+        pago_estado = params.get('pago_estado')
+        if pago_estado:
+            if pago_estado not in self.PAGO_ESTADOS:
+                raise ValidationError({"pago_estado": f"Opciones: {', '.join(sorted(self.PAGO_ESTADOS))}"})
+            qs = qs.filter(id_pago__isnull=True) if pago_estado == 'sin_pago' else qs.filter(id_pago__estado=pago_estado)
+        return qs.order_by(*self._ordering())
+
     def get_queryset(self):
         user = self.request.user
         if not getattr(user, "is_authenticated", False):
@@ -360,7 +859,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
                     qs = qs.filter(estado=True)
             elif estado in ('true', 'false'):
                 qs = qs.filter(estado=(estado == 'true'))
-            return qs
+            return self._filter(qs)
 
         qs = Reserva.objects.filter(id_usuario=user)
         estado = self.request.query_params.get('estado')
@@ -368,7 +867,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
             qs = qs.filter(estado=(estado == 'true'))
         else:
             qs = qs.filter(estado=True)
-        return qs
+        return self._filter(qs)
 
     def create(self, request, *args, **kwargs):
         user = request.user
@@ -377,25 +876,39 @@ class ReservaViewSet(viewsets.ModelViewSet):
         data = request.data.copy()
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        instance = serializer.save(id_usuario=user)
+        with transaction.atomic():
+            instance = serializer.save(id_usuario=user)
+            outbox.notify(
+                user,
+                "Reserva exitosa",
+                f"Tu reserva #{instance.id_reserva} fue creada correctamente.",
+                f"/reservas/{instance.id_reserva}",
+                "new_reserva",
+            )
         output = self.get_serializer(instance)
 
-        try:
-            notif = Notification.objects.create(
-                usuario=user,
-                title="Reserva exitosa",
-                message=f"Tu reserva #{instance.id_reserva} fue creada correctamente.",
-                link=f"/reservas/{instance.id_reserva}"
-            )
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"user_{user.id}",
-                {"type": "notify", "payload": {"event": "new_reserva", "title": notif.title, "message": notif.message}}
+        return Response({"message": "Reserva creada correctamente", "reserva": output.data},
+                        status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='lote')
+    def lote(self, request):
+        """Crea varias reservas en una sola transacción (todas o ninguna) con una única notificación."""
+        user = request.user
+        serializer = ReservaLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            reservas = serializer.save(id_usuario=user)
+            ids = ", ".join(f"#{r.id_reserva}" for r in reservas)
+            outbox.notify(
+                user,
+                "Reservas exitosas",
+                f"Tus {len(reservas)} reservas ({ids}) fueron creadas correctamente.",
+                "/reservas",
+                "new_reserva",
             )
-        except Exception:
-            pass
 
-        return Response({"message": "Reserva creada correctamente", "reserva": output.data},
+        return Response({"message": f"{len(reservas)} reservas creadas correctamente",
+                         "reservas": ReservaSerializer(reservas, many=True).data},
                         status=status.HTTP_201_CREATED)
 
     def partial_update(self, request, *args, **kwargs):
@@ -422,23 +935,16 @@ class ReservaViewSet(viewsets.ModelViewSet):
         if not reserva.estado:
             return Response({"message": "La reserva ya está cancelada."}, status=200)
 
-        reserva.estado = False
-        reserva.save(update_fields=['estado'])
-
-        try:
-            notif = Notification.objects.create(
-                usuario=reserva.id_usuario,
-                title="Reserva cancelada",
-                message=f"Tu reserva #{reserva.id_reserva} fue cancelada.",
-                link=f"/reservas/{reserva.id_reserva}"
+        with transaction.atomic():
+            reserva.estado = False
+            reserva.save(update_fields=['estado'])
+            outbox.notify(
+                reserva.id_usuario,
+                "Reserva cancelada",
+                f"Tu reserva #{reserva.id_reserva} fue cancelada.",
+                f"/reservas/{reserva.id_reserva}",
+                "cancel_reserva",
             )
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"user_{reserva.id_usuario_id}",
-                {"type": "notify", "payload": {"event": "cancel_reserva", "title": notif.title, "message": notif.message}}
-            )
-        except Exception:
-            pass
 
         return Response({"message": "Reserva cancelada correctamente", "id_reserva": reserva.id_reserva}, status=200)
 
@@ -454,8 +960,8 @@ class ReservaViewSet(viewsets.ModelViewSet):
             return Response({"message": "La reserva ya está activa."}, status=200)
 
         overlap = Reserva.objects.filter(
+            Reserva.VIGENTE,
             num_habitacion=reserva.num_habitacion,
-            estado=True,
             fecha_reserva__lte=reserva.fecha_caducidad,
             fecha_caducidad__gte=reserva.fecha_reserva
         ).exclude(pk=reserva.pk).exists()
@@ -463,23 +969,21 @@ class ReservaViewSet(viewsets.ModelViewSet):
         if overlap:
             return Response({"error": "No se puede reactivar: solapa con otra reserva activa en ese rango."}, status=400)
 
-        reserva.estado = True
-        reserva.save(update_fields=['estado'])
-
         try:
-            notif = Notification.objects.create(
-                usuario=reserva.id_usuario,
-                title="Reserva reactivada",
-                message=f"Tu reserva #{reserva.id_reserva} fue reactivada.",
-                link=f"/reservas/{reserva.id_reserva}"
-            )
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"user_{reserva.id_usuario_id}",
-                {"type": "notify", "payload": {"event": "reactivar_reserva", "title": notif.title, "message": notif.message}}
-            )
-        except Exception:
-            pass
+            with transaction.atomic():
+                reserva.estado = True
+                reserva.save(update_fields=['estado'])
+                outbox.notify(
+                    reserva.id_usuario,
+                    "Reserva reactivada",
+                    f"Tu reserva #{reserva.id_reserva} fue reactivada.",
+                    f"/reservas/{reserva.id_reserva}",
+                    "reactivar_reserva",
+                )
+        except IntegrityError as e:
+            if not Reserva.is_overlap_violation(e):
+                raise
+            return Response({"error": "No se puede reactivar: solapa con otra reserva activa en ese rango."}, status=400)
 
         return Response({"message": "Reserva reactivada correctamente", "id_reserva": reserva.id_reserva}, status=200)
 
@@ -497,7 +1001,8 @@ class ReservaViewSet(viewsets.ModelViewSet):
         return Response({"message": "Reserva desactivada correctamente"}, status=status.HTTP_200_OK)
 
 
-class PaqueteViewSet(viewsets.ModelViewSet):
+class PaqueteViewSet(CachedCatalogMixin, SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
+    cache_scope = 'paquete'
     queryset = Paquete.objects.all()
     serializer_class = PaqueteSerializer
 
@@ -508,9 +1013,11 @@ class PaqueteViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = (Paquete.objects.select_related('id_hotel', 'id_lugar', 'resumen')
+                    .defer('id_hotel__busqueda', 'id_lugar__busqueda'))
         if hasattr(user, "is_authenticated") and getattr(user, "rol", None) == "superadmin":
-            return Paquete.objects.all()
-        return Paquete.objects.filter(estado=True)
+            return queryset
+        return queryset.filter(estado=True)
 
     def destroy(self, request, *args, **kwargs):
         paquete = self.get_object()
@@ -527,7 +1034,7 @@ class PaqueteViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_201_CREATED)
 
 
-class SugerenciasViewSet(viewsets.ModelViewSet):
+class SugerenciasViewSet(SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
     queryset = Sugerencias.objects.all()
     serializer_class = SugerenciasSerializer
 
@@ -537,7 +1044,62 @@ class SugerenciasViewSet(viewsets.ModelViewSet):
         return [AllowAny()]
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
+    """
+    Reviews de hoteles, lugares y paquetes (filtros: hotel, lugar_turistico, paquete).
+    Cada cambio actualiza en la misma transacción los agregados del destino (core.ratings).
+    """
+    serializer_class = ReviewSerializer
+    FILTROS = ('hotel', 'lugar_turistico', 'paquete')
+
+    def get_permissions(self):
+        if self.action in ['list', 'retrieve']:
+            return [AllowAny()]
+        return [IsAuthenticated()]
+
+    def get_queryset(self):
+        user = self.request.user
+        qs = Review.objects.select_related('usuario')
+        if getattr(user, "rol", None) != "superadmin":
+            if self.action in ['list', 'retrieve']:
+                propias = Q(usuario_id=user.pk) if getattr(user, "is_authenticated", False) else Q(pk__in=[])
+                qs = qs.filter(Q(estado=True) | propias)
+            else:
+                qs = qs.filter(usuario_id=user.pk)  # solo el autor edita u oculta su review
+        try:
+            for campo in self.FILTROS:
+                if self.request.query_params.get(campo):
+                    qs = qs.filter(**{f'{campo}_id': int(self.request.query_params[campo])})
+        except ValueError:
+            raise ValidationError({"error": f"{', '.join(self.FILTROS)} deben ser enteros"})
+        return qs
+
+    def perform_create(self, serializer):
+        usuario_id = serializer.validated_data.pop('usuario_id', None)
+        if getattr(self.request.user, "rol", None) != "superadmin" or not usuario_id:
+            usuario_id = self.request.user.pk
+        with transaction.atomic():
+            serializer.save(usuario_id=usuario_id)
+
+    def perform_update(self, serializer):
+        serializer.validated_data.pop('usuario_id', None)
+        if getattr(self.request.user, "rol", None) != "superadmin":
+            serializer.validated_data.pop('estado', None)
+        with transaction.atomic():
+            # Fila bloqueada y releída: una edición u ocultamiento simultáneo espera y no se pisa ni se cuenta dos veces.
+            serializer.instance = Review.objects.select_for_update().get(pk=serializer.instance.pk)
+            serializer.save()
+
+    def destroy(self, request, *args, **kwargs):
+        review = self.get_object()
+        with transaction.atomic():
+            review = Review.objects.select_for_update().get(pk=review.pk)
+            review.estado = False
+            review.save(update_fields=['estado'])
+        return Response({"message": "Review ocultada correctamente"}, status=status.HTTP_200_OK)
+
+
+class NotificationViewSet(SparseFieldsMixin, OptionalPaginationMixin, viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
 
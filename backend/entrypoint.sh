@@ -1,7 +1,10 @@
 #!/bin/bash
 echo "Aplicando migraciones de la base de datos..."
 python manage.py migrate --noinput
+python manage.py createcachetable
 echo "Recolectando archivos estáticos..."
 python manage.py collectstatic --noinput
+echo "Compilando snapshot de la base de conocimiento del asistente..."
+python -m llm.snapshot || echo "No se pudo compilar el snapshot; el asistente usará el JSON."
 echo "Iniciando servidor Daphne en 0.0.0.0:${PORT}..."
 exec daphne -b 0.0.0.0 -p ${PORT} config.asgi:application
\ No newline at end of file
@@ -19,11 +19,38 @@ _DATA: Dict[str, Any] = {}
 _DEPTOS: List[Dict[str, Any]] = []
 _HOTELS: List[Dict[str, Any]] = []
 _PLACES: List[Dict[str, Any]] = []
+_PACKAGES: List[Dict[str, Any]] = []
 _HOTEL_INDEX: Dict[str, Dict[str, Any]] = {}
 _PLACE_INDEX: Dict[str, Dict[str, Any]] = {}
+# (nombre en minúsculas sin acentos, departamento); se arma una vez al cargar los datos.
+_DEP_KEYS: List[Tuple[str, Dict[str, Any]]] = []
+
+def _load_from_snapshot() -> bool:
+    global _DATA, _DEPTOS, _HOTELS, _PLACES, _HOTEL_INDEX, _PLACE_INDEX
+    try:
+        from llm.snapshot import load_snapshot
+        snap = load_snapshot(source_path=DATA_FILE_PATH)
+    except Exception as e:
+        logger.warning(f"Snapshot no disponible: {e}")
+        return False
+    if snap is None:
+        return False
+    _DATA = {"info_base_datos": snap.meta}
+    _DEPTOS = snap.records("departamentos")
+    _HOTELS = snap.records("hoteles")
+    _PLACES = snap.records("lugares_turisticos")
+    _HOTEL_INDEX = snap.index("hoteles")
+    _PLACE_INDEX = snap.index("lugares_turisticos")
+    logger.info(
+        f"MunayBol snapshot v{snap.meta.get('version')} ({snap.path}): "
+        f"deptos={len(_DEPTOS)} hoteles={len(_HOTELS)} lugares={len(_PLACES)}"
+    )
+    return True
 
 def load_data():
     global _DATA, _DEPTOS, _HOTELS, _PLACES, _HOTEL_INDEX, _PLACE_INDEX
+    if _load_from_snapshot():
+        return
     try:
         with open(DATA_FILE_PATH, 'r', encoding='utf-8') as f:
             _DATA = json.load(f)
@@ -54,9 +81,55 @@ def load_data():
 
 load_data()
 
+# Clave primaria de cada tipo de entidad del catálogo sincronizable
+_ENTITY_KEYS = {"hotel": "id_hotel", "lugar": "id_lugar", "paquete": "id_paquete"}
+
+def apply_catalog_changes(kind: str, changes: List[Tuple[Dict[str, Any], bool]]) -> List[Dict[str, Any]]:
+    """
+    Aplica cambios del catálogo (registro, activo) sobre las listas e índices en memoria.
+    Los registros se fusionan con el existente del mismo id (conservando campos extra del JSON);
+    los inactivos se retiran. Devuelve los registros activos resultantes.
+    Copy-on-write: las listas se reemplazan enteras, nunca se mutan en sitio.
+    """
+    global _HOTELS, _PLACES, _PACKAGES, _HOTEL_INDEX, _PLACE_INDEX
+    key = _ENTITY_KEYS[kind]
+    current = {"hotel": _HOTELS, "lugar": _PLACES, "paquete": _PACKAGES}[kind]
+    items = list(current)
+    positions = {it.get(key): i for i, it in enumerate(items) if it.get(key) is not None}
+    removed = set()
+    upserted = []
+    for record, active in changes:
+        pk = record.get(key)
+        pos = positions.get(pk)
+        if pos is None and not active:
+            continue
+        if not active:
+            removed.add(pos)
+            continue
+        merged = {**(items[pos] if pos is not None else {}), **record}
+        if pos is None:
+            positions[pk] = len(items)
+            items.append(merged)
+        else:
+            items[pos] = merged
+        upserted.append(merged)
+    if removed:
+        items = [it for i, it in enumerate(items) if i not in removed]
+    if kind == "hotel":
+        _HOTELS = items
+        _HOTEL_INDEX = {_norm_key(h.get("nombre","")): h for h in items if h.get("nombre")}
+    elif kind == "lugar":
+        _PLACES = items
+        _PLACE_INDEX = {_norm_key(p.get("nombre","")): p for p in items if p.get("nombre")}
+    else:
+        _PACKAGES = items
+    return upserted
+
 def _strip_accents(s: str) -> str:
     return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
 
+_DEP_KEYS = [(_strip_accents((d.get('nombre') or '').lower()), d) for d in _DEPTOS if d.get('nombre')]
+
 def _soft(v: Optional[str], fb: Optional[str] = None) -> Optional[str]:
     if v is None: return fb
     if isinstance(v, (int,float)): return str(v)
@@ -66,14 +139,13 @@ def _soft(v: Optional[str], fb: Optional[str] = None) -> Optional[str]:
 
 def _dep_name_from_query(query: str) -> str:
     q = _strip_accents(query.lower())
-    for d in _DEPTOS:
-        nombre = _strip_accents((d.get('nombre') or '').lower())
-        if nombre and (nombre in q or q in nombre or nombre.startswith(q)):
+    for nombre, d in _DEP_KEYS:
+        if nombre in q or q in nombre or nombre.startswith(q):
             return d.get('nombre') or ''
     return ''
 
 def _get_dep(dep_name: str) -> Optional[Dict[str, Any]]:
-    for d in _DEPTOS:
+    for _, d in _DEP_KEYS:
         if (d.get('nombre') or '').lower() == (dep_name or '').lower():
             return d
     return None
@@ -81,6 +153,8 @@ def _get_dep(dep_name: str) -> Optional[Dict[str, Any]]:
 def _filter_by_department(items: List[Dict[str, Any]], dep: str, dep_field: str) -> List[Dict[str, Any]]:
     if not dep: return []
     dep_norm = _strip_accents(dep.lower().replace(" ", ""))
+    if dep_field == "departamento" and hasattr(items, "by_departamento"):
+        return items.by_departamento(dep_norm)
     out=[]
     for it in items or []:
         val = _strip_accents((it.get(dep_field) or '').lower().replace(" ", ""))
@@ -97,11 +171,11 @@ def _norm_key(s:str)->str:
 
 def _match_hotels(prompt:str)->List[Dict[str,Any]]:
     nk = _norm_key(prompt)
-    return [h for k,h in _HOTEL_INDEX.items() if k and (k in nk or nk in k)][:1]  # solo el más relevante
+    return [_HOTEL_INDEX[k] for k in _HOTEL_INDEX if k and (k in nk or nk in k)][:1]  # solo el más relevante
 
 def _match_places(prompt:str)->List[Dict[str,Any]]:
     nk = _norm_key(prompt)
-    return [p for k,p in _PLACE_INDEX.items() if k and (k in nk or nk in k)][:1]  # solo el más relevante
+    return [_PLACE_INDEX[k] for k in _PLACE_INDEX if k and (k in nk or nk in k)][:1]  # solo el más relevante
 
 EXCLUDE_NON_BOLIVIAN_DISHES = {
     "papa a la huancaina","papas a la huancaina","papas arrugadas","papas arrugadas con queso"
@@ -205,13 +279,27 @@ def _maybe_images_for_item(item: Dict[str, Any], fallback_alt: str) -> List[Dict
         if url: out.append({"url": url, "alt": alt})
     return out
 
+def _nearby_hotels(place: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Hoteles más cercanos al lugar según la grilla de core.geo; sin BD o sin coordenadas, vacío.
+    if not place.get("id_lugar"):
+        return []
+    try:
+        from core.geo import hoteles_cerca_de_lugar
+        hoteles = hoteles_cerca_de_lugar(place["id_lugar"])
+    except Exception as e:
+        logger.warning(f"Hoteles cercanos no disponibles: {e}")
+        return []
+    return [{"nombre": h.nombre, "ubicacion": h.ubicacion, "calificacion": h.calificacion,
+             "distancia_km": h.distancia_km} for h in hoteles]
+
 def _build_structured(
         dep:Dict[str,Any],
         hotels:List[Dict[str,Any]],
         places:List[Dict[str,Any]],
         is_itinerary:bool,
         matched_hotels:List[Dict[str,Any]],
-        matched_places:List[Dict[str,Any]]
+        matched_places:List[Dict[str,Any]],
+        packages:Optional[List[Dict[str,Any]]]=None
 )->Dict[str,Any]:
     nombre_dep=dep.get("nombre") or ""
     pt,extras=_normalize_gastronomy(dep)
@@ -249,6 +337,16 @@ def _build_structured(
             "rango_precios_bs":_soft(h.get("rango_precios_bs"),None)
         })
 
+    paquetes_list=[]
+    for pq in (packages or [])[:3]:
+        paquetes_list.append({
+            "nombre":_soft(pq.get("nombre"),"Paquete"),
+            "tipo":_soft(pq.get("tipo"),None),
+            "precio_bs":pq.get("precio"),
+            "hotel":_soft(pq.get("hotel"),None),
+            "lugar":_soft(pq.get("lugar"),None)
+        })
+
     itinerary=_build_itinerary(dep) if is_itinerary and nombre_dep else None
 
     hotel_consulta=None
@@ -279,7 +377,8 @@ def _build_structured(
             "departamento":_soft(p.get("departamento"),""),
             "descripcion":_soft(p.get("descripcion"),"Descripción pendiente."),
             "horario":_soft(p.get("horario"),"N/D"),
-            "costos":costos_det
+            "costos":costos_det,
+            "hoteles_cercanos":_nearby_hotels(p)
         }
         lugar_images = _maybe_images_for_item(p, p.get("nombre") or "Lugar turístico")
 
@@ -292,6 +391,7 @@ def _build_structured(
         "resumen":resumen,
         "lugares_turisticos":lugares_list,
         "hoteles":hoteles_list,
+        "paquetes":paquetes_list,
         "gastronomia":{"plato_tradicional":pt,"extras":extras},
         "historia_cultura_festividades":{"aniversario":_soft(dep.get("fecha_aniversario"),"N/D"),"festividades":festividades},
         "informacion_practica":info_practica,
@@ -388,6 +488,7 @@ def send_message(
     # Filter lists based on department if found
     hotels = _filter_by_department(_HOTELS, dep.get("nombre") if dep else "", "departamento")
     places = _filter_by_department(_PLACES, dep.get("nombre") if dep else "", "departamento")
+    packages = _filter_by_department(_PACKAGES, dep.get("nombre") if dep else "", "departamento")
 
     # Specific matches
     matched_hotels = _match_hotels(prompt)
@@ -395,7 +496,7 @@ def send_message(
 
     # 2. Build Structured Data (Context)
     is_itinerary = _is_itinerary_request(prompt)
-    structured = _build_structured(dep or {}, hotels, places, is_itinerary, matched_hotels, matched_places)
+    structured = _build_structured(dep or {}, hotels, places, is_itinerary, matched_hotels, matched_places, packages)
     
     # Convert structured data to a string for the LLM
     context_str = json.dumps(structured, ensure_ascii=False, indent=2)
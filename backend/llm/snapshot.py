@@ -0,0 +1,196 @@
+"""
+Snapshot binario compacto de la base de conocimiento del asistente.
+
+`python -m llm.snapshot` compila data/munaybol_data.json en data/munaybol_data.kb:
+registros en JSON compacto e índices por nombre normalizado y por departamento ya
+construidos (lo que llm_client consulta en cada mensaje).
+
+Los workers lo abren con mmap (solo lectura), así N procesos Daphne comparten una
+única copia en el page cache; cada registro se decodifica la primera vez que se accede.
+
+Formato:
+    MAGIC(4) | VERSION(u16) | HEADER_LEN(u32) | HEADER(JSON utf-8) | BODY
+Los offsets del header son relativos al inicio de BODY.
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import unicodedata
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE_PATH = os.path.join(BASE_DIR, 'data', 'munaybol_data.json')
+SNAPSHOT_PATH = os.getenv("MUNAYBOL_SNAPSHOT", os.path.join(BASE_DIR, 'data', 'munaybol_data.kb'))
+
+MAGIC = b"MBKB"
+VERSION = 2
+_PREFIX = struct.Struct("<4sHI")
+
+SECTIONS = ("departamentos", "hoteles", "lugares_turisticos")
+
+
+# Misma normalización que llm_client (_norm_key y _filter_by_department)
+def norm_key(s: str) -> str:
+    if not s: return ""
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(c for c in s if unicodedata.category(c) != "Mn")
+    return re.sub(r"[^a-zA-Z0-9]+", " ", s).strip().lower()
+
+
+def dep_key(s: str) -> str:
+    s = (s or "").lower().replace(" ", "")
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+
+def build_snapshot(data: Dict[str, Any], source_stat: Optional[os.stat_result] = None) -> bytes:
+    body = bytearray()
+    header: Dict[str, Any] = {
+        "meta": data.get("info_base_datos") or {},
+        "source": {"size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns} if source_stat else None,
+        "records": {},
+        "indexes": {},
+        "by_departamento": {},
+    }
+
+    for section in SECTIONS:
+        items = data.get(section) or []
+        offsets, index, by_dep = [], {}, {}
+        for i, it in enumerate(items):
+            raw = json.dumps(it, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            offsets.append([len(body), len(raw)])
+            body.extend(raw)
+            if it.get("nombre"):
+                index[norm_key(it["nombre"])] = i
+            if it.get("departamento"):
+                by_dep.setdefault(dep_key(it["departamento"]), []).append(i)
+        header["records"][section] = offsets
+        header["indexes"][section] = index
+        header["by_departamento"][section] = by_dep
+
+    raw_header = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _PREFIX.pack(MAGIC, VERSION, len(raw_header)) + raw_header + bytes(body)
+
+
+class _Records(Sequence):
+    """Secuencia de solo lectura que decodifica cada registro desde el mmap al primer acceso."""
+
+    def __init__(self, buf, base: int, offsets: List[List[int]], by_dep: Dict[str, List[int]]):
+        self._buf = buf
+        self._base = base
+        self._offsets = offsets
+        self._by_dep = by_dep
+        self._decoded: List[Optional[Dict[str, Any]]] = [None] * len(offsets)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        rec = self._decoded[i]
+        if rec is None:
+            off, ln = self._offsets[i]
+            start = self._base + off
+            rec = self._decoded[i] = json.loads(self._buf[start:start + ln])
+        return rec
+
+    def by_departamento(self, dep_norm: str) -> List[Dict[str, Any]]:
+        return [self[i] for i in self._by_dep.get(dep_norm, [])]
+
+
+class _Index(Mapping):
+    """Índice nombre_normalizado -> registro; las claves viven en memoria, los valores en el mmap."""
+
+    def __init__(self, keys: Dict[str, int], records: _Records):
+        self._keys = keys
+        self._records = records
+
+    def __getitem__(self, k):
+        return self._records[self._keys[k]]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class Snapshot:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_len = _PREFIX.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"Snapshot inválido o de otra versión: {path}")
+        start = _PREFIX.size
+        self.header = json.loads(self._mm[start:start + header_len])
+        self._base = start + header_len
+        self.meta = self.header.get("meta") or {}
+        self._records = {
+            s: _Records(self._mm, self._base, self.header["records"].get(s, []), self.header["by_departamento"].get(s, {}))
+            for s in SECTIONS
+        }
+
+    def records(self, section: str) -> _Records:
+        return self._records[section]
+
+    def index(self, section: str) -> _Index:
+        return _Index(self.header["indexes"].get(section, {}), self._records[section])
+
+    def is_fresh_for(self, source_path: str) -> bool:
+        src = self.header.get("source")
+        if not src:
+            return True
+        try:
+            st = os.stat(source_path)
+        except OSError:
+            return True
+        return st.st_size == src.get("size") and st.st_mtime_ns == src.get("mtime_ns")
+
+def load_snapshot(path: str = SNAPSHOT_PATH, source_path: str = DATA_FILE_PATH) -> Optional[Snapshot]:
+    if not os.path.exists(path):
+        return None
+    try:
+        snap = Snapshot(path)
+    except Exception as e:
+        logger.warning(f"No se pudo abrir el snapshot {path}: {e}")
+        return None
+    if not snap.is_fresh_for(source_path):
+        logger.warning(f"Snapshot {path} desactualizado respecto a {source_path}; se usará el JSON.")
+        return None
+    return snap
+
+
+def write_snapshot(source_path: str = DATA_FILE_PATH, out_path: str = SNAPSHOT_PATH) -> int:
+    with open(source_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    raw = build_snapshot(data, source_stat=os.stat(source_path))
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+    os.replace(tmp, out_path)
+    return len(raw)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compila munaybol_data.json en un snapshot binario para el asistente.")
+    parser.add_argument("--source", default=DATA_FILE_PATH)
+    parser.add_argument("--out", default=SNAPSHOT_PATH)
+    args = parser.parse_args(argv)
+
+    size = write_snapshot(args.source, args.out)
+    print(f"Snapshot escrito en {args.out} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
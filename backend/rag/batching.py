@@ -0,0 +1,116 @@
+"""
+Micro-batching de embeddings en tiempo de consulta.
+
+Las consultas que llegan dentro de una ventana corta (EMBED_BATCH_WAIT_MS) se
+agrupan en una sola llamada al modelo de embeddings y cada solicitante recibe
+su vector. Bajo carga, N round-trips pequeños a Ollama se convierten en uno.
+"""
+import bisect
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", "30"))
+
+
+class Histogram:
+    def __init__(self, bounds: List[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, v: float):
+        self.counts[bisect.bisect_left(self.bounds, v)] += 1
+        self.total += 1
+        self.sum += v
+
+    def snapshot(self) -> Dict[str, object]:
+        labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class MicroBatchEmbedder:
+    def __init__(self, embed_fn: EmbedFn, max_wait_ms: float = EMBED_BATCH_WAIT_MS, max_batch: int = EMBED_BATCH_MAX):
+        self.embed_fn = embed_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.wait_ms = Histogram([0.5, 1, 2, 5, 10, 20, 50])
+
+    def _ensure_worker(self):
+        if self._worker and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name="embed-microbatch", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        dispatched_at = time.monotonic()
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        with self._stats_lock:
+            self.batch_sizes.observe(len(batch))
+            for _, _, enqueued_at in batch:
+                self.wait_ms.observe((dispatched_at - enqueued_at) * 1000)
+        try:
+            vectors = self.embed_fn(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"embed_fn devolvió {len(vectors)} vectores para {len(texts)} textos")
+            vectors = dict(zip(texts, vectors))
+        except Exception as e:
+            for _, fut, _ in batch:
+                if not fut.done():  # el solicitante pudo cancelarlo
+                    fut.set_exception(e)
+            return
+        for text, fut, _ in batch:
+            if not fut.done():
+                fut.set_result(vectors[text])
+
+    def submit(self, text: str) -> Future:
+        fut: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, fut, time.monotonic()))
+        return fut
+
+    def embed(self, text: str, timeout: float = EMBED_TIMEOUT) -> List[float]:
+        return self.submit(text).result(timeout=timeout)
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        futures = [self.submit(t) for t in texts]
+        return [f.result(timeout=EMBED_TIMEOUT) for f in futures]
+
+    def stats(self) -> Dict[str, object]:
+        with self._stats_lock:
+            return {"batch_size": self.batch_sizes.snapshot(), "wait_ms": self.wait_ms.snapshot()}
+
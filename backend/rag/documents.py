@@ -0,0 +1,219 @@
+import json
+from typing import Any, Dict, List, Optional
+
+# Temas en los que se trocea cada departamento. Cada tema genera un documento
+# pequeño para que la recuperación traiga solo la parte relevante al prompt.
+DEPT_TOPICS = ("general", "gastronomia", "festividades", "costos", "transporte", "seguridad")
+
+
+def _clean(v: Any) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, (int, float)):
+        return str(v)
+    if not isinstance(v, str):
+        return ""
+    t = v.strip()
+    return "" if t.lower() in ("n/d", "nd") else t
+
+
+def _lines(*parts: Optional[str]) -> str:
+    return "\n".join(p for p in parts if p)
+
+
+def _dep_general(dep: Dict[str, Any]) -> str:
+    lugares = ", ".join(_clean(n) for n in (dep.get("lugares_destacados") or []) if _clean(n))
+    return _lines(
+        f"Capital: {_clean(dep.get('capital'))}" if _clean(dep.get("capital")) else None,
+        _clean(dep.get("descripcion_cultural")),
+        f"Clima: {_clean(dep.get('clima'))}" if _clean(dep.get("clima")) else None,
+        f"Mejor época de visita: {_clean(dep.get('mejor_epoca_visita'))}" if _clean(dep.get("mejor_epoca_visita")) else None,
+        f"Lugares destacados: {lugares}" if lugares else None,
+    )
+
+
+def _dep_gastronomia(dep: Dict[str, Any]) -> str:
+    platos = []
+    for p in dep.get("platos_adicionales") or []:
+        nombre = _clean(p.get("nombre"))
+        if not nombre:
+            continue
+        costo = _clean(p.get("costo_aprox_bs"))
+        platos.append(f"- {nombre}" + (f" (Bs. {costo})" if costo else ""))
+    return _lines(
+        f"Comida tradicional: {_clean(dep.get('comida_tradicional'))}" if _clean(dep.get("comida_tradicional")) else None,
+        "Platos típicos:" if platos else None,
+        *platos,
+    )
+
+
+def _dep_festividades(dep: Dict[str, Any]) -> str:
+    fest = []
+    for f in dep.get("festividades_principales") or []:
+        nombre = _clean(f.get("nombre"))
+        if not nombre:
+            continue
+        mes = _clean(f.get("mes"))
+        desc = _clean(f.get("descripcion"))
+        fest.append(f"- {nombre}" + (f" ({mes})" if mes else "") + (f": {desc}" if desc else ""))
+    return _lines(
+        f"Aniversario: {_clean(dep.get('fecha_aniversario'))}" if _clean(dep.get("fecha_aniversario")) else None,
+        "Festividades:" if fest else None,
+        *fest,
+    )
+
+
+def _dict_lines(d: Any) -> List[str]:
+    if not isinstance(d, dict):
+        return []
+    return [f"- {k.replace('_', ' ')}: {_clean(v)}" for k, v in d.items() if _clean(v)]
+
+
+def _dep_costos(dep: Dict[str, Any]) -> str:
+    rows = _dict_lines(dep.get("costos_promedio"))
+    return _lines("Costos promedio (Bs.):", *rows) if rows else ""
+
+
+def _dep_transporte(dep: Dict[str, Any]) -> str:
+    rows = _dict_lines(dep.get("transporte"))
+    return _lines("Transporte:", *rows) if rows else ""
+
+
+def _dep_seguridad(dep: Dict[str, Any]) -> str:
+    s = _clean(dep.get("seguridad_consejos"))
+    return f"Consejos de seguridad: {s}" if s else ""
+
+
+_DEPT_BUILDERS = {
+    "general": _dep_general,
+    "gastronomia": _dep_gastronomia,
+    "festividades": _dep_festividades,
+    "costos": _dep_costos,
+    "transporte": _dep_transporte,
+    "seguridad": _dep_seguridad,
+}
+
+
+def department_documents(dep: Dict[str, Any]) -> List[Dict[str, Any]]:
+    nombre = _clean(dep.get("nombre"))
+    if not nombre:
+        return []
+    docs = []
+    for tema in DEPT_TOPICS:
+        body = _DEPT_BUILDERS[tema](dep)
+        if not body:
+            continue
+        docs.append({
+            "id": f"departamento:{nombre}:{tema}",
+            "text": f"{nombre} — {tema}\n{body}",
+            "metadata": {"tipo": "departamento", "nombre": nombre, "departamento": nombre, "tema": tema},
+        })
+    return docs
+
+
+def hotel_document(h: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    nombre = _clean(h.get("nombre"))
+    if not nombre:
+        return None
+    amenidades = ", ".join(_clean(a) for a in (h.get("amenidades") or []) if _clean(a))
+    text = _lines(
+        f"Hotel {nombre}",
+        f"Ubicación: {_clean(h.get('ubicacion'))}" if _clean(h.get("ubicacion")) else None,
+        f"Departamento: {_clean(h.get('departamento'))}" if _clean(h.get("departamento")) else None,
+        f"Calificación: {_clean(h.get('calificacion'))}" if _clean(h.get("calificacion")) else None,
+        f"Rango de precios (Bs.): {_clean(h.get('rango_precios_bs'))}" if _clean(h.get("rango_precios_bs")) else None,
+        f"Amenidades: {amenidades}" if amenidades else None,
+        _clean(h.get("descripcion")),
+    )
+    return {
+        "id": f"hotel:{h.get('id_hotel') or nombre}",
+        "text": text,
+        "metadata": {
+            "tipo": "hotel",
+            "id": h.get("id_hotel"),
+            "nombre": nombre,
+            "departamento": _clean(h.get("departamento")),
+            "tema": "hotel",
+        },
+    }
+
+
+def place_document(p: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    nombre = _clean(p.get("nombre"))
+    if not nombre:
+        return None
+    costo = p.get("costo_aprox_bs")
+    costos = _dict_lines(costo) if isinstance(costo, dict) else ([f"- general: {_clean(costo)}"] if _clean(costo) else [])
+    text = _lines(
+        f"{nombre}" + (f" ({_clean(p.get('tipo'))})" if _clean(p.get("tipo")) else ""),
+        f"Ubicación: {_clean(p.get('ubicacion'))}" if _clean(p.get("ubicacion")) else None,
+        f"Departamento: {_clean(p.get('departamento'))}" if _clean(p.get("departamento")) else None,
+        f"Horario: {_clean(p.get('horario'))}" if _clean(p.get("horario")) else None,
+        _clean(p.get("descripcion")),
+        "Costos aproximados (Bs.):" if costos else None,
+        *costos,
+    )
+    return {
+        "id": f"lugar:{p.get('id_lugar') or nombre}",
+        "text": text,
+        "metadata": {
+            "tipo": "lugar",
+            "id": p.get("id_lugar"),
+            "nombre": nombre,
+            "departamento": _clean(p.get("departamento")),
+            "tema": "lugar",
+        },
+    }
+
+
+def package_document(pq: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    nombre = _clean(pq.get("nombre"))
+    if not nombre:
+        return None
+    text = _lines(
+        f"Paquete {nombre}" + (f" ({_clean(pq.get('tipo'))})" if _clean(pq.get("tipo")) else ""),
+        f"Precio (Bs.): {_clean(pq.get('precio'))}" if _clean(pq.get("precio")) else None,
+        f"Departamento: {_clean(pq.get('departamento'))}" if _clean(pq.get("departamento")) else None,
+        f"Hotel incluido: {_clean(pq.get('hotel'))}" if _clean(pq.get("hotel")) else None,
+        f"Lugar turístico: {_clean(pq.get('lugar'))}" if _clean(pq.get("lugar")) else None,
+    )
+    return {
+        "id": f"paquete:{pq.get('id_paquete') or nombre}",
+        "text": text,
+        "metadata": {
+            "tipo": "paquete",
+            "id": pq.get("id_paquete"),
+            "nombre": nombre,
+            "departamento": _clean(pq.get("departamento")),
+            "tema": "paquete",
+        },
+    }
+
+
+def build_documents(data: Any) -> List[Dict[str, Any]]:
+    """
+    Convierte el JSON de MunayBol en documentos {id, text, metadata} listos para indexar.
+    Los departamentos se trocean por tema; hoteles, lugares y paquetes generan un documento cada uno.
+    La metadata es compacta (tipo, id, nombre, departamento, tema) en vez del objeto crudo.
+    """
+    if not isinstance(data, dict):
+        items = data if isinstance(data, list) else []
+        return [{"id": f"item:{i}", "text": json.dumps(obj, ensure_ascii=False), "metadata": {"tipo": "item"}}
+                for i, obj in enumerate(items)]
+
+    docs: List[Dict[str, Any]] = []
+    for dep in data.get("departamentos") or []:
+        docs.extend(department_documents(dep))
+    for h in data.get("hoteles") or []:
+        d = hotel_document(h)
+        if d:
+            docs.append(d)
+    for p in data.get("lugares_turisticos") or []:
+        d = place_document(p)
+        if d:
+            docs.append(d)
+    for pq in data.get("paquetes") or []:
+        d = package_document(pq)
+        if d:
+            docs.append(d)
+    return docs
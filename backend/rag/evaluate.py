@@ -0,0 +1,145 @@
+"""
+Evaluación offline de la recuperación del asistente.
+
+Construye un conjunto de consultas etiquetadas a partir de munaybol_data.json
+(nombre de hotel/lugar, preguntas por departamento y por plato típico) y mide
+recall@k, MRR y latencia por consulta para cada backend (keyword, vector, hybrid).
+
+Uso:
+    python -m rag.evaluate                 # embedding stub, sin Ollama
+    python -m rag.evaluate --embed ollama  # embeddings reales vía Ollama
+    python -m rag.evaluate --k 1 3 5 --json
+    python -m rag.evaluate --concurrency 16 --batch-wait-ms 5  # micro-batching de embeddings
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from rag.batching import MicroBatchEmbedder
+from rag.documents import build_documents
+from rag.retrieval import HashingEmbedding, HybridRetriever, KeywordRetriever, VectorRetriever, ollama_embed_fn
+
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "munaybol_data.json"))
+
+
+def build_queries(data: Dict[str, Any]) -> List[Dict[str, str]]:
+    queries = []
+    for h in data.get("hoteles") or []:
+        if h.get("nombre"):
+            queries.append({"query": f"Cuéntame sobre el {h['nombre']}", "expected": f"hotel:{h.get('id_hotel') or h['nombre']}", "tipo": "hotel"})
+    for p in data.get("lugares_turisticos") or []:
+        if p.get("nombre"):
+            queries.append({"query": f"¿Qué horario tiene {p['nombre']}?", "expected": f"lugar:{p.get('id_lugar') or p['nombre']}", "tipo": "lugar"})
+    for d in data.get("departamentos") or []:
+        nombre = d.get("nombre")
+        if not nombre:
+            continue
+        queries.append({"query": f"¿Qué festividades hay en {nombre}?", "expected": f"departamento:{nombre}:festividades", "tipo": "departamento"})
+        queries.append({"query": f"¿Cómo es el transporte en {nombre}?", "expected": f"departamento:{nombre}:transporte", "tipo": "departamento"})
+        for plato in (d.get("platos_adicionales") or [])[:2]:
+            if plato.get("nombre"):
+                queries.append({"query": f"¿Dónde puedo comer {plato['nombre']}?", "expected": f"departamento:{nombre}:gastronomia", "tipo": "plato"})
+    return queries
+
+
+def evaluate(retriever, queries: List[Dict[str, str]], ks: List[int], concurrency: int = 1) -> Dict[str, Any]:
+    depth = max(ks)
+
+    def run(q):
+        t0 = time.perf_counter()
+        results = retriever.search(q["query"], depth)
+        return results, (time.perf_counter() - t0) * 1000
+
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(run, queries))
+    else:
+        outcomes = [run(q) for q in queries]
+
+    hits = {k: 0 for k in ks}
+    rr_total = 0.0
+    latencies_ms = []
+    for q, (results, elapsed_ms) in zip(queries, outcomes):
+        latencies_ms.append(elapsed_ms)
+        ids = [doc_id for doc_id, _ in results]
+        rank = ids.index(q["expected"]) + 1 if q["expected"] in ids else None
+        if rank:
+            rr_total += 1.0 / rank
+            for k in ks:
+                if rank <= k:
+                    hits[k] += 1
+    n = len(queries) or 1
+    lat = sorted(latencies_ms) or [0.0]
+    return {
+        "backend": retriever.name,
+        "queries": len(queries),
+        "recall": {f"@{k}": round(hits[k] / n, 4) for k in ks},
+        "mrr": round(rr_total / n, 4),
+        "latency_ms": {
+            "mean": round(statistics.fmean(lat), 3),
+            "p50": round(lat[len(lat) // 2], 3),
+            "p95": round(lat[min(int(len(lat) * 0.95), len(lat) - 1)], 3),
+            "max": round(lat[-1], 3),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evalúa recall@k, MRR y latencia de la recuperación RAG.")
+    parser.add_argument("--data", default=DATA_PATH, help="Ruta a munaybol_data.json")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5], help="Valores de k para recall@k")
+    parser.add_argument("--embed", choices=["stub", "ollama"], default="stub", help="Modelo de embedding para vector/hybrid")
+    parser.add_argument("--backend", choices=["keyword", "vector", "hybrid"], nargs="+", default=["keyword", "vector", "hybrid"])
+    parser.add_argument("--concurrency", type=int, default=1, help="Consultas simultáneas (hilos)")
+    parser.add_argument("--batch-wait-ms", type=float, default=None,
+                        help="Agrupa los embeddings de consulta con esta ventana (ms); por defecto solo si --concurrency > 1")
+    parser.add_argument("--json", action="store_true", help="Imprime el reporte en JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.data, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    docs = build_documents(data)
+    queries = build_queries(data)
+
+    embed_fn = ollama_embed_fn() if args.embed == "ollama" else HashingEmbedding()
+    batcher = None
+    if args.batch_wait_ms is not None or args.concurrency > 1:
+        wait_ms = args.batch_wait_ms if args.batch_wait_ms is not None else 5.0
+        batcher = MicroBatchEmbedder(embed_fn, max_wait_ms=wait_ms)
+    keyword = KeywordRetriever(docs)
+    vector = VectorRetriever(docs, embed_fn, query_embed_fn=batcher) if {"vector", "hybrid"} & set(args.backend) else None
+    retrievers = {
+        "keyword": lambda: keyword,
+        "vector": lambda: vector,
+        "hybrid": lambda: HybridRetriever(keyword, vector),
+    }
+
+    report = [evaluate(retrievers[b](), queries, sorted(args.k), args.concurrency) for b in args.backend]
+    batching = batcher.stats() if batcher else None
+
+    if args.json:
+        print(json.dumps({"documentos": len(docs), "embed": args.embed, "concurrencia": args.concurrency,
+                          "resultados": report, "micro_batching": batching}, ensure_ascii=False, indent=2))
+        return report
+
+    print(f"Documentos: {len(docs)}  Consultas: {len(queries)}  Embedding: {args.embed}")
+    header = ["backend"] + [f"R{k}" for k in sorted(args.k)] + ["MRR", "p50 ms", "p95 ms"]
+    print("  ".join(f"{h:>9}" for h in header))
+    for r in report:
+        row = [r["backend"]] + [f"{v:.3f}" for v in r["recall"].values()] + [
+            f"{r['mrr']:.3f}", f"{r['latency_ms']['p50']:.2f}", f"{r['latency_ms']['p95']:.2f}"
+        ]
+        print("  ".join(f"{c:>9}" for c in row))
+    if batching:
+        print(f"Micro-batching de embeddings: {batching['batch_size']['count']} lotes")
+        print(f"  tamaño de lote: {batching['batch_size']['buckets']} (media {batching['batch_size']['mean']})")
+        print(f"  espera (ms):    {batching['wait_ms']['buckets']} (media {batching['wait_ms']['mean']})")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import math
+import re
+import unicodedata
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+_STOPWORDS = {
+    "de", "del", "la", "las", "el", "los", "en", "y", "a", "que", "un", "una", "por", "para",
+    "con", "se", "me", "mi", "es", "al", "lo", "como", "hay", "donde", "puedo", "cual", "cuales",
+    "sobre", "hotel", "hoteles", "tal",
+}
+
+
+def norm(s: str) -> str:
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(c for c in s if unicodedata.category(c) != "Mn")
+    return re.sub(r"[^a-zA-Z0-9]+", " ", s).strip().lower()
+
+
+def tokens(s: str) -> List[str]:
+    return [t for t in norm(s).split() if len(t) > 1 and t not in _STOPWORDS]
+
+
+class HashingEmbedding:
+    """
+    Embedding determinista sin dependencias (palabras + trigramas de caracteres
+    proyectados con hashing). Sirve para evaluar y probar sin Ollama.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _vector(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        for tok in tokens(text):
+            feats = [tok] + [tok[i:i + 3] for i in range(max(len(tok) - 2, 1))]
+            for f in feats:
+                h = zlib.crc32(f.encode("utf-8"))
+                vec[h % self.dim] += -1.0 if (h >> 16) & 1 else 1.0
+        n = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / n for v in vec]
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(t) for t in texts]
+
+
+def ollama_embed_fn() -> EmbedFn:
+    from rag.vector_store import get_embed_model
+    model = get_embed_model()
+    return lambda texts: model.get_text_embedding_batch(texts)
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def _unit(v: Sequence[float]) -> List[float]:
+    n = math.sqrt(sum(x * x for x in v)) or 1.0
+    return [x / n for x in v]
+
+
+class KeywordRetriever:
+    """
+    Réplica del matcher por nombre de llm_client (nombre normalizado contenido en
+    el prompt) con desempate por solapamiento de tokens.
+    """
+    name = "keyword"
+
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self.docs = docs
+        self._names = [norm((d.get("metadata") or {}).get("nombre") or "") for d in docs]
+        self._topics = [norm((d.get("metadata") or {}).get("tema") or "") for d in docs]
+        self._tokens = [set(tokens(d.get("text") or "")) for d in docs]
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        nq = norm(query)
+        qt = set(tokens(query))
+        scored = []
+        for i, d in enumerate(self.docs):
+            score = 0.0
+            name = self._names[i]
+            if name and (name in nq or nq in name):
+                score += 10.0
+            if self._topics[i] and self._topics[i] in nq:
+                score += 2.0
+            if qt:
+                score += len(qt & self._tokens[i]) / len(qt)
+            if score > 0:
+                scored.append((d["id"], score))
+        scored.sort(key=lambda x: -x[1])
+        return scored[:k]
+
+
+class VectorRetriever:
+    name = "vector"
+
+    def __init__(self, docs: List[Dict[str, Any]], embed_fn: EmbedFn, query_embed_fn: Optional[EmbedFn] = None):
+        self.docs = docs
+        self.embed_fn = embed_fn
+        # Para consultas concurrentes puede pasarse un MicroBatchEmbedder (rag.batching)
+        self.query_embed_fn = query_embed_fn or embed_fn
+        self._vectors = [_unit(v) for v in embed_fn([d.get("text") or "" for d in docs])]
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        q = _unit(self.query_embed_fn([query])[0])
+        scored = [(d["id"], _dot(q, v)) for d, v in zip(self.docs, self._vectors)]
+        scored.sort(key=lambda x: -x[1])
+        return scored[:k]
+
+
+class HybridRetriever:
+    """Fusión por rango recíproco (RRF) de keyword + vector."""
+    name = "hybrid"
+
+    def __init__(self, keyword: KeywordRetriever, vector: VectorRetriever, rrf_k: int = 60, depth: int = 20):
+        self.keyword = keyword
+        self.vector = vector
+        self.rrf_k = rrf_k
+        self.depth = depth
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        fused: Dict[str, float] = {}
+        for results in (self.keyword.search(query, self.depth), self.vector.search(query, self.depth)):
+            for rank, (doc_id, _score) in enumerate(results, start=1):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank)
+        return sorted(fused.items(), key=lambda x: -x[1])[:k]
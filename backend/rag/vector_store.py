@@ -0,0 +1,73 @@
+import os
+import logging
+from typing import Any, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+WEAVIATE_HOST = os.getenv("WEAVIATE_HOST", "weaviate")
+WEAVIATE_PORT = int(os.getenv("WEAVIATE_PORT", "8080"))
+WEAVIATE_GRPC_PORT = int(os.getenv("WEAVIATE_GRPC_PORT", "50051"))
+INDEX_NAME = os.getenv("INDEX_NAME", "MunayBol")
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://ollama:11434")
+EMBED_MODEL_NAME = "nomic-embed-text"
+
+
+def connect_client():
+    import weaviate
+    client = weaviate.connect_to_custom(
+        http_host=WEAVIATE_HOST, http_port=WEAVIATE_PORT, http_secure=False,
+        grpc_host=WEAVIATE_HOST, grpc_port=WEAVIATE_GRPC_PORT, grpc_secure=False
+    )
+    # Ping
+    _ = client.collections.list_all()
+    return client
+
+
+def get_vector_store(client):
+    from llama_index.vector_stores.weaviate import WeaviateVectorStore
+    return WeaviateVectorStore(weaviate_client=client, index_name=INDEX_NAME)
+
+
+def get_embed_model():
+    from llama_index.embeddings.ollama import OllamaEmbedding
+    return OllamaEmbedding(model_name=EMBED_MODEL_NAME, base_url=OLLAMA_BASE_URL)
+
+
+def to_llama_documents(chunks: Iterable[Dict[str, Any]]):
+    from llama_index.core import Document
+    return [Document(id_=c["id"], text=c["text"], metadata=c["metadata"]) for c in chunks]
+
+
+def close_quietly(client):
+    if client:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def upsert_documents(chunks: List[Dict[str, Any]], delete_ids: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Reemplaza en Weaviate solo los documentos indicados (por id de documento) y
+    elimina los de `delete_ids`, sin reconstruir el índice completo.
+    """
+    from llama_index.core import VectorStoreIndex
+
+    stale = set(delete_ids) | {c["id"] for c in chunks}
+    if not stale:
+        return {"insertados": 0, "eliminados": 0}
+    client = None
+    try:
+        client = connect_client()
+        vector_store = get_vector_store(client)
+        for doc_id in stale:
+            vector_store.delete(ref_doc_id=doc_id)
+        if chunks:
+            index = VectorStoreIndex.from_vector_store(vector_store, embed_model=get_embed_model())
+            for doc in to_llama_documents(chunks):
+                index.insert(doc)
+        logger.info(f"Vector store sincronizado: insertados={len(chunks)} eliminados={len(stale) - len(chunks)}")
+        return {"insertados": len(chunks), "eliminados": len(stale) - len(chunks)}
+    finally:
+        close_quietly(client)